@@ -0,0 +1,234 @@
+# -------------------------------------------------------------
+# Multi-instance batch runner
+#
+#     python batch_run.py get_instance_large instances/ day1.json \
+#         --workers 8 --timeout 30 --format csv --output results.csv
+#
+# Each argument is a built-in fixture name (get_instance_*), an
+# instance JSON file (instance_json.py format) or a directory of
+# *.json files.
+#
+# RUN_BATCH(specs):
+#     keep at most 4 * workers jobs in flight          // bounded memory
+#     worker: load instance, PDP_GREEDY_INSERT_2OPT under a timer
+#             (SIGALRM; no timeout where the platform lacks it)
+#     as each job finishes: write one result line (JSON lines or CSV)
+#
+# Result fields: instance, status (ok | infeasible | timeout | error),
+# cost, greedy_cost, route, greedy, order (route_to_dictionary),
+# load_time, solve_time, message, and lower_bound / gap with --gap.
+# Lines are written in completion order, not input order.
+# -------------------------------------------------------------
+
+import contextlib
+import csv
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import instance_input
+from distance import total_distance
+from instance_json import load_instance
+from main import route_to_dictionary
+from solver import PDP_GREEDY_INSERT_2OPT
+
+
+FIELDS = (
+    "instance", "status", "cost", "greedy_cost", "lower_bound", "gap",
+    "load_time", "solve_time", "route", "greedy", "order", "message",
+)
+
+
+def expand_specs(args):
+    """
+    Fixture names, files and directories -> list of instance specs.
+    """
+    specs = []
+    for arg in args:
+        if os.path.isdir(arg):
+            specs += sorted(
+                os.path.join(arg, name) for name in os.listdir(arg) if name.endswith(".json")
+            )
+        else:
+            specs.append(arg)
+    return specs
+
+
+def run_batch(specs, workers=None, timeout=None, gap=None):
+    """
+    Solve every spec; yields one result dictionary per instance as it
+    finishes. workers=1 solves inline.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = iter(specs)
+
+    if workers == 1:
+        for spec in jobs:
+            yield solve_spec(spec, timeout, gap)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = set()
+        for spec in jobs:
+            running.add(pool.submit(solve_spec, spec, timeout, gap))
+            if len(running) >= 4 * workers:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def solve_spec(spec, timeout=None, gap=None):
+    """
+    Load and solve one instance. Never raises: failures are reported
+    in the result's status and message.
+    """
+    record = {"instance": spec}
+    start = time.perf_counter()
+
+    try:
+        instance = _load(spec)
+    except Exception as exc:
+        record.update(status="error", message=f"load failed: {exc}")
+        return record
+
+    loaded = time.perf_counter()
+    record["load_time"] = loaded - start
+
+    result = {}
+    try:
+        with _time_limit(timeout), open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            greedy, final = PDP_GREEDY_INSERT_2OPT(instance, gap=gap, result=result)
+    except _Timeout:
+        record.update(status="timeout", message=f"no result within {timeout} s")
+        record["solve_time"] = time.perf_counter() - loaded
+        return record
+    except Exception as exc:
+        record.update(status="error", message=str(exc))
+        record["solve_time"] = time.perf_counter() - loaded
+        return record
+
+    record["solve_time"] = time.perf_counter() - loaded
+
+    if greedy is None:
+        record.update(status="infeasible", message=final)
+        return record
+
+    V = instance.get("V")
+    record.update(
+        status="ok",
+        cost=total_distance(final, instance["c"], V),
+        greedy_cost=total_distance(greedy, instance["c"], V),
+        route=final,
+        greedy=greedy,
+        order=route_to_dictionary(final, instance),
+    )
+    if "gap" in result:
+        record["lower_bound"] = result["lower_bound"]
+        record["gap"] = result["gap"]
+
+    return record
+
+
+def write_results(results, out, fmt="jsonl"):
+    """
+    Stream result dictionaries to out as JSON lines or CSV; returns
+    the number of results per status.
+    """
+    counts = {}
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+
+    for record in results:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+        record = {k: record[k] for k in FIELDS if k in record}
+        if writer is None:
+            out.write(json.dumps(record) + "\n")
+        else:
+            writer.writerow({
+                k: json.dumps(v) if isinstance(v, (list, dict)) else v
+                for k, v in record.items()
+            })
+        out.flush()
+
+    return counts
+
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def _load(spec):
+    if os.path.isfile(spec):
+        return load_instance(spec)
+    if spec.startswith("get_instance") and callable(getattr(instance_input, spec, None)):
+        return getattr(instance_input, spec)()
+    raise ValueError(f"{spec} is neither an instance file nor a get_instance_* fixture")
+
+
+class _Timeout(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def _time_limit(seconds):
+    """
+    Raise _Timeout in the current (main) thread after seconds.
+    No-op without a limit or where SIGALRM does not exist.
+    """
+    if not seconds or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    def expire(signum, frame):
+        raise _Timeout()
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+# MAIN SCRIPT
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Solve many PDP instances")
+    parser.add_argument("instances", nargs="+",
+                        help="fixture names (get_instance_*), instance JSON files or directories")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per instance")
+    parser.add_argument("--gap", type=float, default=None,
+                        help="stop 2-opt within this gap of the lower bound, and report it")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--output", default="-", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    specs = expand_specs(args.instances)
+    results = run_batch(specs, args.workers, args.timeout, args.gap)
+
+    if args.output == "-":
+        counts = write_results(results, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", newline="") as out:
+            counts = write_results(results, out, args.format)
+
+    print(f"{len(specs)} instance(s): {counts}", file=sys.stderr)
+    return 0 if counts.get("error", 0) == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+# -------------------------------------------------------------
+# Lower bounds on the route cost
+#
+# A route visits s, p(r) and d(r) for every request r, and e if
+# required (one visit per request at a shared node), so it is a
+# Hamiltonian path over these visits. Co-located visits served at one
+# stop are consecutive in that path, joined by c[v][v] = 0. Both bounds
+# relax that path and ignore time windows:
+#
+# TREE BOUND (1-tree style):
+#     the path is a spanning tree of the visits, so
+#     cost >= MST over the visits with weights min(c[i][j], c[j][i])
+#
+# ASSIGNMENT BOUND:
+#     close the path into a cycle (e -> s, or last visit -> dummy -> s,
+#     at zero cost); then every visit has exactly one successor:
+#         minimise SUM c[x][succ(x)] over assignments succ
+#     forbidden successors:
+#         x -> x
+#         d -> p   when p must precede d (request or paired set),
+#                  for nodes visited only once
+#         anything -> s,  e -> anything but s
+#     solved exactly with the Hungarian algorithm, O(m^3)
+#
+# LOWER_BOUND = max(tree, assignment)
+# GAP(cost)   = (cost - LOWER_BOUND) / cost
+# -------------------------------------------------------------
+
+from preprocessing import precedence_pairs
+
+
+_FORBIDDEN = float("inf")
+
+
+def lower_bound(instance, assignment_limit=250):
+    """
+    Returns {"tree": ..., "assignment": ..., "bound": ...}. The
+    assignment bound is skipped (None) above assignment_limit visits.
+    """
+    visits = _visits(instance)
+    index = {v: idx for idx, v in enumerate(instance["V"])}
+    c = instance["c"]
+
+    tree = _tree_bound(visits, index, c)
+    assignment = None
+    if len(visits) <= assignment_limit:
+        assignment = _assignment_bound(instance, visits, index, c)
+
+    bound = tree if assignment is None else max(tree, assignment)
+    return {"tree": tree, "assignment": assignment, "bound": bound}
+
+
+def optimality_gap(cost, bound):
+    """
+    Relative gap of a route cost to a lower bound, (cost - bound) / cost.
+    """
+    if cost <= 0:
+        return 0.0
+    return max(cost - bound, 0.0) / cost
+
+
+def target_cost(bound, gap):
+    """
+    Largest cost whose optimality_gap() is within gap.
+    """
+    if gap >= 1:
+        return float("inf")
+    return bound / (1 - gap)
+
+
+
+# ============================================================
+# Helper 1: visits of a route
+# ============================================================
+
+def _visits(instance):
+    visits = [instance["s"]]
+    for r in sorted(instance["R"]):
+        visits.append(instance["pickup"][r])
+        visits.append(instance["delivery"][r])
+    if instance["e"] is not None:
+        visits.append(instance["e"])
+    return visits
+
+
+
+# ============================================================
+# Helper 2: minimum spanning tree (Prim, O(m^2))
+# ============================================================
+
+def _tree_bound(visits, index, c):
+    m = len(visits)
+    if m < 2:
+        return 0.0
+
+    pos = [index[v] for v in visits]
+    in_tree = [False] * m
+    best = [float("inf")] * m
+    best[0] = 0.0
+    total = 0.0
+
+    for _ in range(m):
+        u = min((k for k in range(m) if not in_tree[k]), key=best.__getitem__)
+        in_tree[u] = True
+        total += best[u]
+        row, pu = c[pos[u]], pos[u]
+        for k in range(m):
+            if not in_tree[k]:
+                w = min(row[pos[k]], c[pos[k]][pu])
+                if w < best[k]:
+                    best[k] = w
+
+    return total
+
+
+
+# ============================================================
+# Helper 3: assignment relaxation
+# ============================================================
+
+def _assignment_bound(instance, visits, index, c):
+    s, e = instance["s"], instance["e"]
+    m = len(visits)
+    last = m - 1 if e is not None else m      # visit that closes the cycle
+    size = m if e is not None else m + 1      # + dummy end visit
+
+    once = {v for v in visits if visits.count(v) == 1}
+    forbidden = {(d, p) for p, d in precedence_pairs(instance) if p in once and d in once}
+
+    cost = [[_FORBIDDEN] * size for _ in range(size)]
+    for x in range(m):
+        for y in range(1, m):                 # nothing returns to s
+            if x == y or x == last:
+                continue
+            if (visits[x], visits[y]) in forbidden:
+                continue
+            cost[x][y] = c[index[visits[x]]][index[visits[y]]]
+
+    if e is not None:
+        cost[last][0] = 0.0
+    else:
+        for x in range(1, m):
+            cost[x][last] = 0.0               # any visit may end the route
+        cost[last][0] = 0.0
+        if m == 1:
+            cost[0][last] = 0.0
+
+    return _hungarian(cost)
+
+
+def _hungarian(cost):
+    """
+    Minimum-cost perfect assignment (rows to columns) of a square
+    matrix, with potentials (O(n^3)). inf entries are forbidden;
+    returns None if every assignment needs one.
+    """
+    n = len(cost)
+    big = 1 + sum(max((w for w in row if w != _FORBIDDEN), default=0) for row in cost)
+    INF = float("inf")
+
+    u = [0.0] * (n + 1)
+    v = [0.0] * (n + 1)
+    match = [0] * (n + 1)                     # match[j] = row assigned to column j
+    way = [0] * (n + 1)
+
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        minv = [INF] * (n + 1)
+        used = [False] * (n + 1)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            row = cost[i0 - 1]
+            ui0 = u[i0]
+            delta = INF
+            j1 = 0
+            for j in range(1, n + 1):
+                if not used[j]:
+                    w = row[j - 1]
+                    cur = (big if w == _FORBIDDEN else w) - ui0 - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(n + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+
+    total = 0.0
+    for j in range(1, n + 1):
+        w = cost[match[j] - 1][j - 1]
+        if w == _FORBIDDEN:
+            return None                       # no finite assignment
+        total += w
+    return total
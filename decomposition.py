@@ -0,0 +1,257 @@
+# -------------------------------------------------------------
+# Decomposition mode for very large instances
+#
+# PDP_DECOMPOSED(instance):
+#     units = paired sets (merged if they overlap) + single requests
+#     k     = ceil(|R| / cluster_size)
+#
+#     // cluster units by location and time
+#     seeds = k units evenly spread over the pickup-window midpoints
+#     assign every unit to its nearest seed with room left
+#
+#     // solve every cluster on its own, in parallel
+#     for each cluster (process pool):
+#         sub_route = PDP_GREEDY_INSERT_2OPT(sub-instance)
+#
+#     // stitch
+#     order clusters by earliest pickup window
+#     route = s + sub-routes in that order; requests of stops that
+#             become late at a seam are dropped
+#     REPLAN(add = every dropped request)
+#
+#     // polish
+#     2-opt restricted to ± seam_window positions around every seam
+#
+# Unit distance:
+#     c[p1][p2] + c[d1][d2]  (first pickup / first delivery of each unit)
+#     + time_weight * |midpoint of pickup windows 1 - midpoint 2|
+# -------------------------------------------------------------
+
+import contextlib
+import io
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+from preprocessing import pairing_groups
+from replan import REPLAN, local_two_opt
+from route_state import build_state, drop_late_requests, route_feasible
+from solver import PDP_GREEDY_INSERT_2OPT
+
+
+def PDP_DECOMPOSED(instance, cluster_size=50, workers=None, seam_window=5, time_weight=1.0):
+    """
+    Cluster, solve clusters in parallel, stitch and polish.
+
+    cluster_size  most requests per cluster
+    workers       process-pool size (default: os.cpu_count())
+    seam_window   positions on each side of a seam the polish may touch
+    time_weight   weight of the time-window term in the unit distance
+
+    Returns (stitched, final) like PDP_GREEDY_INSERT_2OPT, or
+    (None, message) if some requests could not be placed.
+    """
+    units = _units(instance)
+    k = max(1, math.ceil(len(instance["R"]) / cluster_size))
+
+    if k == 1:
+        return PDP_GREEDY_INSERT_2OPT(instance)
+
+    clusters = _cluster(instance, units, k, cluster_size, time_weight)
+
+    print("\n=== TRACE: Decomposition ===")
+    print("Clusters:", len(clusters), " sizes:", [len(cl) for cl in clusters])
+
+    # ---- Solve clusters in parallel ----
+    subs = [_sub_instance(instance, cl) for cl in clusters]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        sub_routes = list(pool.map(_solve_cluster, subs))
+
+    # ---- Stitch ----
+    stitched, leftover = _stitch(instance, clusters, sub_routes)
+    print("Stitched route length:", len(stitched), " leftover requests:", sorted(leftover))
+
+    route = stitched
+    if leftover:
+        route, rejected = REPLAN(instance, stitched, add=sorted(leftover))
+        if rejected:
+            return None, f"instance infeasible (decomposition could not place {rejected})"
+
+    # ---- Polish the seams ----
+    state = build_state(route, instance)
+    for seam in _seams(route, instance, clusters):
+        lo = max(0, seam - seam_window)
+        hi = min(len(state["route"]) - 1, seam + seam_window)
+        local_two_opt(state, instance, lo, hi)
+
+    return stitched, state["route"]
+
+
+
+# ============================================================
+# Helper 1: clustering units
+# ============================================================
+
+def _units(instance):
+    """
+    Paired sets that share a request are merged; every request not in
+    a paired set is a unit on its own.
+    """
+    units = [set(g) for g in pairing_groups(instance)]
+
+    grouped = set().union(*units) if units else set()
+    units += [{r} for r in instance["R"] if r not in grouped]
+
+    return [sorted(u) for u in units]
+
+
+def _cluster(instance, units, k, cluster_size, time_weight):
+    index = {v: idx for idx, v in enumerate(instance["V"])}
+    c = instance["c"]
+    pickup = instance["pickup"]
+    delivery = instance["delivery"]
+    open_tw = instance["open"]
+    close_tw = instance["close"]
+
+    def window(unit):
+        return (min(open_tw[pickup[r]] for r in unit), max(close_tw[pickup[r]] for r in unit))
+
+    def dist(u1, u2):
+        p1, p2 = index[pickup[u1[0]]], index[pickup[u2[0]]]
+        d1, d2 = index[delivery[u1[0]]], index[delivery[u2[0]]]
+        (o1, c1), (o2, c2) = window(u1), window(u2)
+        return c[p1][p2] + c[d1][d2] + time_weight * abs((o1 + c1) - (o2 + c2)) / 2
+
+    # seeds spread evenly over the pickup-window midpoints, so the
+    # clusters cover consecutive stretches of the vehicle's day
+    by_time = sorted(units, key=lambda u: sum(window(u)))
+    step = len(by_time) / min(k, len(units))
+    seeds = [by_time[int(step * (m + 0.5))] for m in range(min(k, len(units)))]
+
+    clusters = [[] for _ in seeds]
+    for unit in sorted(units, key=len, reverse=True):
+        ranked = sorted(range(len(seeds)), key=lambda s: dist(unit, seeds[s]))
+        target = next(
+            (s for s in ranked if len(clusters[s]) + len(unit) <= cluster_size),
+            min(range(len(seeds)), key=lambda s: len(clusters[s])),
+        )
+        clusters[target] += unit
+
+    return [sorted(cl) for cl in clusters if cl]
+
+
+
+# ============================================================
+# Helper 2: sub-instances and workers
+# ============================================================
+
+def _sub_instance(instance, requests):
+    """
+    Instance restricted to the depots and the nodes of requests, with
+    their ride limits, the route-duration limit and the travel-time
+    profiles of the arcs between kept nodes.
+    """
+    keep = {instance["s"]}
+    if instance["e"] is not None:
+        keep.add(instance["e"])
+    for r in requests:
+        keep.add(instance["pickup"][r])
+        keep.add(instance["delivery"][r])
+
+    positions = [idx for idx, v in enumerate(instance["V"]) if v in keep]
+    V = [instance["V"][idx] for idx in positions]
+    R = set(requests)
+
+    sub = {
+        "s": instance["s"],
+        "e": instance["e"],
+        "R": R,
+        "pickup": {r: instance["pickup"][r] for r in R},
+        "delivery": {r: instance["delivery"][r] for r in R},
+        "V": V,
+        "c": [[instance["c"][i][j] for j in positions] for i in positions],
+        "T": [[instance["T"][i][j] for j in positions] for i in positions],
+        "service": {v: instance["service"][v] for v in V},
+        "open": {v: instance["open"][v] for v in V},
+        "close": {v: instance["close"][v] for v in V},
+        "paired_sets": [set(g) for g in instance["paired_sets"] if set(g) <= R],
+    }
+
+    max_ride = instance.get("max_ride") or {}
+    if max_ride:
+        sub["max_ride"] = {r: max_ride[r] for r in R if r in max_ride}
+    if instance.get("max_duration") is not None:
+        sub["max_duration"] = instance["max_duration"]
+    profiles = instance.get("T_profile") or {}
+    if profiles:
+        sub["T_profile"] = {
+            (i, j): profile for (i, j), profile in profiles.items() if i in keep and j in keep
+        }
+
+    return sub
+
+
+def _solve_cluster(sub):
+    with contextlib.redirect_stdout(io.StringIO()):
+        greedy, final = PDP_GREEDY_INSERT_2OPT(sub)
+    return final if isinstance(final, list) else None
+
+
+
+# ============================================================
+# Helper 3: stitching sub-routes
+# ============================================================
+
+def _stitch(instance, clusters, sub_routes):
+    """
+    Concatenate sub-routes (without their depots) ordered by the
+    earliest pickup window of each cluster. Requests whose stops end
+    up late after a seam, and whole clusters without a sub-route, are
+    returned as leftovers. Returns (route, leftover).
+    """
+    s = instance["s"]
+    e = instance["e"]
+    pickup = instance["pickup"]
+
+    def earliest(cl):
+        return min(instance["open"][pickup[r]] for r in cl)
+
+    order = sorted(range(len(clusters)), key=lambda k: earliest(clusters[k]))
+
+    route = [s]
+    tail = [] if e is None else [e]
+    leftover = set()
+
+    for k in order:
+        sub = sub_routes[k]
+        if sub is None:
+            leftover |= set(clusters[k])
+            continue
+
+        body = [v for v in sub[1:] if v != e]
+        repaired = drop_late_requests(route + body + tail, instance)
+        if repaired is None or not route_feasible(repaired[0], instance):
+            leftover |= set(clusters[k])
+            continue
+
+        trial, dropped = repaired
+        route = trial[:len(trial) - len(tail)]
+        leftover |= set(dropped)
+
+    return route + tail, leftover
+
+
+def _seams(route, instance, clusters):
+    """
+    Positions where the route moves from one cluster's nodes to
+    another's.
+    """
+    cluster_of = {}
+    for k, cl in enumerate(clusters):
+        for r in cl:
+            cluster_of[instance["pickup"][r]] = k
+            cluster_of[instance["delivery"][r]] = k
+
+    return [
+        pos for pos in range(1, len(route))
+        if cluster_of.get(route[pos - 1], -1) != cluster_of.get(route[pos], -1)
+    ]
@@ -0,0 +1,330 @@
+# -------------------------------------------------------------
+# Asyncio dispatch service
+#
+# Clients connect over TCP (localhost by default) and send one JSON
+# object per line:
+#
+#     {"id": ..., "instance": <instance_json form>, "deadline": 2.5}
+#
+# and get one JSON line back per job:
+#
+#     {"id": ..., "status": "ok" | "infeasible" | "expired" | "error",
+#      "greedy": [...], "route": [...],
+#      "queue_latency": s, "solve_latency": s}
+#
+# SERVICE:
+#     reader:      parse line -> await queue.put(job)     // blocks when full
+#     dispatcher:  job = await queue.get()
+#                  if job is small: gather more small jobs for
+#                                   batch_window seconds (up to batch_size)
+#                  await free worker slot                 // back-pressure
+#                  run batch in the process pool
+#     worker:      solve each job with PDP_GREEDY_INSERT_2OPT
+#
+# Jobs whose deadline has passed when they leave the queue are
+# answered with "expired" and never solved. The event loop itself
+# never runs solver code.
+# -------------------------------------------------------------
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from instance_json import instance_from_json
+from solver import PDP_GREEDY_INSERT_2OPT
+
+
+async def start_service(
+    host="127.0.0.1",
+    port=0,
+    workers=None,
+    queue_size=64,
+    batch_size=8,
+    batch_window=0.005,
+    small_requests=10,
+):
+    """
+    Start the service and return its state dictionary; the bound port
+    is service["port"]. Stop it with stop_service().
+
+    workers         process-pool size (default: os.cpu_count())
+    queue_size      jobs waiting before readers stop accepting input
+    batch_size      most jobs sent to one worker at once
+    batch_window    how long to wait for more small jobs (seconds)
+    small_requests  instances with at most this many requests are
+                    batched
+    """
+    workers = workers or os.cpu_count() or 1
+
+    service = {
+        "queue": asyncio.Queue(maxsize=queue_size),
+        "pool": ProcessPoolExecutor(max_workers=workers),
+        "slots": asyncio.Semaphore(workers),
+        "batch_size": batch_size,
+        "batch_window": batch_window,
+        "small_requests": small_requests,
+        "tasks": set(),
+        "clients": set(),
+    }
+
+    service["server"] = await asyncio.start_server(
+        lambda r, w: _handle_client(service, r, w), host, port
+    )
+    service["port"] = service["server"].sockets[0].getsockname()[1]
+    service["dispatcher"] = asyncio.ensure_future(_dispatch(service))
+
+    return service
+
+
+async def stop_service(service):
+    service["server"].close()
+    for task in list(service["clients"]):
+        task.cancel()
+    if service["clients"]:
+        await asyncio.gather(*service["clients"], return_exceptions=True)
+    await service["server"].wait_closed()
+    service["dispatcher"].cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await service["dispatcher"]
+    if service["tasks"]:
+        await asyncio.gather(*service["tasks"], return_exceptions=True)
+    service["pool"].shutdown(wait=True)
+
+
+async def submit(host, port, jobs):
+    """
+    Small client: send jobs (dicts with "id", "instance" in JSON form
+    and optional "deadline") over one connection and return the
+    responses in completion order.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    for job in jobs:
+        writer.write(json.dumps(job).encode() + b"\n")
+    await writer.drain()
+
+    results = []
+    for _ in jobs:
+        line = await reader.readline()
+        results.append(json.loads(line))
+
+    writer.close()
+    await writer.wait_closed()
+    return results
+
+
+
+# ============================================================
+# Helper 1: one client connection
+# ============================================================
+
+async def _handle_client(service, reader, writer):
+    loop = asyncio.get_running_loop()
+    lock = asyncio.Lock()
+    conn = {"pending": 0, "idle": asyncio.Event()}
+    conn["idle"].set()
+
+    task = asyncio.current_task()
+    service["clients"].add(task)
+
+    async def respond(result):
+        try:
+            async with lock:
+                writer.write(json.dumps(result).encode() + b"\n")
+                await writer.drain()
+        finally:
+            # answered, or the client is gone: either way not pending
+            conn["pending"] -= 1
+            if conn["pending"] == 0:
+                conn["idle"].set()
+
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+
+            conn["pending"] += 1
+            conn["idle"].clear()
+
+            job_id = None
+            try:
+                message = json.loads(line)
+                if not isinstance(message, dict):
+                    raise TypeError(f"expected a JSON object, got {type(message).__name__}")
+                job_id = message.get("id")
+                job = {
+                    "id": job_id,
+                    "instance": message["instance"],
+                    "size": len(message["instance"]["R"]),
+                    "arrived": loop.time(),
+                    "deadline": None,
+                    "respond": respond,
+                }
+                if message.get("deadline") is not None:
+                    job["deadline"] = job["arrived"] + float(message["deadline"])
+            except (ValueError, KeyError, TypeError) as exc:
+                await _reply(respond, {"id": job_id, "status": "error", "error": str(exc)})
+                continue
+
+            # Blocks when the queue is full: back-pressure on the client
+            await service["queue"].put(job)
+
+        # answer everything this client sent before closing
+        await conn["idle"].wait()
+    except asyncio.CancelledError:
+        # service shutdown: drop the connection quietly
+        pass
+    finally:
+        service["clients"].discard(task)
+        writer.close()
+
+
+
+# ============================================================
+# Helper 2: dispatcher and micro-batching
+# ============================================================
+
+async def _dispatch(service):
+    loop = asyncio.get_running_loop()
+    queue = service["queue"]
+
+    while True:
+        job = await queue.get()
+        batch = [job]
+
+        if job["size"] <= service["small_requests"]:
+            until = loop.time() + service["batch_window"]
+            while len(batch) < service["batch_size"]:
+                remaining = until - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if nxt["size"] > service["small_requests"]:
+                    # large jobs never wait in a batch
+                    await service["slots"].acquire()
+                    _start_batch(service, [nxt])
+                    continue
+                batch.append(nxt)
+
+        await service["slots"].acquire()
+        _start_batch(service, batch)
+
+
+def _start_batch(service, batch):
+    task = asyncio.ensure_future(_run_batch(service, batch))
+    service["tasks"].add(task)
+    task.add_done_callback(service["tasks"].discard)
+
+
+async def _run_batch(service, batch):
+    """
+    Answer expired jobs, send the rest to one worker, answer them.
+    Releases the worker slot taken by the dispatcher.
+    """
+    loop = asyncio.get_running_loop()
+    queue = service["queue"]
+
+    try:
+        now = loop.time()
+        live = []
+        for job in batch:
+            job["queue_latency"] = now - job["arrived"]
+            if job["deadline"] is not None and now > job["deadline"]:
+                await _reply(job["respond"], {
+                    "id": job["id"],
+                    "status": "expired",
+                    "queue_latency": job["queue_latency"],
+                    "solve_latency": 0.0,
+                })
+                queue.task_done()
+            else:
+                live.append(job)
+
+        if not live:
+            return
+
+        payload = [job["instance"] for job in live]
+        try:
+            outputs = await loop.run_in_executor(service["pool"], _solve_batch, payload)
+        except Exception as exc:
+            outputs = [{"status": "error", "error": str(exc), "solve_latency": 0.0}] * len(live)
+
+        for job, out in zip(live, outputs):
+            result = {"id": job["id"], "queue_latency": job["queue_latency"]}
+            result.update(out)
+            await _reply(job["respond"], result)
+            queue.task_done()
+    finally:
+        service["slots"].release()
+
+
+async def _reply(respond, result):
+    """
+    Send one response. A client that disconnected only loses its own
+    answer: the rest of the batch is still answered.
+    """
+    try:
+        await respond(result)
+    except (ConnectionError, OSError):
+        pass
+
+
+
+# ============================================================
+# Helper 3: worker side (runs in the process pool)
+# ============================================================
+
+def _solve_batch(payload):
+    return [_solve_one(data) for data in payload]
+
+
+def _solve_one(data):
+    start = time.perf_counter()
+    try:
+        instance = instance_from_json(data)
+        with contextlib.redirect_stdout(io.StringIO()):
+            greedy, final = PDP_GREEDY_INSERT_2OPT(instance)
+    except Exception as exc:
+        return {
+            "status": "error",
+            "error": str(exc),
+            "solve_latency": time.perf_counter() - start,
+        }
+
+    elapsed = time.perf_counter() - start
+    if isinstance(final, str):
+        return {"status": "infeasible", "message": final, "solve_latency": elapsed}
+
+    return {"status": "ok", "greedy": greedy, "route": final, "solve_latency": elapsed}
+
+
+# MAIN SCRIPT
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="PDP dispatch service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    async def run():
+        service = await start_service(args.host, args.port, args.workers)
+        print(f"Dispatch service listening on {args.host}:{service['port']}")
+        try:
+            await service["server"].serve_forever()
+        finally:
+            await stop_service(service)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# -------------------------------------------------------------
+# Exact search for tiny instances
+#
+# PDP_EXACT(instance):
+#     best = infinity
+#     EXTEND([s], time = max(0, open[s]), cost = 0)
+#
+# EXTEND(route, time, cost):
+#     if every request is delivered:
+#         close the route at e (if any); keep it if cheaper and
+#         FEASIBLE (ride / duration limits are checked here)
+#     for each next stop x != last, cheapest arc first, that serves
+#     at least one visit (visits.py):
+#         pickups at x of requests not picked yet, then
+#         deliveries at x of picked requests whose paired sets are
+#         all picked
+#         t = max(open[x], time + s[last] + T[last][x])
+#         if t <= close[x] and cost + c[last][x] < best:
+#             EXTEND(route + [x], t, cost + c[last][x])
+#
+# Branching on nodes rather than visits serves co-located requests at
+# one stop.
+#
+# Worst case (2n)! / 2^n routes: only meant for a handful of requests.
+# -------------------------------------------------------------
+
+import math
+
+from route_state import route_feasible
+from time_dependent import travel
+from visits import node_visits, request_groups
+
+
+def PDP_EXACT(instance, max_requests=6):
+    """
+    Cheapest feasible route by depth-first branch and bound.
+
+    Returns (route, route) like PDP_GREEDY_INSERT_2OPT, or
+    (None, message) if no route exists or the instance has more than
+    max_requests requests.
+    """
+    print("\n=== TRACE: Exact Search ===")
+
+    if len(instance["R"]) > max_requests:
+        return None, f"exact search limited to {max_requests} requests"
+
+    search = _new_search(instance)
+    s = instance["s"]
+    picked, delivered = _visit(search, s, set(), set()) or (set(), set())
+    _extend(search, [s], picked, delivered, max(0, instance["open"][s]), 0)
+
+    print("Routes explored:", search["explored"], " best cost:", search["best_cost"])
+    if search["best"] is None:
+        return None, "instance infeasible"
+    return search["best"], list(search["best"])
+
+
+
+# ============================================================
+# Helper 1: search state
+# ============================================================
+
+def _new_search(instance):
+    return {
+        "instance": instance,
+        "index": {v: idx for idx, v in enumerate(instance["V"])},
+        "visits": node_visits(instance),
+        "needs": request_groups(instance),
+        "best": None,
+        "best_cost": math.inf,
+        "explored": 0,
+    }
+
+
+def _visit(search, node, picked, delivered):
+    """
+    (picked, delivered) after a stop at node, or None if the stop
+    serves nothing.
+    """
+    picks, drops = search["visits"].get(node, ((), ()))
+    new_picks = {r for r in picks if r not in picked}
+    now = picked | new_picks
+    new_drops = {r for r in drops if r not in delivered and search["needs"][r] <= now}
+    if not new_picks and not new_drops:
+        return None
+    return now, delivered | new_drops
+
+
+
+# ============================================================
+# Helper 2: depth-first extension
+# ============================================================
+
+def _extend(search, route, picked, delivered, time, cost):
+    instance = search["instance"]
+    index = search["index"]
+    c = instance["c"]
+    last = route[-1]
+
+    if len(delivered) == len(instance["R"]):
+        search["explored"] += 1
+        e = instance["e"]
+        if e is not None:
+            t = _arrive(instance, index, last, time, e)
+            if t > instance["close"][e]:
+                return
+            cost += c[index[last]][index[e]]
+            route = route + [e]
+        if cost < search["best_cost"] and route_feasible(route, instance):
+            search["best"], search["best_cost"] = route, cost
+        return
+
+    candidates = []
+    for node in search["visits"]:
+        if node == last:
+            continue
+        served = _visit(search, node, picked, delivered)
+        if served is None:
+            continue
+        step = c[index[last]][index[node]]
+        if cost + step < search["best_cost"]:
+            candidates.append((step, node, served))
+
+    for step, node, (now_picked, now_delivered) in sorted(candidates, key=lambda cand: cand[0]):
+        if cost + step >= search["best_cost"]:
+            break
+        t = _arrive(instance, index, last, time, node)
+        if t > instance["close"][node]:
+            continue
+        _extend(search, route + [node], now_picked, now_delivered, t, cost + step)
+
+
+def _arrive(instance, index, prev, t_prev, node):
+    depart = t_prev + instance["service"][prev]
+    profiles = instance.get("T_profile")
+    if profiles and (prev, node) in profiles:
+        arrive = depart + travel(profiles[(prev, node)], depart)
+    else:
+        arrive = depart + instance["T"][index[prev]][index[node]]
+    return max(arrive, instance["open"][node])
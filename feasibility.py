@@ -20,19 +20,32 @@
 #         if time > close[i]:
 #             return false
 #
-#         if i is pickup(r): picked.add(r)
+#         for each request r with pickup(r) = i, not picked yet:
+#             picked.add(r)
 #
-#         if i is delivery(r):
-#             if r not in picked: return false
+#         for each request r with delivery(r) = i, on board:
+#             if every request paired with r is picked:
+#                 deliver r
 #
-#             for each pair {r1, r2} in S:
-#                 if r in pair and other not in picked:
-#                     return false
+#         if nothing was served at i but a delivery there is open:
+#             return false          // before its pickup / paired pickup
 #
+# Several requests may share a node (visits.py): one stop serves all
+# of them that it can, a later stop at the node serves the rest.
+#
+# With ride / duration limits, delay the departures from the first
+# stop and the pickups to remove waiting (schedule.py), then
+#     if B[d(r)] - (B[p(r)] + s[p(r)]) > max_ride[r]: return false
+#     if B[last] - B[first] > max_duration: return false
 # return true
 # ============================================================
 
 
+from schedule import ride_caps, shifted_starts
+from time_dependent import travel
+from visits import node_visits, request_groups
+
+
 def feasible(route, instance):
     """
     FEASIBLE() — Time Windows, Precedence & Pairing
@@ -41,13 +54,17 @@ def feasible(route, instance):
     """
 
     pickup = instance["pickup"]
-    delivery = instance["delivery"]
-    paired_sets = instance["paired_sets"]
+    visits = node_visits(instance)
+    groups = request_groups(instance)
 
-    pickup_of = {pickup[r]: r for r in pickup}
-    delivery_of = {delivery[r]: r for r in delivery}
+    max_ride = instance.get("max_ride") or {}
+    max_duration = instance.get("max_duration")
 
     picked = set()
+    delivered = set()
+    pick_pos = {}
+    deliver_pos = {}
+    times = []
     time = 0
 
     node_index = {v: idx for idx, v in enumerate(instance.get("V", []))}
@@ -62,6 +79,7 @@ def feasible(route, instance):
         prev_time = time
         time = _update_time(k, route, time, instance, node_index)
         print(f"[Node {i}] time updated: {prev_time} → {time}")
+        times.append(time)
 
         # --- TIME WINDOW CHECK ---
         if not _check_time_window(i, time, instance):
@@ -69,29 +87,48 @@ def feasible(route, instance):
             return False
         print(f"  Time window OK [{instance['open'][i]}, {instance['close'][i]}]")
 
+        picks, drops = visits.get(i, ((), ()))
+        served = False
+
         # --- PICKUP ---
-        if i in pickup_of:
-            r = pickup_of[i]
-            picked.add(r)
-            print(f"  Pickup r={r} completed → picked={picked}")
+        for r in picks:
+            if r not in picked:
+                picked.add(r)
+                pick_pos[r] = k
+                served = True
+                print(f"  Pickup r={r} completed → picked={picked}")
 
         # --- DELIVERY ---
-        if i in delivery_of:
-            r = delivery_of[i]
+        blocked = None
+        for r in drops:
+            if r in delivered:
+                continue
             # Precedence check
             if r not in picked:
-                print(f"  Delivery r={r} before pickup → infeasible")
-                return False
+                blocked = blocked or f"  Delivery r={r} before pickup → infeasible"
+                continue
             print(f"  Delivery r={r} OK (pickup already done)")
 
             # Pairing check
-            for pair in paired_sets:
-                if r in pair:
-                    other = (pair - {r}).pop()
-                    if other not in picked:
-                        print(f"  Pairing violation: r={r} delivered before r={other} pickup")
-                        return False
-                    print(f"  Pairing OK for pair {pair}")
+            missing = sorted(groups[r] - picked)
+            if missing:
+                blocked = blocked or f"  Pairing violation: r={r} delivered before r={missing[0]} pickup"
+                continue
+            if len(groups[r]) > 1:
+                print(f"  Pairing OK for set {groups[r]}")
+
+            delivered.add(r)
+            deliver_pos[r] = k
+            served = True
+
+        # A stop that serves no one must not skip an open delivery
+        if blocked and not served:
+            print(blocked)
+            return False
+
+    if (max_ride or max_duration is not None) and route:
+        if not _check_limits(route, instance, times, pick_pos, deliver_pos, node_index):
+            return False
 
     print("FEASIBLE: All checks passed.")
     return True
@@ -131,7 +168,14 @@ def _update_time(k, route, current_time, instance, node_index):
     prev_idx = node_index.get(prev, prev)
     i_idx = node_index.get(i, i)
 
-    updated_time = current_time + service[prev] + T[prev_idx][i_idx]
+    depart = current_time + service[prev]
+
+    # Optional time-dependent travel time on this arc (time_dependent.py)
+    profiles = instance.get("T_profile")
+    if profiles and (prev, i) in profiles:
+        updated_time = depart + travel(profiles[(prev, i)], depart)
+    else:
+        updated_time = depart + T[prev_idx][i_idx]
 
     # Wait for time window to open if early
     updated_time = max(updated_time, open_time[i])
@@ -204,3 +248,43 @@ def _check_pairing(i, picked, paired_sets, delivery_of):
                 return False
 
     return True
+
+
+
+# ============================================================
+# Helper 6: ride times and route duration on the shifted schedule
+# ============================================================
+
+def _check_limits(route, instance, times, pick_pos, deliver_pos, node_index):
+    """
+    Delay departures where that removes waiting (schedule.py), then
+    check every ride-time limit and the route duration.
+    """
+    pickup = instance["pickup"]
+    max_ride = instance.get("max_ride") or {}
+    max_duration = instance.get("max_duration")
+
+    rides = ride_caps(route, instance, pick_pos, deliver_pos)
+    start = shifted_starts(route, instance, times, node_index, rides)
+    if start != times:
+        print("  Shifted start times:", start)
+
+    # --- RIDE TIMES ---
+    for r in sorted(deliver_pos):
+        if r not in max_ride:
+            continue
+        ride = start[deliver_pos[r]] - (start[pick_pos[r]] + instance["service"][pickup[r]])
+        if ride > max_ride[r]:
+            print(f"  Ride time of r={r} is {ride} > {max_ride[r]} → infeasible")
+            return False
+        print(f"  Ride time of r={r} OK ({ride} <= {max_ride[r]})")
+
+    # --- ROUTE DURATION ---
+    if max_duration is not None:
+        duration = start[-1] - start[0]
+        if duration > max_duration:
+            print(f"  Route duration {duration} > {max_duration} → infeasible")
+            return False
+        print(f"  Route duration OK ({duration} <= {max_duration})")
+
+    return True
@@ -0,0 +1,340 @@
+# ============================================================
+# Batched FEASIBLE() audit
+#
+# Same checks as feasibility.feasible(), run over many routes of one
+# compiled instance at once. Routes are padded into a 2D array (one
+# row per route) and the scan walks the columns, updating every route
+# in the same NumPy operation:
+#
+# FEASIBLE_BATCH(routes):
+#     time[:] = 0,  picked[:, :] = false
+#
+#     for k = 0 to max_length-1:
+#         i = routes[:, k]
+#         time = max(time + s[prev] + T[prev][i], open[i])   (k > 0)
+#         time = max(time, open[i])                           (k == 0)
+#
+#         record "time_window" where time > close[i]
+#         mark picked[:, pickup_of[i]], left[:, r] = time + s[i]
+#         record "precedence" where delivery_of[i] not picked
+#         record "pairing"    where a pickup of its paired set
+#                             is not picked yet
+#         note   "ride"       where time - left[:, r] > max_ride[r]
+#         note   "duration"   at the last stop, where
+#                             time - start time > max_duration
+#
+#     for every route with only a noted ride / duration violation:
+#         re-check on the shifted schedule (schedule.py), as FEASIBLE()
+#         does: the earliest schedule can wait where a later departure
+#         would not
+#
+# Only the first violation of each route is recorded.
+# Paired sets are checked as groups (every pickup of the group
+# before any delivery of the group), each set on its own when a
+# request belongs to several (group_start / group_list).
+# pickup_of / delivery_of hold one request per node (the last one
+# listed), so routes over shared nodes (visits.py) need FEASIBLE(),
+# and so do instances with T_profile (the scan uses the static T);
+# feasible_batch raises ValueError for both.
+# ============================================================
+
+import numpy as np
+
+from instance_compile import compile_instance
+from schedule import ride_caps, shifted_starts
+
+
+REASONS = ("ok", "time_window", "precedence", "pairing", "unknown_node", "ride", "duration")
+
+_OK = 0
+_TIME_WINDOW = 1
+_PRECEDENCE = 2
+_PAIRING = 3
+_UNKNOWN_NODE = 4
+_RIDE = 5
+_DURATION = 6
+
+
+def feasible_batch(routes, compiled, chunk_size=65536):
+    """
+    Validate many routes against one compiled instance.
+
+    routes      sequence of routes (lists of node ids)
+    compiled    result of instance_compile.compile_instance()
+
+    Returns a dictionary of arrays, one entry per route:
+        "feasible"  bool
+        "position"  index of the first violating stop, -1 if feasible
+        "reason"    index into REASONS
+
+    Raises ValueError for instances with time-dependent travel times
+    or shared nodes.
+    """
+    if compiled["time_dependent"]:
+        raise ValueError("feasible_batch uses static travel times; use feasibility.feasible() "
+                         "for instances with T_profile")
+    if compiled["shared_nodes"]:
+        raise ValueError("feasible_batch serves one request per node; use feasibility.feasible() "
+                         "for instances with shared nodes")
+    m = len(routes)
+    feasible = np.ones(m, dtype=bool)
+    position = np.full(m, -1, dtype=np.int64)
+    reason = np.zeros(m, dtype=np.int8)
+
+    for start in range(0, m, chunk_size):
+        stop = min(start + chunk_size, m)
+        f, p, r = _audit_chunk(routes[start:stop], compiled)
+        feasible[start:stop] = f
+        position[start:stop] = p
+        reason[start:stop] = r
+
+    return {"feasible": feasible, "position": position, "reason": reason}
+
+
+def audit_instances(jobs, processes=None):
+    """
+    Multi-process fan-out over different instances.
+
+    jobs        iterable of (instance, routes) pairs
+    processes   worker count (default: os.cpu_count())
+
+    Each worker compiles its instance once and runs feasible_batch()
+    on all of its routes. Results come back in job order.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = list(jobs)
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_audit_job, jobs))
+
+
+def explain(result, k, routes=None):
+    """
+    Human-readable verdict for route k of a feasible_batch() result.
+    """
+    if result["feasible"][k]:
+        return "feasible"
+
+    pos = int(result["position"][k])
+    text = f"{REASONS[result['reason'][k]]} at position {pos}"
+    if routes is not None:
+        text += f" (node {routes[k][pos]})"
+    return text
+
+
+
+# ============================================================
+# Helper 1: one worker job
+# ============================================================
+
+def _audit_job(job):
+    instance, routes = job
+    return feasible_batch(routes, compile_instance(instance))
+
+
+
+# ============================================================
+# Helper 2: padding routes into a 2D index array
+# ============================================================
+
+def _pad_routes(routes, compiled):
+    """
+    Returns (idx, lengths, unknown):
+        idx      (m, L) matrix positions, padded with 0
+        lengths  (m,) route lengths
+        unknown  (m, L) True where the node id is not in V
+    """
+    m = len(routes)
+    lengths = np.fromiter((len(r) for r in routes), dtype=np.int64, count=m)
+    L = int(lengths.max()) if m else 0
+
+    flat_ids = np.fromiter(
+        (v for route in routes for v in route), dtype=np.int64, count=int(lengths.sum())
+    )
+
+    # Map node ids to matrix positions through the sorted id list
+    V = np.asarray(compiled["V"], dtype=np.int64)
+    order = np.argsort(V)
+    sorted_V = V[order]
+    where = np.searchsorted(sorted_V, flat_ids)
+    where = np.minimum(where, len(sorted_V) - 1)
+    known = sorted_V[where] == flat_ids
+    flat_idx = np.where(known, order[where], 0)
+
+    rows = np.repeat(np.arange(m), lengths)
+    cols = np.arange(len(flat_ids)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    idx = np.zeros((m, L), dtype=np.int64)
+    unknown = np.zeros((m, L), dtype=bool)
+    idx[rows, cols] = flat_idx
+    unknown[rows, cols] = ~known
+
+    return idx, lengths, unknown
+
+
+
+# ============================================================
+# Helper 3: column scan over one chunk
+# ============================================================
+
+def _audit_chunk(routes, compiled):
+    m = len(routes)
+    n = compiled["n"]
+
+    T = np.frombuffer(compiled["T"], dtype=np.float64).reshape(n, n)
+    service = np.frombuffer(compiled["service"], dtype=np.float64)
+    open_tw = np.frombuffer(compiled["open"], dtype=np.float64)
+    close_tw = np.frombuffer(compiled["close"], dtype=np.float64)
+    pickup_of = np.asarray(compiled["pickup_of"], dtype=np.int64)
+    delivery_of = np.asarray(compiled["delivery_of"], dtype=np.int64)
+
+    n_req = len(compiled["requests"])
+    n_groups = len(compiled["groups"])
+    # one extra "no group" slot: never counted short
+    group_size = np.array([len(g) for g in compiled["groups"]] + [0], dtype=np.int64)
+    group_start = np.asarray(compiled["group_start"], dtype=np.int64)
+    group_list = np.append(np.asarray(compiled["group_list"], dtype=np.int64), n_groups)
+    max_groups = int(np.diff(group_start).max()) if n_req else 0
+    max_ride = np.append(np.asarray(compiled["max_ride"], dtype=np.float64), np.inf)
+    max_duration = compiled["max_duration"]
+
+    idx, lengths, unknown = _pad_routes(routes, compiled)
+    L = idx.shape[1]
+
+    position = np.full(m, -1, dtype=np.int64)
+    reason = np.zeros(m, dtype=np.int8)
+    noted = np.zeros(m, dtype=bool)     # ride / duration broken on the earliest schedule
+
+    time = np.zeros(m, dtype=np.float64)
+    picked = np.zeros((m, n_req + 1), dtype=bool)          # last column absorbs "-1"
+    left = np.zeros((m, n_req + 1), dtype=np.float64)      # pickup start + service
+    group_count = np.zeros((m, n_groups + 1), dtype=np.int64)
+    rows = np.arange(m)
+
+    def record(mask, code):
+        mask = mask & (position < 0)
+        position[mask] = k
+        reason[mask] = code
+
+    for k in range(L):
+        active = k < lengths
+        cur = idx[:, k]
+
+        # --- TIME UPDATE ---
+        if k == 0:
+            time = np.maximum(time, open_tw[cur])
+            first_time = time
+        else:
+            prev = idx[:, k - 1]
+            time = np.maximum(time + service[prev] + T[prev, cur], open_tw[cur])
+
+        record(active & unknown[:, k], _UNKNOWN_NODE)
+
+        # --- TIME WINDOW CHECK ---
+        record(active & (time > close_tw[cur]), _TIME_WINDOW)
+
+        # --- PICKUP ---
+        p_req = pickup_of[cur]
+        is_pickup = active & (p_req >= 0)
+        newly = is_pickup & ~picked[rows, p_req]
+        picked[rows[newly], p_req[newly]] = True
+        left[rows[newly], p_req[newly]] = (time + service[cur])[newly]
+        for slot in range(max_groups):
+            g = _group_slot(group_start, group_list, p_req, newly, slot)
+            group_count[rows[newly], g[newly]] += 1
+
+        # --- DELIVERY ---
+        d_req = delivery_of[cur]
+        is_delivery = active & (d_req >= 0)
+        record(is_delivery & ~picked[rows, d_req], _PRECEDENCE)
+
+        for slot in range(max_groups):
+            dg = _group_slot(group_start, group_list, d_req, is_delivery, slot)
+            record(is_delivery & (group_count[rows, dg] < group_size[dg]), _PAIRING)
+
+        # --- RIDE TIME / ROUTE DURATION ---
+        ride = time - left[rows, d_req]
+        noted |= is_delivery & picked[rows, d_req] & (ride > max_ride[d_req])
+        noted |= active & (k == lengths - 1) & (time - first_time > max_duration)
+
+    recheck = np.flatnonzero(noted & (position < 0))
+    if len(recheck):
+        view = _limits_view(compiled)
+        for row in recheck:
+            found = _shifted_violation(routes[row], view)
+            if found is not None:
+                position[row], reason[row] = found
+
+    return position < 0, position, reason
+
+
+def _group_slot(group_start, group_list, req, mask, slot):
+    """
+    Paired set number slot of each masked request, or the "no group"
+    slot (last entry of group_list).
+    """
+    req = np.where(mask, req, 0)
+    start = group_start[req]
+    has = mask & (slot < group_start[req + 1] - start)
+    return group_list[np.where(has, start + slot, len(group_list) - 1)]
+
+
+
+# ============================================================
+# Helper 4: ride / duration on the shifted schedule
+# ============================================================
+
+def _limits_view(compiled):
+    """
+    Instance dictionary over the compiled arrays, with what
+    schedule.shifted_starts() and the limit checks read.
+    """
+    V = compiled["V"]
+    n = compiled["n"]
+    requests = compiled["requests"]
+    return {
+        "V": V,
+        "index": compiled["index"],
+        "T": [compiled["T"][i * n:(i + 1) * n] for i in range(n)],
+        "service": dict(zip(V, compiled["service"])),
+        "open": dict(zip(V, compiled["open"])),
+        "close": dict(zip(V, compiled["close"])),
+        "pickup": {r: V[compiled["pickup"][k]] for k, r in enumerate(requests)},
+        "delivery": {r: V[compiled["delivery"][k]] for k, r in enumerate(requests)},
+        "max_ride": {r: limit for r, limit in zip(requests, compiled["max_ride"])
+                     if limit != float("inf")},
+        "max_duration": compiled["max_duration"],
+    }
+
+
+def _shifted_violation(route, view):
+    """
+    (position, reason code) of the first ride / duration violation of
+    a route that passes every other check, or None.
+    """
+    index = view["index"]
+    node_pick = {v: r for r, v in view["pickup"].items()}
+    node_deliver = {v: r for r, v in view["delivery"].items()}
+
+    start = []
+    pick_pos, deliver_pos = {}, {}
+    for k, i in enumerate(route):
+        if k == 0:
+            t = view["open"][i]
+        else:
+            prev = route[k - 1]
+            t = max(start[-1] + view["service"][prev] + view["T"][index[prev]][index[i]],
+                    view["open"][i])
+        start.append(t)
+        if i in node_pick:
+            pick_pos.setdefault(node_pick[i], k)
+        if i in node_deliver:
+            deliver_pos.setdefault(node_deliver[i], k)
+
+    rides = ride_caps(route, view, pick_pos, deliver_pos)
+    start = shifted_starts(route, view, start, index, rides)
+
+    broken = [(j, _RIDE) for _, q, j, cap in rides if start[j] - start[q] > cap]
+    if start[-1] - start[0] > view["max_duration"]:
+        broken.append((len(route) - 1, _DURATION))
+    return min(broken) if broken else None
@@ -0,0 +1,348 @@
+# -------------------------------------------------------------
+# Island-model hybrid genetic search
+#
+# Each island (one worker process) evolves its own population:
+#
+# PARENT:
+#     seed = PDP_GREEDY_INSERT_2OPT route, computed once and sent to
+#            every island
+#     start the islands, collect one result per island until the
+#     deadline (plus a short grace); islands that crashed or overran
+#     are reported with an "error" and terminated
+#
+# ISLAND:
+#     population = seed + routes built by inserting the requests in
+#                  random orders (REPLAN)
+#     until the global deadline:
+#         A, B = two binary-tournament parents
+#         child = CROSSOVER(A, B)
+#         EDUCATE(child)                     // 2-opt over the whole route
+#         add child, drop duplicates, keep the `population` fittest
+#         every migration_interval seconds:
+#             send the `elite` best routes to the next island (ring)
+#             take in whatever the previous island sent
+#
+# CROSSOVER(A, B):                           // precedence-preserving
+#     keep the pairing units (merged paired sets, or single requests)
+#         whose pickups all lie in a random slice of A
+#     child = A restricted to those units    // relative order kept
+#     drop requests that became late (drop_late_requests)
+#     re-insert the other requests one by one in B's pickup order,
+#         cheapest feasible insertion (REPLAN) = repair
+#
+# FITNESS = TOTAL_DISTANCE + penalty * #requests the route misses
+#
+# Islands talk only through multiprocessing queues; the parent returns
+# the best route any island reported.
+# -------------------------------------------------------------
+
+import contextlib
+import multiprocessing
+import os
+import queue
+import random
+import time
+
+from distance import total_distance
+from preprocessing import pairing_groups
+from replan import REPLAN, local_two_opt
+from route_state import build_state, drop_late_requests, precedence_ok, route_feasible
+from solver import PDP_GREEDY_INSERT_2OPT
+from visits import serve
+
+
+def PDP_HYBRID_GENETIC(instance, islands=None, population=20, time_budget=10.0,
+                       migration_interval=1.0, elite=2, seed=0):
+    """
+    Hybrid genetic search on `islands` processes (default:
+    os.cpu_count(); 1 runs inline) within time_budget seconds overall.
+
+    The greedy seed route counts against time_budget; the islands get
+    what is left of it.
+
+    Returns (route, info): the best complete feasible route found (None
+    if no island completed one) and {"cost", "islands": per-island
+    {"best_cost", "generations", "error"}}. "error" is None unless the
+    island crashed or did not report back in time.
+    """
+    islands = islands or os.cpu_count() or 1
+    deadline = time.time() + time_budget
+    settings = {
+        "population": population,
+        "migration_interval": migration_interval,
+        "elite": elite,
+    }
+
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        greedy, final = PDP_GREEDY_INSERT_2OPT(instance)
+    seed_route = final if greedy is not None else None
+
+    if islands == 1:
+        outcomes = [_island(instance, 0, seed, seed_route, None, None, deadline, settings)]
+    else:
+        ctx = multiprocessing.get_context()
+        inboxes = [ctx.Queue() for _ in range(islands)]
+        results = ctx.Queue()
+        workers = [
+            ctx.Process(
+                target=_island_process,
+                args=(instance, k, seed + k, seed_route, inboxes[k], inboxes[(k + 1) % islands],
+                      deadline, settings, results),
+            )
+            for k in range(islands)
+        ]
+        for w in workers:
+            w.start()
+        outcomes = _collect(results, workers, deadline + _GRACE)
+
+    outcomes.sort(key=lambda o: o["island"])
+    complete = [o for o in outcomes if o["route"] is not None]
+    best = min(complete, key=lambda o: o["best_cost"]) if complete else None
+
+    info = {
+        "cost": best["best_cost"] if best else None,
+        "islands": [
+            {"best_cost": o["best_cost"], "generations": o["generations"], "error": o["error"]}
+            for o in outcomes
+        ],
+    }
+    return (best["route"] if best else None), info
+
+
+
+# ============================================================
+# Helper 1: one island
+# ============================================================
+
+# seconds past the deadline the parent waits for island results (an
+# island only looks at the clock between generations)
+_GRACE = 5.0
+
+
+def _collect(results, workers, limit):
+    """
+    One outcome per island, read from results until limit. Islands
+    that died without reporting, or are still running at limit, are
+    terminated and get an outcome with an "error" instead.
+    """
+    outcomes = {}
+    while len(outcomes) < len(workers):
+        remaining = limit - time.time()
+        if remaining <= 0:
+            break
+        try:
+            o = results.get(timeout=min(remaining, 0.5))
+            outcomes[o["island"]] = o
+            continue
+        except queue.Empty:
+            pass
+        missing = [k for k in range(len(workers)) if k not in outcomes]
+        if all(not workers[k].is_alive() for k in missing):
+            # a dead island's result is already in the pipe, if any
+            with contextlib.suppress(queue.Empty):
+                while len(outcomes) < len(workers):
+                    o = results.get(timeout=0.1)
+                    outcomes[o["island"]] = o
+            break
+
+    for k, w in enumerate(workers):
+        # islands that reported only have to flush and exit
+        w.join(timeout=1.0 if k in outcomes else 0)
+        overran = w.is_alive()
+        if overran:
+            w.terminate()
+            w.join()
+        if k not in outcomes:
+            error = "timed out" if overran else f"exit code {w.exitcode}"
+            outcomes[k] = {"island": k, "route": None, "best_cost": None,
+                           "generations": 0, "error": error}
+
+    return list(outcomes.values())
+
+
+def _island_process(instance, k, seed, seed_route, inbox, outbox, deadline, settings, results):
+    # leftover migrants must not keep this process alive at exit
+    outbox.cancel_join_thread()
+    results.put(_island(instance, k, seed, seed_route, inbox, outbox, deadline, settings))
+
+
+def _island(instance, k, seed, seed_route, inbox, outbox, deadline, settings):
+    rng = random.Random(seed)
+    size = settings["population"]
+
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        ctx = _context(instance)
+        pop = _initial_population(ctx, seed_route, size, rng, deadline)
+
+        generations = 0
+        next_migration = time.time() + settings["migration_interval"]
+
+        while time.time() < deadline and pop:
+            generations += 1
+            a, b = _tournament(pop, rng), _tournament(pop, rng)
+            child = _crossover(ctx, a["route"], b["route"], rng)
+            if child is not None:
+                child = _educate(ctx, *child)
+            if child is not None:
+                pop = _survivors(pop + [child], size)
+
+            if outbox is not None and time.time() >= next_migration:
+                next_migration = time.time() + settings["migration_interval"]
+                for ind in pop[:settings["elite"]]:
+                    outbox.put((ind["route"], ind["missing"]))
+                migrants = []
+                while True:
+                    try:
+                        migrants.append(_individual(ctx, *inbox.get_nowait()))
+                    except queue.Empty:
+                        break
+                pop = _survivors(pop + migrants, size)
+
+    best = next((ind for ind in pop if not ind["missing"]), None)
+    return {
+        "island": k,
+        "route": best["route"] if best else None,
+        "best_cost": best["cost"] if best else None,
+        "generations": generations,
+        "error": None,
+    }
+
+
+def _context(instance):
+    c = instance["c"]
+    groups = pairing_groups(instance)
+    grouped = set().union(*groups) if groups else set()
+    units = [sorted(g) for g in groups] + [[r] for r in sorted(instance["R"]) if r not in grouped]
+
+    return {
+        "instance": instance,
+        "units": units,
+        "penalty": 10 * max(max(row) for row in c) if c else 1,
+    }
+
+
+
+# ============================================================
+# Helper 2: individuals and population
+# ============================================================
+
+def _individual(ctx, route, missing=()):
+    instance = ctx["instance"]
+    cost = total_distance(route, instance["c"], instance["V"])
+    return {
+        "route": route,
+        "missing": list(missing),
+        "cost": cost,
+        "fitness": cost + ctx["penalty"] * len(missing),
+    }
+
+
+def _empty_route(instance):
+    if instance["e"] is not None:
+        return [instance["s"], instance["e"]]
+    return [instance["s"]]
+
+
+def _initial_population(ctx, seed_route, size, rng, deadline):
+    instance = ctx["instance"]
+    pop = []
+
+    if seed_route is not None:
+        pop.append(_individual(ctx, list(seed_route)))
+
+    while len(pop) < size and time.time() < deadline:
+        order = [r for unit in rng.sample(ctx["units"], len(ctx["units"])) for r in unit]
+        route, missing = _repair(ctx, _empty_route(instance), order)
+        pop.append(_individual(ctx, route, missing))
+
+    return _survivors(pop, size)
+
+
+def _survivors(pop, size):
+    seen = set()
+    unique = []
+    for ind in sorted(pop, key=lambda ind: ind["fitness"]):
+        key = tuple(ind["route"])
+        if key not in seen:
+            seen.add(key)
+            unique.append(ind)
+    return unique[:size]
+
+
+def _tournament(pop, rng):
+    a, b = rng.choice(pop), rng.choice(pop)
+    return a if a["fitness"] <= b["fitness"] else b
+
+
+
+# ============================================================
+# Helper 3: crossover, repair and education
+# ============================================================
+
+def _crossover(ctx, parent_a, parent_b, rng):
+    instance = ctx["instance"]
+    pickup = instance["pickup"]
+
+    i = rng.randrange(len(parent_a))
+    j = rng.randrange(i, len(parent_a))
+    in_slice = set(parent_a[i:j + 1])
+    kept = [unit for unit in ctx["units"] if all(pickup[r] in in_slice for r in unit)]
+    kept_requests = {r for unit in kept for r in unit}
+
+    route = _restrict(instance, parent_a, kept_requests)
+    if not precedence_ok(route, instance):
+        route, kept_requests = _empty_route(instance), set()
+
+    repaired = drop_late_requests(route, instance)
+    if repaired is None:
+        return None
+    route, dropped = repaired
+
+    first_seen = {}
+    for k, v in enumerate(parent_b):
+        first_seen.setdefault(v, k)
+    rest = [r for unit in ctx["units"] for r in unit if r not in kept_requests or r in dropped]
+    rest.sort(key=lambda r: first_seen.get(pickup[r], len(parent_b)))
+
+    return _repair(ctx, route, rest)
+
+
+def _restrict(instance, route, requests):
+    """
+    The stops of route that serve the given requests, in order.
+    """
+    stops = serve(route, instance)["stops"]
+    kept = [route[0]]
+    for v, stop in zip(route[1:], stops[1:]):
+        if any(r in requests for r, _ in stop):
+            kept.append(v)
+    if instance["e"] is not None and kept[-1] != instance["e"]:
+        kept.append(instance["e"])
+    return kept
+
+
+def _repair(ctx, route, requests):
+    """
+    Insert requests one by one (in the given order) at their cheapest
+    feasible positions. Returns (route, requests left out).
+    """
+    missing = []
+    for r in requests:
+        route, rejected = REPLAN(ctx["instance"], route, add=[r], window=0)
+        missing += rejected
+    return route, missing
+
+
+def _educate(ctx, route, missing):
+    """
+    2-opt over the whole route; None if the child is not feasible
+    (only possible when removing stops made the route slower, which
+    drop_late_requests has already handled).
+    """
+    instance = ctx["instance"]
+    state = build_state(route, instance)
+    local_two_opt(state, instance, 0, len(route) - 1)
+    route = state["route"]
+    if not route_feasible(route, instance):
+        return None
+    return _individual(ctx, route, missing)
@@ -0,0 +1,193 @@
+# -------------------------------------------------------------
+# Compiled instance representation
+#
+# The instance dictionary from instance_input.py uses node ids as
+# keys for windows/service and nested lists for c and T. Bulk and
+# parallel code wants everything indexed by matrix position instead:
+#
+# COMPILE(instance):
+#     index[v] = position of v in V
+#     c, T               -> flat row-major arrays of length n*n
+#     service, open, close -> arrays of length n (by position)
+#     pickup_of[i]   = request index picked up at V[i], or -1
+#     delivery_of[i] = request index delivered at V[i], or -1
+#     groups of r    = group_list[group_start[r] : group_start[r+1]]
+#                      (paired set indexes, CSR style: a request may
+#                      sit in several overlapping sets)
+#     max_ride[r]    = ride limit of request r (inf if none)
+#     max_duration   = route duration limit (inf if none)
+#     time_dependent = True if the instance has T_profile arcs (the
+#                      flat T is then only the static fallback)
+#     shared_nodes   = True if some node hosts more than one visit
+#                      (pickup_of / delivery_of then keep only one)
+#
+# Arrays are stdlib array.array objects, so they can be wrapped by
+# NumPy (numpy.frombuffer) or copied into shared memory without
+# conversion, and the module itself has no third-party dependency.
+#
+# FINGERPRINT(instance) = SHA-256 over the compiled arrays plus the
+# ids, ride / duration limits and travel-time profiles: the key of
+# solution_cache.py and the instance check of checkpoint.py.
+# -------------------------------------------------------------
+
+import hashlib
+import json
+from array import array
+
+
+def compile_instance(instance):
+    """
+    Convert an instance dictionary into flat typed arrays indexed by
+    matrix position. Node/request ids are kept in "V" and "requests"
+    so results can be mapped back.
+    """
+    V = list(instance["V"])
+    n = len(V)
+    index = {v: idx for idx, v in enumerate(V)}
+
+    requests = sorted(instance["R"])
+    req_index = {r: k for k, r in enumerate(requests)}
+
+    c = _flat_matrix(instance["c"], n)
+    T = _flat_matrix(instance["T"], n)
+
+    service = array("d", [instance["service"][v] for v in V])
+    open_tw = array("d", [instance["open"][v] for v in V])
+    close_tw = array("d", [instance["close"][v] for v in V])
+
+    # One request per node: the last one listed wins where requests
+    # share a node (FEASIBLE() handles those through visits.py)
+    pickup_of = array("l", [-1]) * n
+    delivery_of = array("l", [-1]) * n
+    shared = False
+    for r in instance["pickup"]:
+        i = index[instance["pickup"][r]]
+        shared = shared or pickup_of[i] >= 0
+        pickup_of[i] = req_index[r]
+    for r in instance["delivery"]:
+        i = index[instance["delivery"][r]]
+        shared = shared or delivery_of[i] >= 0 or pickup_of[i] >= 0
+        delivery_of[i] = req_index[r]
+
+    pickup = array("l", [index[instance["pickup"][r]] for r in requests])
+    delivery = array("l", [index[instance["delivery"][r]] for r in requests])
+
+    groups = [sorted(req_index[r] for r in group) for group in instance["paired_sets"]]
+    member_of = [[] for _ in requests]
+    for g, members in enumerate(groups):
+        for k in members:
+            member_of[k].append(g)
+    group_start = array("l", [0])
+    group_list = array("l")
+    for gs in member_of:
+        group_list.extend(gs)
+        group_start.append(len(group_list))
+
+    limits = instance.get("max_ride") or {}
+    max_ride = array("d", [limits.get(r, float("inf")) for r in requests])
+    max_duration = instance.get("max_duration")
+
+    e = instance["e"]
+
+    return {
+        "V": V,
+        "n": n,
+        "index": index,
+        "requests": requests,
+        "s": index[instance["s"]],
+        "e": -1 if e is None else index[e],
+        "c": c,
+        "T": T,
+        "service": service,
+        "open": open_tw,
+        "close": close_tw,
+        "pickup": pickup,
+        "delivery": delivery,
+        "pickup_of": pickup_of,
+        "delivery_of": delivery_of,
+        "groups": groups,
+        "group_start": group_start,
+        "group_list": group_list,
+        "max_ride": max_ride,
+        "max_duration": float("inf") if max_duration is None else max_duration,
+        "time_dependent": bool(instance.get("T_profile")),
+        "shared_nodes": shared,
+    }
+
+
+def fingerprint(instance):
+    """
+    Content hash of the compiled instance (depots, nodes, matrices,
+    service times, windows, requests and paired sets, ride and
+    duration limits, travel-time profiles).
+    """
+    return _digest(instance, with_windows=True)
+
+
+def structure_fingerprint(instance):
+    """
+    Same as fingerprint() but without the time windows, so instances
+    that only differ in open/close map to the same value.
+    """
+    return _digest(instance, with_windows=False)
+
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+# bumped whenever the hashed content changes, so entries stored under
+# an older key are never matched (2: ride / duration limits, profiles)
+_DIGEST_VERSION = 2
+
+
+def _digest(instance, with_windows):
+    compiled = compile_instance(instance)
+    index = compiled["index"]
+    h = hashlib.sha256()
+
+    max_ride = instance.get("max_ride") or {}
+    header = {
+        "version": _DIGEST_VERSION,
+        "V": compiled["V"],
+        "requests": compiled["requests"],
+        "s": compiled["s"],
+        "e": compiled["e"],
+        "groups": compiled["groups"],
+        "max_ride": [max_ride.get(r) for r in compiled["requests"]],
+        "max_duration": instance.get("max_duration"),
+    }
+    h.update(json.dumps(header, sort_keys=True).encode())
+
+    fields = ["c", "T", "service", "pickup", "delivery"]
+    if with_windows:
+        fields += ["open", "close"]
+    for name in fields:
+        h.update(name.encode())
+        h.update(compiled[name].tobytes())
+
+    profiles = instance.get("T_profile") or {}
+    for (i, j), profile in sorted(profiles.items(), key=lambda item: (index[item[0][0]], index[item[0][1]])):
+        h.update(f"T_profile {index[i]} {index[j]}".encode())
+        h.update(array("d", profile["t"]).tobytes())
+        h.update(array("d", profile["tau"]).tobytes())
+
+    return h.hexdigest()
+
+
+def _flat_matrix(matrix, n):
+    """
+    Flat row-major array("d") of an n x n matrix. Matrices that are
+    already flat arrays (road_network.build_matrices) are used as is.
+    """
+    if isinstance(matrix, array) and matrix.typecode == "d" and len(matrix) == n * n:
+        return matrix
+
+    flat = array("d", [0.0]) * (n * n)
+    for i in range(n):
+        row = matrix[i]
+        base = i * n
+        for j in range(n):
+            flat[base + j] = row[j]
+    return flat
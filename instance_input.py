@@ -13,6 +13,15 @@
 # • Travel distance c[i][j] and travel time T[i][j] for all i ≠ j in V
 # • Service time s[i] and time windows [open[i], close[i]] at each node i
 # • Set S of paired request sets {r1, r2} (“both pickups before either delivery”)
+#
+# Optional limits (dial-a-ride):
+# • "max_ride"     {r: L}  time from the end of service at p(r) to the
+#                          start of service at d(r) must be <= L
+# • "max_duration" D       start of service at the last stop minus
+#                          start of service at the first stop <= D
+# Both are measured after delaying the departures from the first stop
+# and from the pickups to remove waiting where the windows allow it
+# (forward slack, schedule.py).
 # -------------------------------------------------------------
 
 def get_instance():
@@ -494,3 +503,111 @@ def get_instance_infeasible():
         "close": close_tw,
         "paired_sets": paired_sets
     }
+
+
+# -------------------------------------------------------------
+# GENERATED INSTANCES: any size, feasible by construction
+# -------------------------------------------------------------
+def generate_instance(n_requests, seed=0, pair_fraction=0.2, slack=100, ride_factor=None):
+    """
+    Random instance with n_requests requests for scaling tests.
+
+    Nodes are points in a 100x100 square: depot 0 in the centre,
+    pickups 1..n, deliveries n+1..2n close to their pickups. A hidden
+    reference route sweeps the requests by angle around the depot;
+    every time window is placed around the reference service time
+    (+- slack), so the reference route is always feasible.
+    A pair_fraction of the requests is grouped into paired sets of two.
+    With ride_factor, every request gets a "max_ride" limit of
+    ride_factor times its direct travel time (raised where needed to
+    keep the reference route feasible).
+    """
+    import math
+    import random
+
+    rng = random.Random(seed)
+    n = n_requests
+
+    R = set(range(1, n + 1))
+    pickup = {r: r for r in R}
+    delivery = {r: r + n for r in R}
+    V = [0] + [pickup[r] for r in sorted(R)] + [delivery[r] for r in sorted(R)]
+
+    xy = {0: (50.0, 50.0)}
+    for r in R:
+        px, py = rng.uniform(0, 100), rng.uniform(0, 100)
+        xy[pickup[r]] = (px, py)
+        xy[delivery[r]] = (
+            min(100.0, max(0.0, px + rng.uniform(-15, 15))),
+            min(100.0, max(0.0, py + rng.uniform(-15, 15))),
+        )
+
+    size = len(V)
+    c = [
+        [int(round(math.dist(xy[V[i]], xy[V[j]]))) for j in range(size)]
+        for i in range(size)
+    ]
+    T = c
+    index = {v: idx for idx, v in enumerate(V)}
+    service = {v: 0 for v in V}
+
+    # Paired sets: neighbours in the sweep order
+    order = sorted(R, key=lambda r: math.atan2(xy[r][1] - 50.0, xy[r][0] - 50.0))
+    units = []
+    k = 0
+    while k < len(order):
+        if k + 1 < len(order) and rng.random() < pair_fraction:
+            units.append([order[k], order[k + 1]])
+            k += 2
+        else:
+            units.append([order[k]])
+            k += 1
+    paired_sets = [set(u) for u in units if len(u) > 1]
+
+    # Reference route: pickups of a unit, then deliveries of the
+    # previous unit (so some loads ride along for a while)
+    reference = [0]
+    waiting = []
+    for unit in units:
+        reference += [pickup[r] for r in unit]
+        reference += [delivery[r] for r in waiting]
+        waiting = unit
+    reference += [delivery[r] for r in waiting]
+
+    open_tw = {0: 0}
+    close_tw = {0: 10 * size * 100}
+    t = 0
+    for prev, node in zip(reference, reference[1:]):
+        t += c[index[prev]][index[node]]
+        open_tw[node] = max(0, t - rng.randint(0, slack))
+        close_tw[node] = t + rng.randint(0, slack)
+
+    instance = {
+        "s": 0,
+        "e": None,
+        "R": R,
+        "pickup": pickup,
+        "delivery": delivery,
+        "V": V,
+        "c": c,
+        "T": T,
+        "service": service,
+        "open": open_tw,
+        "close": close_tw,
+        "paired_sets": paired_sets
+    }
+
+    if ride_factor is not None:
+        # ride times of the reference route on the earliest schedule
+        start = {0: 0}
+        for prev, node in zip(reference, reference[1:]):
+            start[node] = max(open_tw[node], start[prev] + T[index[prev]][index[node]])
+        instance["max_ride"] = {
+            r: max(
+                ride_factor * T[index[pickup[r]]][index[delivery[r]]],
+                start[delivery[r]] - start[pickup[r]],
+            )
+            for r in R
+        }
+
+    return instance
@@ -0,0 +1,96 @@
+# -------------------------------------------------------------
+# JSON form of the instance dictionary
+#
+# JSON has no sets and only string object keys, so the instance
+# structure from instance_input.py is written as:
+#
+#     "R"            list of request ids
+#     "pickup",
+#     "delivery"     {"<r>": node}
+#     "service",
+#     "open",
+#     "close"        {"<node>": value}
+#     "paired_sets"  list of lists of request ids
+#     "T_profile"    optional list of {"from": i, "to": j,
+#                                      "t": [...], "tau": [...]}
+#     "max_ride"     optional {"<r>": limit}
+#
+# Everything else ("s", "e", "V", "c", "T") is unchanged.
+# -------------------------------------------------------------
+
+import json
+
+from time_dependent import make_profile
+
+
+_KEYED = ("pickup", "delivery", "service", "open", "close")
+
+
+def instance_to_json(instance):
+    """
+    Convert an instance dictionary into JSON-compatible data.
+    """
+    data = dict(instance)
+    data["R"] = sorted(instance["R"])
+    for name in _KEYED:
+        data[name] = {str(k): v for k, v in instance[name].items()}
+    data["paired_sets"] = [sorted(group) for group in instance["paired_sets"]]
+    if instance.get("max_ride"):
+        data["max_ride"] = {str(r): v for r, v in instance["max_ride"].items()}
+    if instance.get("T_profile"):
+        data["T_profile"] = [
+            {"from": i, "to": j, "t": list(p["t"]), "tau": list(p["tau"])}
+            for (i, j), p in instance["T_profile"].items()
+        ]
+    return data
+
+
+def instance_from_json(data):
+    """
+    Rebuild an instance dictionary (sets, integer keys) from the
+    JSON form produced by instance_to_json().
+    """
+    instance = dict(data)
+    instance.setdefault("e", None)
+    instance["R"] = {_key(r) for r in data["R"]}
+    for name in _KEYED:
+        instance[name] = {_key(k): v for k, v in data[name].items()}
+    instance["paired_sets"] = [set(_key(r) for r in group) for group in data.get("paired_sets", [])]
+    if data.get("max_ride"):
+        instance["max_ride"] = {_key(r): v for r, v in data["max_ride"].items()}
+    if data.get("T_profile"):
+        instance["T_profile"] = {
+            (arc["from"], arc["to"]): make_profile(arc["t"], arc["tau"])
+            for arc in data["T_profile"]
+        }
+    return instance
+
+
+def load_instance(path):
+    """
+    Read an instance from a JSON file.
+    """
+    with open(path) as f:
+        return instance_from_json(json.load(f))
+
+
+def dump_instance(instance, path):
+    """
+    Write an instance to a JSON file.
+    """
+    with open(path, "w") as f:
+        json.dump(instance_to_json(instance), f)
+
+
+
+# ============================================================
+# Helper: JSON object keys back to node / request ids
+# ============================================================
+
+def _key(k):
+    if isinstance(k, str):
+        try:
+            return int(k)
+        except ValueError:
+            return k
+    return k
@@ -0,0 +1,296 @@
+# -------------------------------------------------------------
+# Compiled kernels for the hot loops
+#
+# Same arithmetic as feasibility._update_time, distance.total_distance
+# and the 2-opt / insertion cost deltas, written against the flat
+# arrays of instance_compile.compile_instance() (positions, not node
+# ids) so Numba can compile them:
+#
+#     ROUTE_COST(route):        SUM c[r_k][r_k+1]
+#     ARRIVAL_TIMES(route):     time = max(open[r_0], 0)
+#                               time = max(time + s[prev] + T[prev][i], open[i])
+#                               first k with time > close[r_k], or -1
+#     INSERTION_DELTAS(route, x):
+#         out[k] = c[r_k][x] + c[x][r_k+1] - c[r_k][r_k+1]
+#     TWO_OPT_DELTAS(route):    out[i*m + j] = Δcost of REVERSE_SEGMENT(i+1, j),
+#                               with the reversed segment cost kept as a
+#                               running sum while j grows (O(1) per pair)
+#
+# With Numba installed the kernels are compiled with @njit; without it
+# the decorator is a no-op and the identical Python code runs.
+# PARITY_CHECK() compares both against the reference implementations.
+#
+# solver.py prices its greedy insertions (INSERTION_DELTAS) and 2-opt
+# passes (TWO_OPT_DELTAS) with them and only runs FEASIBLE() on the
+# moves that can improve.
+#
+# Time-dependent profiles (time_dependent.py) are not covered; arrival
+# times on such instances should come from route_state.
+# -------------------------------------------------------------
+
+import random
+from array import array
+
+from distance import total_distance
+from feasibility import _update_time
+from instance_compile import compile_instance
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:                         # pure-Python fallback
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+
+_INF = float("inf")
+
+
+def route_positions(route, compiled):
+    """
+    Route of node ids as an array("l") of matrix positions.
+    """
+    index = compiled["index"]
+    return array("l", [index[v] for v in route])
+
+
+def route_cost(route, compiled):
+    pos = route_positions(route, compiled)
+    return _route_cost(pos, len(pos), compiled["n"], compiled["c"])
+
+
+def arrival_times(route, compiled):
+    """
+    Returns (start, k): start[k] is the service start at route[k] and
+    k the first position whose window is violated (-1 if none). start
+    is only filled up to that position.
+    """
+    pos = route_positions(route, compiled)
+    start = array("d", [0.0]) * len(pos)
+    k = _arrival_times(pos, len(pos), compiled["n"], compiled["T"],
+                       compiled["service"], compiled["open"], compiled["close"], start)
+    return start, k
+
+
+def insertion_deltas(route, compiled, node):
+    """
+    out[k] = cost increase of inserting node after route[k].
+    """
+    pos = route_positions(route, compiled)
+    out = array("d", [0.0]) * len(pos)
+    _insertion_deltas(pos, len(pos), compiled["n"], compiled["c"], compiled["index"][node], out)
+    return out
+
+
+def two_opt_deltas(route, compiled):
+    """
+    Flat m*m array: out[i*m + j] = cost change of reversing
+    route[i+1..j], for the (i, j) pairs scanned by _two_opt_phase;
+    every other entry is inf.
+    """
+    pos = route_positions(route, compiled)
+    m = len(pos)
+    out = array("d", [_INF]) * (m * m)
+    _two_opt_deltas(pos, m, compiled["n"], compiled["c"], out)
+    return out
+
+
+
+# ============================================================
+# Kernels (positions and flat arrays only, so @njit applies)
+# ============================================================
+
+@njit(cache=True)
+def _route_cost(route, m, n, c):
+    total = 0.0
+    for k in range(m - 1):
+        total += c[route[k] * n + route[k + 1]]
+    return total
+
+
+@njit(cache=True)
+def _arrival_times(route, m, n, T, service, open_tw, close_tw, start):
+    time = 0.0
+    for k in range(m):
+        i = route[k]
+        if k > 0:
+            prev = route[k - 1]
+            time = time + service[prev] + T[prev * n + i]
+        if time < open_tw[i]:
+            time = open_tw[i]
+        start[k] = time
+        if time > close_tw[i]:
+            return k
+    return -1
+
+
+@njit(cache=True)
+def _insertion_deltas(route, m, n, c, x, out):
+    for k in range(m):
+        a = route[k]
+        if k + 1 < m:
+            b = route[k + 1]
+            out[k] = c[a * n + x] + c[x * n + b] - c[a * n + b]
+        else:
+            out[k] = c[a * n + x]
+
+
+@njit(cache=True)
+def _two_opt_deltas(route, m, n, c, out):
+    for i in range(m - 3):
+        a = route[i]
+        first = route[i + 1]
+        forward = 0.0           # cost of route[i+1..j] as it stands
+        backward = 0.0          # cost of the same segment reversed
+        for j in range(i + 2, m - 1):
+            u = route[j - 1]
+            v = route[j]
+            forward += c[u * n + v]
+            backward += c[v * n + u]
+            after = route[j + 1]
+            old = c[a * n + first] + forward + c[v * n + after]
+            new = c[a * n + v] + backward + c[first * n + after]
+            out[i * m + j] = new - old
+
+
+
+# ============================================================
+# Parity check: kernels vs reference implementations
+# ============================================================
+
+def parity_check(instances=None, routes_per_instance=20, seed=0, tol=1e-9):
+    """
+    Compare every kernel with the reference code (total_distance,
+    the FEASIBLE() time update, and deltas recomputed from full route
+    costs) on random routes, and, when Numba is installed, the
+    compiled kernels with their pure-Python versions (identical
+    results required). Returns a list of mismatch descriptions.
+    """
+    if instances is None:
+        import instance_input
+        instances = _default_instances(instance_input)
+
+    rng = random.Random(seed)
+    mismatches = []
+
+    for name, instance in instances:
+        if instance.get("T_profile"):
+            continue
+        compiled = compile_instance(instance)
+        V = instance["V"]
+        inner = [v for v in V if v != instance["s"] and v != instance["e"]]
+
+        for t in range(routes_per_instance):
+            middle = rng.sample(inner, rng.randint(1, len(inner)))
+            route = [instance["s"]] + middle
+            if instance["e"] is not None:
+                route.append(instance["e"])
+            where = f"{name} route {t}"
+
+            # route cost
+            cost = route_cost(route, compiled)
+            ref = total_distance(route, instance["c"], V)
+            if abs(cost - ref) > tol:
+                mismatches.append(f"{where}: route_cost {cost} != {ref}")
+
+            # arrival times
+            start, k = arrival_times(route, compiled)
+            ref_start, ref_k = _reference_times(route, instance)
+            if k != ref_k or any(abs(a - b) > tol for a, b in zip(start, ref_start)):
+                mismatches.append(f"{where}: arrival_times differ (violation at {k} vs {ref_k})")
+
+            # insertion deltas
+            x = rng.choice(V)
+            out = insertion_deltas(route, compiled, x)
+            for p in range(len(route)):
+                trial = route[:p + 1] + [x] + route[p + 1:]
+                ref = total_distance(trial, instance["c"], V) - total_distance(route, instance["c"], V)
+                if abs(out[p] - ref) > tol:
+                    mismatches.append(f"{where}: insertion delta at {p} {out[p]} != {ref}")
+                    break
+
+            # 2-opt deltas
+            m = len(route)
+            out = two_opt_deltas(route, compiled)
+            base = total_distance(route, instance["c"], V)
+            for i in range(m - 3):
+                for j in range(i + 2, m - 1):
+                    trial = route[:i + 1] + route[i + 1:j + 1][::-1] + route[j + 1:]
+                    ref = total_distance(trial, instance["c"], V) - base
+                    if abs(out[i * m + j] - ref) > tol:
+                        mismatches.append(f"{where}: 2-opt delta ({i}, {j}) {out[i * m + j]} != {ref}")
+
+            if HAVE_NUMBA:
+                mismatches.extend(_jit_parity(route, compiled, x, where))
+
+    print(f"Kernel parity ({'numba' if HAVE_NUMBA else 'pure Python'}): "
+          f"{len(mismatches)} mismatch(es) over {len(instances)} instance(s)")
+    return mismatches
+
+
+def _jit_parity(route, compiled, x, where):
+    """
+    Compiled kernels against their .py_func, bit for bit.
+    """
+    pos = route_positions(route, compiled)
+    m, n = len(pos), compiled["n"]
+    c, T = compiled["c"], compiled["T"]
+    found = []
+
+    if _route_cost(pos, m, n, c) != _route_cost.py_func(pos, m, n, c):
+        found.append(f"{where}: jit route_cost differs")
+
+    args = (compiled["service"], compiled["open"], compiled["close"])
+    s1, s2 = array("d", [0.0]) * m, array("d", [0.0]) * m
+    if (_arrival_times(pos, m, n, T, *args, s1) != _arrival_times.py_func(pos, m, n, T, *args, s2)
+            or s1 != s2):
+        found.append(f"{where}: jit arrival_times differ")
+
+    o1, o2 = array("d", [0.0]) * m, array("d", [0.0]) * m
+    xi = compiled["index"][x]
+    _insertion_deltas(pos, m, n, c, xi, o1)
+    _insertion_deltas.py_func(pos, m, n, c, xi, o2)
+    if o1 != o2:
+        found.append(f"{where}: jit insertion_deltas differ")
+
+    o1, o2 = array("d", [_INF]) * (m * m), array("d", [_INF]) * (m * m)
+    _two_opt_deltas(pos, m, n, c, o1)
+    _two_opt_deltas.py_func(pos, m, n, c, o2)
+    if o1 != o2:
+        found.append(f"{where}: jit two_opt_deltas differ")
+
+    return found
+
+
+def _reference_times(route, instance):
+    """
+    Service start times by the FEASIBLE() time update (without its
+    trace output), up to the first window violation.
+    """
+    node_index = {v: idx for idx, v in enumerate(instance["V"])}
+    times = []
+    time = 0
+    for k in range(len(route)):
+        time = _update_time(k, route, time, instance, node_index)
+        times.append(time)
+        if time > instance["close"][route[k]]:
+            return times, k
+    return times, -1
+
+
+def _default_instances(instance_input):
+    instances = [
+        (name, getattr(instance_input, name)())
+        for name in sorted(dir(instance_input)) if name.startswith("get_instance")
+    ]
+    instances.append(("generated_30", instance_input.generate_instance(30, seed=1)))
+    return instances
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(1 if parity_check() else 0)
@@ -13,6 +13,7 @@
 # • A fail message: "instance infeasible"
 # -------------------------------------------------------------
 from solver import PDP_GREEDY_INSERT_2OPT
+from visits import serve
 from instance_input import (
     get_instance,
     get_instance_tight_tw,
@@ -46,24 +47,13 @@ def route_to_dictionary(route, instance):
     pickup = instance["pickup"]
     delivery = instance["delivery"]
 
- 
-    pickup_of = {pickup[r]: r for r in pickup}
-    delivery_of = {delivery[r]: r for r in delivery}
-
-    served = []      # store tuples of (r, pickup_node, delivery_node)
-    active = {}      # store currently active pickups
-
-    for node in route:
-        if node in pickup_of:
-            r = pickup_of[node]
-            active[r] = {"pickup": node}
-
-        if node in delivery_of:
-            r = delivery_of[node]
-            if r in active:
-                active[r]["delivery"] = node
-                served.append((r, active[r]["pickup"], active[r]["delivery"]))
-                del active[r]
+    # store tuples of (r, pickup_node, delivery_node) in delivery order;
+    # a shared node serves every request it can (visits.serve)
+    served = []
+    for stop in serve(route, instance)["stops"]:
+        for r, role in stop:
+            if role == 1:
+                served.append((r, pickup[r], delivery[r]))
 
     # Build final dictionary
     order_dict = {}
@@ -106,7 +96,8 @@ def main():
     # Call solver
     # ------------------------------
     start = time.time()
-    greedy, final = PDP_GREEDY_INSERT_2OPT(instance_basic)
+    result = {}
+    greedy, final = PDP_GREEDY_INSERT_2OPT(instance_basic, result=result, bound=True)
     end = time.time()
 
     # ------------------------------
@@ -117,6 +108,8 @@ def main():
 
     print("Route after greedy (before 2-opt):", greedy)
     print("Route after 2-opt:", final)
+    if "gap" in result:
+        print(f"Lower bound: {result['lower_bound']:.3f}  |  gap: {result['gap']:.2%}")
 
     print("Order (pickup→delivery pairs):")
     print(route_to_dictionary(final, instance_basic))
@@ -0,0 +1,152 @@
+# -------------------------------------------------------------
+# Memory footprint benchmark
+#
+#     python memory_benchmark.py                      // default sizes
+#     python memory_benchmark.py --sizes 16 32 64 --budget 20
+#
+# MEASURE_MEMORY(sizes):
+#     for n in sizes, each solve in a fresh process:
+#         instance = generate_instance(n, seed, slack)
+#         run 1: PDP_GREEDY_INSERT_2OPT, peak RSS of the process
+#                (ru_maxrss) before and after the solve
+#         run 2: the same under tracemalloc: traced bytes, peak bytes
+#                and live allocation blocks per phase
+#                (result["memory"] from the solver)
+#
+# With --budget (MB) both runs pass memory_budget to the solver, and
+# each row shows whether the RSS growth stayed within it.
+# tracemalloc slows the solve down and adds its own overhead, which
+# is why RSS comes from the untraced run.
+# -------------------------------------------------------------
+
+import contextlib
+import multiprocessing
+import os
+import sys
+import tracemalloc
+
+from distance import total_distance
+from instance_input import generate_instance
+from memory_budget import estimate_memory
+from solver import PDP_GREEDY_INSERT_2OPT
+
+
+PHASES = ("preprocessing", "construction", "penalty_search", "improvement")
+
+DEFAULTS = {
+    "sizes": [8, 16, 24, 32],
+    "seed": 0,
+    "slack": 400,
+}
+
+
+def measure_memory(sizes, seed=0, slack=400, memory_budget=None):
+    """
+    One row per size: {"n", "feasible", "cost", "estimate",
+    "rss_start", "rss_peak", "phases": {phase: {"current", "peak",
+    "blocks"}}}, plus "message" when the solve failed.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for n in sizes:
+        args = (n, seed, slack, memory_budget)
+        with ctx.Pool(1, maxtasksperchild=1) as pool:
+            row = pool.apply(_solve, args + (False,))
+        with ctx.Pool(1, maxtasksperchild=1) as pool:
+            row["phases"] = pool.apply(_solve, args + (True,))["phases"]
+        rows.append(row)
+    return rows
+
+
+def print_report(rows, memory_budget=None):
+    print(f"{'n':>4} {'feasible':>8} {'cost':>9} {'estimate':>9} {'rss +':>9} {'rss peak':>9}"
+          + ("  budget" if memory_budget else ""))
+    for row in rows:
+        cost = "-" if row["cost"] is None else f"{row['cost']:.1f}"
+        grown = None if row["rss_peak"] is None else row["rss_peak"] - row["rss_start"]
+        line = (f"{row['n']:>4} {str(row['feasible']):>8} {cost:>9} {_mb(row['estimate']):>9} "
+                f"{_mb(grown):>9} {_mb(row['rss_peak']):>9}")
+        if memory_budget:
+            line += "  ok" if grown is not None and grown <= memory_budget else "  OVER"
+        print(line)
+        if "message" in row:
+            print(f"      {row['message']}")
+        for phase in PHASES:
+            if phase in row["phases"]:
+                m = row["phases"][phase]
+                print(f"      {phase:<15} traced {_mb(m['current']):>9}  peak {_mb(m['peak']):>9}  "
+                      f"blocks {m['blocks']:>9}")
+
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def _solve(n, seed, slack, memory_budget, trace):
+    """
+    Runs in a fresh worker process.
+    """
+    instance = generate_instance(n, seed=seed, slack=slack)
+    rss_start = _peak_rss()
+
+    result = {}
+    if trace:
+        tracemalloc.start()
+    try:
+        with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            greedy, final = PDP_GREEDY_INSERT_2OPT(instance, result=result, memory_budget=memory_budget)
+    finally:
+        if trace:
+            tracemalloc.stop()
+
+    row = {
+        "n": n,
+        "feasible": greedy is not None,
+        "cost": total_distance(final, instance["c"], instance["V"]) if greedy is not None else None,
+        "estimate": estimate_memory(instance)["total"],
+        "rss_start": rss_start,
+        "rss_peak": _peak_rss(),
+        "phases": result.get("memory", {}),
+    }
+    if greedy is None:
+        row["message"] = final
+    return row
+
+
+def _peak_rss():
+    """
+    Peak resident set size of this process in bytes, or None where
+    the resource module is missing.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _mb(size):
+    return "-" if size is None else f"{size / 2 ** 20:.1f}MB"
+
+
+# MAIN SCRIPT
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Solver memory footprint benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULTS["sizes"])
+    parser.add_argument("--seed", type=int, default=DEFAULTS["seed"])
+    parser.add_argument("--slack", type=int, default=DEFAULTS["slack"])
+    parser.add_argument("--budget", type=float, default=None, help="memory budget per solve in MB")
+    args = parser.parse_args(argv)
+
+    budget = None if args.budget is None else int(args.budget * 2 ** 20)
+    rows = measure_memory(args.sizes, args.seed, args.slack, budget)
+    print_report(rows, budget)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
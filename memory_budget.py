@@ -0,0 +1,125 @@
+# -------------------------------------------------------------
+# Per-solve memory budget
+#
+# ESTIMATE(instance, memo_entries):            // bytes, before solving
+#     matrices   c and T as stored (shared rows counted once)
+#     compat     arc bitmap of preprocessing, |V| ints of |V| bits
+#     memo       min(memo_entries, |R|^3 + 1000) * MEMO_ENTRY_BYTES
+#                (the greedy + 2-opt solver stores about 0.5 |R|^3
+#                distinct trial routes)
+#
+# FIT(instance, budget, memo_entries):
+#     if ESTIMATE <= budget:            keep everything
+#     c, T -> one array("d") per row    // 8 bytes per entry instead of
+#                                       // a pointer plus an int object
+#     shrink the memo until it fits (down to no memo at all)
+#     still over budget: fail fast with a message
+#
+# Typed rows index like the nested lists (c[i][j]), so the solver code
+# is unchanged; distances come back as floats.
+# -------------------------------------------------------------
+
+import sys
+from array import array
+
+
+# measured with tracemalloc: (hash, length) key, (cost,) value and the
+# OrderedDict link
+MEMO_ENTRY_BYTES = 240
+
+DEFAULT_MEMO_ENTRIES = 100000
+
+
+def estimate_memory(instance, memo_entries=DEFAULT_MEMO_ENTRIES):
+    """
+    Rough bytes a PDP_GREEDY_INSERT_2OPT solve holds beyond the
+    instance's own windows and ids: {"matrices", "compat", "memo",
+    "total"}.
+    """
+    n = len(instance["V"])
+    estimate = {
+        "matrices": _matrix_bytes(instance),
+        "compat": n * (sys.getsizeof(1 << max(n - 1, 0)) + 8),
+        "memo": min(memo_entries, _expected_trials(instance)) * MEMO_ENTRY_BYTES,
+    }
+    estimate["total"] = sum(estimate.values())
+    return estimate
+
+
+def fit_budget(instance, budget, memo_entries=DEFAULT_MEMO_ENTRIES):
+    """
+    Lower-memory settings for a solve within budget bytes.
+
+    Returns (instance, memo_entries, plan) where plan lists the
+    changes made, or (None, None, message) if even the smallest
+    settings need more than budget.
+    """
+    plan = []
+    if estimate_memory(instance, memo_entries)["total"] <= budget:
+        return instance, memo_entries, plan
+
+    compact = compact_instance(instance)
+    if compact is not instance:
+        instance = compact
+        plan.append("typed matrix rows")
+
+    fixed = estimate_memory(instance, 0)["total"]
+    if fixed > budget:
+        return None, None, (f"memory budget of {_mb(budget)} too small "
+                            f"(needs about {_mb(fixed)} without the route memo)")
+
+    fitting = min(memo_entries, (budget - fixed) // MEMO_ENTRY_BYTES)
+    if fitting < min(memo_entries, _expected_trials(instance)):
+        memo_entries = fitting
+        plan.append(f"route memo limited to {memo_entries} entries")
+
+    return instance, memo_entries, plan
+
+
+def compact_instance(instance):
+    """
+    Shallow copy with c and T as lists of array("d") rows (the same
+    object twice if c is T); the instance itself if already compact.
+    """
+    rows = {}
+
+    def compact(matrix):
+        if all(isinstance(row, array) for row in matrix):
+            return matrix
+        if id(matrix) not in rows:
+            rows[id(matrix)] = [array("d", row) for row in matrix]
+        return rows[id(matrix)]
+
+    c, T = compact(instance["c"]), compact(instance["T"])
+    if c is instance["c"] and T is instance["T"]:
+        return instance
+    return dict(instance, c=c, T=T)
+
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def _matrix_bytes(instance):
+    seen = set()
+    total = 0
+    for matrix in (instance["c"], instance["T"]):
+        if id(matrix) in seen:
+            continue
+        seen.add(id(matrix))
+        total += sys.getsizeof(matrix)
+        for row in matrix:
+            total += sys.getsizeof(row)
+            if not isinstance(row, array):
+                # small ints are cached by the interpreter
+                total += sum(sys.getsizeof(x) for x in row if not (type(x) is int and -5 <= x <= 256))
+    return total
+
+
+def _expected_trials(instance):
+    return len(instance["R"]) ** 3 + 1000
+
+
+def _mb(size):
+    return f"{size / 2 ** 20:.2f} MB"
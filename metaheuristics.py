@@ -0,0 +1,417 @@
+# -------------------------------------------------------------
+# Metaheuristic improvement: simulated annealing and tabu search
+#
+# Moves (on top of the route from the construction phase):
+#     ("2opt", i, j)   REVERSE_SEGMENT(route, i+1, j), as in _two_opt_phase
+#     ("move", x, y)   take the stop at x out and re-insert it so it
+#                      ends up at index y; accepted only if it still
+#                      comes after the stops it must follow and before
+#                      the stops that must follow it
+#
+# Cached route state, updated after every applied move from the first
+# changed position lo onwards:
+#     fwd[k] = c[r0][r1] + ... + c[r(k-1)][rk]      // route prefix cost
+#     rev[k] = c[r1][r0] + ... + c[rk][r(k-1)]      // reversed prefix cost
+#     start/latest from route_state (route_state.refresh from lo)
+#
+# Applying a move is O(n): prefix costs and start times from lo, and
+# latest[] (backward) over the whole route. Evaluating one is O(1):
+#     2opt: c[ri][rj] + (rev[j] - rev[i+1]) + c[r(i+1)][r(j+1)]
+#           - c[ri][r(i+1)] - (fwd[j] - fwd[i+1]) - c[rj][r(j+1)]
+#     move: removal gain + insertion cost, three arcs each
+#
+# Feasibility (time windows, precedence, pairing) is only checked for
+# moves the search is about to accept. With shared nodes the move must
+# also keep delivering every request the route delivered (SERVES_ALL
+# in visits.py).
+#
+# SIMULATED ANNEALING:
+#     temperature cools geometrically from t_start to t_end over
+#     the time budget (over max_iterations, if given)
+#     pick a random move; accept if Δ < 0 or rand < exp(-Δ / temp)
+#
+# TABU SEARCH:
+#     every iteration sample moves, take the best non-tabu one
+#     (even if it is worse); a move is tabu if it re-creates an arc
+#     removed during the last `tenure` iterations, unless it beats
+#     the incumbent (aspiration). A relocate removes three arcs
+#     (prev, x), (x, next), (before, after) and adds three
+#     (prev, next), (before, x), (x, after).
+#
+# With checkpoint=path both searches save their state there every
+# checkpoint_every seconds and at the end (checkpoint.py);
+# resume=True continues from that file.
+# -------------------------------------------------------------
+
+import math
+import random
+import time
+
+from checkpoint import (
+    checkpoint_due,
+    load_checkpoint,
+    new_checkpoint,
+    restore_rng,
+    rng_state,
+    save_checkpoint,
+)
+from preprocessing import precedence_pairs
+from route_state import build_state, refresh, reversal_time_ok, route_feasible
+from visits import serve, serves_all, shared_nodes
+
+
+def IMPROVE_ANNEALING(instance, route, time_budget=1.0, seed=0,
+                      t_start=None, t_end=0.01, max_iterations=None, target=None,
+                      checkpoint=None, checkpoint_every=5.0, resume=False):
+    """
+    Simulated annealing from route. Returns the best feasible route
+    found within time_budget seconds (or max_iterations moves).
+
+    t_start defaults to the mean |Δcost| of a sample of random moves.
+    Stops early once the best cost is <= target (see bounds.target_cost).
+    checkpoint / resume: see the header.
+    """
+    print("\n=== TRACE: Simulated Annealing ===")
+
+    rng = random.Random(seed)
+    saved = load_checkpoint(checkpoint, "annealing", instance) if resume else None
+    writer = new_checkpoint(checkpoint, "annealing", instance, checkpoint_every)
+
+    if saved is not None:
+        search = _restore_search(instance, saved, rng)
+        t_start, iteration, elapsed = saved["t_start"], saved["iteration"], saved["elapsed"]
+        print("Resumed at iteration", iteration)
+    else:
+        search = _new_search(instance, route)
+        if t_start is None:
+            sample = [abs(_delta(search, _random_move(search, rng))) for _ in range(50)]
+            t_start = max(sum(sample) / len(sample), t_end * 2)
+        iteration, elapsed = 0, 0.0
+
+    deadline = time.perf_counter() + time_budget - elapsed
+    temp = t_start
+
+    def state():
+        return dict(_search_state(search, rng, deadline, time_budget),
+                    iteration=iteration, t_start=t_start)
+
+    while iteration != max_iterations and not _reached(search, target):
+        if iteration % 100 == 0:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if max_iterations is None:
+                progress = 1 - (deadline - now) / time_budget
+            else:
+                progress = iteration / max_iterations
+            temp = t_start * (t_end / t_start) ** progress
+            if checkpoint_due(writer):
+                save_checkpoint(writer, state())
+
+        iteration += 1
+        move = _random_move(search, rng)
+        if move is None:
+            break
+
+        delta = _delta(search, move)
+        if delta >= 0 and rng.random() >= math.exp(-delta / temp):
+            continue
+        if not _feasible(search, move):
+            continue
+
+        _apply(search, move)
+
+    if writer is not None:
+        save_checkpoint(writer, state())
+    print(f"Iterations: {iteration}  |  best cost = {search['best_cost']:.3f}")
+    return search["best"]
+
+
+def IMPROVE_TABU(instance, route, time_budget=1.0, seed=0,
+                 tenure=7, sample_size=60, max_iterations=None, target=None,
+                 checkpoint=None, checkpoint_every=5.0, resume=False):
+    """
+    Tabu search from route. Returns the best feasible route found
+    within time_budget seconds (or max_iterations iterations), or
+    once the best cost is <= target. checkpoint / resume: see the
+    header.
+    """
+    print("\n=== TRACE: Tabu Search ===")
+
+    rng = random.Random(seed)
+    saved = load_checkpoint(checkpoint, "tabu", instance) if resume else None
+    writer = new_checkpoint(checkpoint, "tabu", instance, checkpoint_every)
+
+    if saved is not None:
+        search = _restore_search(instance, saved, rng)
+        iteration, elapsed = saved["iteration"], saved["elapsed"]
+        tabu = {(u, v): until for u, v, until in saved["tabu"]}
+        print("Resumed at iteration", iteration)
+    else:
+        search = _new_search(instance, route)
+        iteration, elapsed = 0, 0.0
+        tabu = {}                    # arc -> iteration it stays tabu until
+
+    deadline = time.perf_counter() + time_budget - elapsed
+
+    def state():
+        # expired entries can never make a move tabu again
+        return dict(_search_state(search, rng, deadline, time_budget), iteration=iteration,
+                    tabu=[[u, v, until] for (u, v), until in tabu.items() if until > iteration])
+
+    while (iteration != max_iterations and time.perf_counter() < deadline
+           and not _reached(search, target)):
+        if checkpoint_due(writer):
+            save_checkpoint(writer, state())
+        iteration += 1
+
+        candidates = []
+        for _ in range(sample_size):
+            move = _random_move(search, rng)
+            if move is not None:
+                candidates.append((_delta(search, move), move))
+        if not candidates:
+            break
+        candidates.sort(key=lambda dm: dm[0])
+
+        for delta, move in candidates:
+            aspiration = search["cost"] + delta < search["best_cost"] - 1e-9
+            if not aspiration and any(tabu.get(arc, 0) > iteration for arc in _added_arcs(search, move)):
+                continue
+            if not _feasible(search, move):
+                continue
+
+            for arc in _removed_arcs(search, move):
+                tabu[arc] = iteration + tenure
+            _apply(search, move)
+            break
+
+    if writer is not None:
+        save_checkpoint(writer, state())
+    print(f"Iterations: {iteration}  |  best cost = {search['best_cost']:.3f}")
+    return search["best"]
+
+
+
+# ============================================================
+# Helper 1: search state
+# ============================================================
+
+def _new_search(instance, route):
+    must_follow = {}
+    for p, d in precedence_pairs(instance):
+        must_follow.setdefault(d, set()).add(p)
+
+    search = {
+        "instance": instance,
+        "index": {v: idx for idx, v in enumerate(instance["V"])},
+        "c": instance["c"],
+        "must_follow": must_follow,
+        # requests a move must keep delivering (shared nodes only)
+        "served": set(serve(route, instance)["delivery"]) if shared_nodes(instance) else None,
+        "fixed_end": instance["e"] is not None and route[-1] == instance["e"],
+        "route": list(route),
+    }
+    _rebuild(search)
+
+    search["best"] = list(route)
+    search["best_cost"] = search["cost"]
+    if not route_feasible(route, instance):
+        # only feasible routes may become the incumbent
+        search["best_cost"] = float("inf")
+
+    return search
+
+
+def _search_state(search, rng, deadline, time_budget):
+    """
+    Checkpoint state shared by both searches.
+    """
+    return {
+        "route": search["route"],
+        "best": search["best"],
+        "best_cost": search["best_cost"],
+        "elapsed": time_budget - (deadline - time.perf_counter()),
+        "rng": rng_state(rng),
+    }
+
+
+def _restore_search(instance, saved, rng):
+    search = _new_search(instance, saved["route"])
+    search["best"], search["best_cost"] = saved["best"], saved["best_cost"]
+    restore_rng(rng, saved["rng"])
+    return search
+
+
+def _rebuild(search, lo=0):
+    """
+    Recompute prefix costs and route state after the route changed at
+    position lo (nothing before lo moved).
+    """
+    route = search["route"]
+    index = search["index"]
+    c = search["c"]
+
+    if lo == 0:
+        fwd = search["fwd"] = [0] * len(route)
+        rev = search["rev"] = [0] * len(route)
+    else:
+        fwd, rev = search["fwd"], search["rev"]
+    for k in range(max(lo, 1), len(route)):
+        a, b = index[route[k - 1]], index[route[k]]
+        fwd[k] = fwd[k - 1] + c[a][b]
+        rev[k] = rev[k - 1] + c[b][a]
+
+    search["cost"] = fwd[-1] if route else 0
+    if lo == 0:
+        search["state"] = build_state(route, search["instance"])
+    else:
+        search["state"]["route"] = list(route)
+        refresh(search["state"], search["instance"], lo)
+
+
+def _reached(search, target):
+    return target is not None and search["best_cost"] <= target
+
+
+def _apply(search, move):
+    route = search["route"]
+    kind, a, b = move
+
+    if kind == "2opt":
+        route[a + 1:b + 1] = route[a + 1:b + 1][::-1]
+        lo = a + 1
+    else:
+        node = route.pop(a)
+        route.insert(b, node)
+        lo = min(a, b)
+
+    _rebuild(search, lo)
+
+    if search["cost"] < search["best_cost"] - 1e-9:
+        search["best"] = list(route)
+        search["best_cost"] = search["cost"]
+
+
+
+# ============================================================
+# Helper 2: moves and O(1) deltas
+# ============================================================
+
+def _random_move(search, rng):
+    route = search["route"]
+    last = len(route) - (2 if search["fixed_end"] else 1)   # last movable index
+    if last < 2:
+        return None
+
+    if rng.random() < 0.5 and len(route) >= 4:
+        i = rng.randint(0, len(route) - 4)
+        j = rng.randint(i + 2, len(route) - 2)
+        return ("2opt", i, j)
+
+    x = rng.randint(1, last)
+    y = rng.randint(1, last)
+    if y == x:
+        return _random_move(search, rng)
+    return ("move", x, y)
+
+
+def _delta(search, move):
+    route = search["route"]
+    index = search["index"]
+    c = search["c"]
+
+    def arc(u, v):
+        return c[index[u]][index[v]]
+
+    kind, a, b = move
+
+    if kind == "2opt":
+        i, j = a, b
+        fwd, rev = search["fwd"], search["rev"]
+        old = arc(route[i], route[i + 1]) + (fwd[j] - fwd[i + 1]) + arc(route[j], route[j + 1])
+        new = arc(route[i], route[j]) + (rev[j] - rev[i + 1]) + arc(route[i + 1], route[j + 1])
+        return new - old
+
+    # relocate: remove at x, insert at index y of the shortened route
+    x, y = a, b
+    node = route[x]
+    n = len(route)
+
+    def reduced(k):
+        return route[k] if k < x else route[k + 1]
+
+    prev = route[x - 1]
+    gain = -arc(prev, node)
+    if x + 1 < n:
+        nxt = route[x + 1]
+        gain += arc(prev, nxt) - arc(node, nxt)
+
+    before = reduced(y - 1)
+    cost = arc(before, node)
+    if y < n - 1:
+        after = reduced(y)
+        cost += arc(node, after) - arc(before, after)
+
+    return gain + cost
+
+
+def _removed_arcs(search, move):
+    route = search["route"]
+    kind, a, b = move
+    if kind == "2opt":
+        return [(route[a], route[a + 1]), (route[b], route[b + 1])]
+    arcs = [(route[a - 1], route[a])]
+    if a + 1 < len(route):
+        arcs.append((route[a], route[a + 1]))
+    # the arc the node is inserted into
+    trial = route[:a] + route[a + 1:]
+    if b < len(trial):
+        arcs.append((trial[b - 1], trial[b]))
+    return arcs
+
+
+def _added_arcs(search, move):
+    route = search["route"]
+    kind, a, b = move
+    if kind == "2opt":
+        return [(route[a], route[b]), (route[a + 1], route[b + 1])]
+    trial = route[:a] + route[a + 1:]
+    node = route[a]
+    arcs = [(trial[b - 1], node)]
+    if b < len(trial):
+        arcs.append((node, trial[b]))
+    # the arc that closes the gap the node leaves
+    if a + 1 < len(route):
+        arcs.append((route[a - 1], route[a + 1]))
+    return arcs
+
+
+
+# ============================================================
+# Helper 3: exact feasibility of a candidate move
+# ============================================================
+
+def _feasible(search, move):
+    route = search["route"]
+    instance = search["instance"]
+    must_follow = search["must_follow"]
+    kind, a, b = move
+
+    if kind == "2opt":
+        nodes = set()
+        for k in range(a + 1, b + 1):
+            if must_follow.get(route[k], set()) & nodes:
+                return False
+            nodes.add(route[k])
+        if search["served"] is not None:
+            trial = route[:a + 1] + route[a + 1:b + 1][::-1] + route[b + 1:]
+            if not serves_all(trial, instance, search["served"]):
+                return False
+        return reversal_time_ok(search["state"], instance, a, b)
+
+    trial = route[:a] + route[a + 1:]
+    trial.insert(b, route[a])
+    if search["served"] is not None and not serves_all(trial, instance, search["served"]):
+        return False
+    return route_feasible(trial, instance)
@@ -0,0 +1,260 @@
+# -------------------------------------------------------------
+# Penalty-based search through infeasible routes
+#
+# Instead of rejecting every route FEASIBLE() refuses, score it:
+#
+#     SCORE(route) = TOTAL_DISTANCE(route)
+#                    + w_time       * (total lateness + excess ride
+#                                      time + excess route duration)
+#                    + w_precedence * #deliveries before their pickup
+#                    + w_pairing    * #deliveries before a paired pickup
+#
+# (violations from route_state.violations()).
+#
+# PENALTY_SEARCH(instance):
+#     route = every stop, ordered by time-window midpoint, each
+#             delivery moved behind its pickup
+#     repeat until the time budget is used up:
+#         random move: relocate one stop, swap two stops, or 2-opt
+#         accept if SCORE does not get worse (or, early on, with
+#         probability exp(-Δ / temp); temp falls linearly over the
+#         time budget, or over max_iterations if given)
+#         every adapt_every iterations:
+#             w *= 1.5 for each violation type the current route has,
+#             w /= 1.5 (down to its start value) for the others
+#         remember the cheapest violation-free route, and the
+#         least-violating route seen
+#
+# Returns the best feasible route as soon as one is found (or the
+# cheapest one at the end of the budget with stop_when_feasible=False),
+# otherwise the least-violating route, with its violation report.
+#
+# With checkpoint=path the search saves its state there every
+# checkpoint_every seconds and at the end, weights included
+# (checkpoint.py); resume=True continues from that file.
+# -------------------------------------------------------------
+
+import math
+import random
+import time
+
+from checkpoint import (
+    checkpoint_due,
+    load_checkpoint,
+    new_checkpoint,
+    restore_rng,
+    rng_state,
+    save_checkpoint,
+)
+from distance import total_distance
+from route_state import violations
+
+
+def PDP_PENALTY_SEARCH(instance, route=None, time_budget=2.0, seed=0,
+                       max_iterations=None, adapt_every=50, stop_when_feasible=True,
+                       checkpoint=None, checkpoint_every=5.0, resume=False):
+    """
+    Penalty search from route (default: a window-ordered start route
+    with every request). Returns (route, report), where report is
+    route_state.violations(route) plus "cost". checkpoint / resume:
+    see the header.
+    """
+    print("\n=== TRACE: Penalty Search ===")
+
+    rng = random.Random(seed)
+    c, V = instance["c"], instance["V"]
+    base = _weights(instance)
+    saved = load_checkpoint(checkpoint, "penalty", instance) if resume else None
+    writer = new_checkpoint(checkpoint, "penalty", instance, checkpoint_every)
+
+    if saved is not None:
+        route, weights = saved["route"], saved["weights"]
+        best_feasible, best_feasible_cost = saved["best_feasible"], saved["best_feasible_cost"]
+        least, least_key = saved["least"], tuple(saved["least_key"])
+        temp0, iteration, elapsed = saved["temp0"], saved["iteration"], saved["elapsed"]
+        restore_rng(rng, saved["rng"])
+        current = _score(route, instance, weights)
+        print("Resumed at iteration", iteration)
+    else:
+        if route is None:
+            route = _initial_route(instance)
+        route = list(route)
+        weights = dict(base)
+        current = _score(route, instance, weights)
+        best_feasible, best_feasible_cost = None, math.inf
+        least, least_key = list(route), _violation_key(current[1], current[2])
+        temp0 = 0.02 * max(current[2], 1)
+        iteration, elapsed = 0, 0.0
+
+    deadline = time.perf_counter() + time_budget - elapsed
+
+    def state():
+        return {
+            "route": route,
+            "weights": weights,
+            "best_feasible": best_feasible,
+            "best_feasible_cost": best_feasible_cost,
+            "least": least,
+            "least_key": least_key,
+            "temp0": temp0,
+            "iteration": iteration,
+            "elapsed": time_budget - (deadline - time.perf_counter()),
+            "rng": rng_state(rng),
+        }
+
+    while iteration != max_iterations and time.perf_counter() < deadline:
+        if checkpoint_due(writer):
+            save_checkpoint(writer, state())
+        iteration += 1
+
+        if current[1]["feasible"]:
+            if current[2] < best_feasible_cost:
+                best_feasible, best_feasible_cost = list(route), current[2]
+            if stop_when_feasible:
+                break
+
+        trial = _random_move(route, instance, rng)
+        if trial is None:
+            break
+        scored = _score(trial, instance, weights)
+
+        delta = scored[0] - current[0]
+        if max_iterations is None:
+            progress = 1 - (deadline - time.perf_counter()) / time_budget
+        else:
+            progress = iteration / max_iterations
+        temp = temp0 * (1 - progress)
+        if delta <= 0 or (temp > 0 and rng.random() < math.exp(-delta / temp)):
+            route, current = trial, scored
+            key = _violation_key(current[1], current[2])
+            if key < least_key:
+                least, least_key = list(route), key
+
+        if iteration % adapt_every == 0:
+            _adapt(weights, base, current[1])
+            current = _score(route, instance, weights)
+
+    if current[1]["feasible"] and current[2] < best_feasible_cost:
+        best_feasible, best_feasible_cost = list(route), current[2]
+    if writer is not None:
+        save_checkpoint(writer, state())
+
+    final = best_feasible if best_feasible is not None else least
+    report = violations(final, instance, instance["R"])
+    report["cost"] = total_distance(final, c, V)
+
+    print(f"Iterations: {iteration}  |  feasible = {report['feasible']}  |  "
+          f"lateness = {report['lateness']:.3f}  |  precedence = {len(report['precedence'])}  |  "
+          f"pairing = {len(report['pairing'])}")
+    return final, report
+
+
+
+# ============================================================
+# Helper 1: scoring and adaptive weights
+# ============================================================
+
+def _weights(instance):
+    """
+    Start weights: lateness in time units at par with distance, and a
+    structural violation worth about two average arcs.
+    """
+    c = instance["c"]
+    n = len(c)
+    mean_arc = sum(sum(row) for row in c) / max(n * n - n, 1)
+    return {"time": 1.0, "precedence": 2 * mean_arc, "pairing": 2 * mean_arc}
+
+
+def _score(route, instance, weights):
+    report = violations(route, instance, instance["R"])
+    cost = total_distance(route, instance["c"], instance["V"])
+    score = (cost
+             + weights["time"] * _time_excess(report)
+             + weights["precedence"] * len(report["precedence"])
+             + weights["pairing"] * len(report["pairing"]))
+    return score, report, cost
+
+
+def _adapt(weights, base, report):
+    present = {
+        "time": _time_excess(report) > 0,
+        "precedence": bool(report["precedence"]),
+        "pairing": bool(report["pairing"]),
+    }
+    for name, violated in present.items():
+        if violated:
+            weights[name] *= 1.5
+        else:
+            weights[name] = max(weights[name] / 1.5, base[name])
+
+
+def _violation_key(report, cost):
+    """
+    Order for "least violating": structural violations, then
+    lateness, then cost.
+    """
+    return (len(report["precedence"]) + len(report["pairing"]), _time_excess(report), cost)
+
+
+def _time_excess(report):
+    return report["lateness"] + sum(excess for *_, excess in report["ride"]) + report["duration"]
+
+
+
+# ============================================================
+# Helper 2: start route and moves
+# ============================================================
+
+def _initial_route(instance):
+    s, e = instance["s"], instance["e"]
+    pickup, delivery = instance["pickup"], instance["delivery"]
+    open_tw, close_tw = instance["open"], instance["close"]
+
+    stops = []
+    for r in sorted(instance["R"]):
+        stops.append((pickup[r], r, 0))
+        stops.append((delivery[r], r, 1))
+    stops.sort(key=lambda st: ((open_tw[st[0]] + close_tw[st[0]]) / 2, st[2], st[1]))
+
+    # deliveries that come before their pickup go right behind it
+    order = []
+    waiting = {}
+    placed = set()
+    for node, r, role in stops:
+        if role == 0:
+            order.append(node)
+            placed.add(r)
+            if r in waiting:
+                order.append(waiting.pop(r))
+        elif r in placed:
+            order.append(node)
+        else:
+            waiting[r] = node
+
+    route = [s] + order
+    if e is not None:
+        route.append(e)
+    return route
+
+
+def _random_move(route, instance, rng):
+    lo = 1
+    hi = len(route) - (2 if instance["e"] is not None else 1)     # last movable index
+    if hi - lo < 1:
+        return None
+
+    i = rng.randint(lo, hi)
+    j = rng.randint(lo, hi)
+    while j == i:
+        j = rng.randint(lo, hi)
+
+    trial = list(route)
+    kind = rng.random()
+    if kind < 0.5:                                   # relocate
+        trial.insert(j, trial.pop(i))
+    elif kind < 0.8:                                 # swap
+        trial[i], trial[j] = trial[j], trial[i]
+    else:                                            # 2-opt
+        a, b = min(i, j), max(i, j)
+        trial[a:b + 1] = trial[a:b + 1][::-1]
+    return trial
@@ -0,0 +1,227 @@
+# -------------------------------------------------------------
+# Performance regression checks
+#
+#     python perf_regression.py              // compare with baseline
+#     python perf_regression.py --update     // record a new baseline
+#
+# MEASURE(sizes):
+#     for n in sizes:
+#         instance = generate_instance(n, seed, slack)
+#         run PDP_GREEDY_INSERT_2OPT, keep the per-phase timings
+#         (best of `repeats` runs) and the final route cost
+#         CALIBRATION right before: best-of-3 time of a fixed
+#         pure-Python workload, the unit for comparing times across
+#         machines (and across changes in machine load)
+#
+# GROWTH EXPONENT of a phase:
+#     least-squares slope of log(time) against log(n), over the sizes
+#     where the phase takes at least 4 ms (none below three sizes;
+#     the sizes reach 64 so 2-opt, much faster than the greedy
+#     insertion, has enough of them)
+#     (time ~ n^k, e.g. k ≈ 3 for the greedy insertion loop)
+#
+# CHECK against the stored baseline (perf_baseline.json):
+#     exponent  <= baseline exponent + exponent_slack
+#     time / calibration at every size
+#               <= baseline time / calibration * time_factor
+#     time at every size <= baseline time * time_factor, only when the
+#               baseline was recorded on this machine
+#                           (differences under min_seconds are noise)
+#     cost at every size <= baseline cost (the solver is deterministic)
+#
+# The same checks run under pytest as tests/test_perf.py (opt-in:
+# PDP_PERF=1).
+# -------------------------------------------------------------
+
+import contextlib
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+from distance import total_distance
+from instance_input import generate_instance
+from solver import PDP_GREEDY_INSERT_2OPT
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perf_baseline.json")
+
+PHASES = ("construction", "improvement")
+
+DEFAULTS = {
+    "sizes": [12, 16, 24, 32, 48, 64],
+    "seed": 0,
+    "slack": 400,
+    "repeats": 3,
+}
+
+
+def measure(sizes, seed=0, slack=400, repeats=2):
+    """
+    Solve one generated instance per size. Returns a list of
+    {"n", "feasible", "cost", "calibration", "construction", "improvement"}.
+    """
+    rows = []
+    for n in sizes:
+        instance = generate_instance(n, seed=seed, slack=slack)
+        unit = calibrate()
+        best = {}
+        for _ in range(repeats):
+            result = {}
+            with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+                greedy, final = PDP_GREEDY_INSERT_2OPT(instance, result=result)
+            for phase in PHASES:
+                if phase in result["timings"]:
+                    best[phase] = min(best.get(phase, math.inf), result["timings"][phase])
+
+        row = {"n": n, "feasible": greedy is not None, "cost": None, "calibration": unit}
+        if greedy is not None:
+            row["cost"] = total_distance(final, instance["c"], instance["V"])
+        row.update(best)
+        rows.append(row)
+    return rows
+
+
+def growth_exponent(rows, phase, min_seconds=0.004):
+    """
+    Slope of log(time) vs log(n) over the sizes where the phase ran
+    for at least min_seconds (shorter times are mostly timer noise);
+    None with fewer than three such sizes.
+    """
+    points = [(math.log(r["n"]), math.log(r[phase]))
+              for r in rows if phase in r and r[phase] >= min_seconds]
+    if len(points) < 3:
+        return None
+
+    mx = sum(x for x, _ in points) / len(points)
+    my = sum(y for _, y in points) / len(points)
+    sxx = sum((x - mx) ** 2 for x, _ in points)
+    sxy = sum((x - mx) * (y - my) for x, y in points)
+    return sxy / sxx
+
+
+def calibrate(repeats=3):
+    """
+    Seconds for a fixed pure-Python workload (best of repeats): the
+    unit for comparing times recorded on different machines.
+    """
+    instance = generate_instance(40, seed=0)
+    route = list(instance["V"])
+    best = math.inf
+    for _ in range(repeats):
+        clock = time.perf_counter()
+        for _ in range(2000):
+            total_distance(route, instance["c"], instance["V"])
+        best = min(best, time.perf_counter() - clock)
+    return best
+
+
+def machine():
+    """
+    Identifies the machine a report was recorded on.
+    """
+    return f"{platform.node()} {platform.machine()} {platform.python_implementation()} {platform.python_version()}"
+
+
+def check(report, baseline, exponent_slack=0.5, time_factor=2.0, min_seconds=0.05):
+    """
+    Compare a report with a baseline; returns a list of failures.
+    Absolute times are only compared when both were recorded on the
+    same machine.
+    """
+    failures = []
+    same_machine = report.get("machine") == baseline.get("machine")
+
+    for phase in PHASES:
+        now, before = report["exponents"].get(phase), baseline["exponents"].get(phase)
+        if now is not None and before is not None and now > before + exponent_slack:
+            failures.append(f"{phase}: growth exponent {now:.2f} > baseline {before:.2f} + {exponent_slack}")
+
+    base_rows = {r["n"]: r for r in baseline["rows"]}
+    for row in report["rows"]:
+        base = base_rows.get(row["n"])
+        if base is None:
+            continue
+
+        for phase in PHASES:
+            if phase not in row or phase not in base:
+                continue
+            if (same_machine and row[phase] > base[phase] * time_factor
+                    and row[phase] - base[phase] > min_seconds):
+                failures.append(f"n={row['n']} {phase}: {row[phase]:.3f}s > {time_factor} x baseline {base[phase]:.3f}s")
+            if row.get("calibration") and base.get("calibration") and row[phase] > min_seconds:
+                now, before = row[phase] / row["calibration"], base[phase] / base["calibration"]
+                if now > before * time_factor:
+                    failures.append(f"n={row['n']} {phase}: {now:.1f} calibration units > "
+                                    f"{time_factor} x baseline {before:.1f}")
+
+        if base["feasible"] and not row["feasible"]:
+            failures.append(f"n={row['n']}: no route found (baseline cost {base['cost']})")
+        elif base["feasible"] and row["cost"] > base["cost"] + 1e-9:
+            failures.append(f"n={row['n']}: cost {row['cost']} > baseline {base['cost']}")
+
+    return failures
+
+
+def run(settings=None):
+    settings = dict(DEFAULTS, **(settings or {}))
+    rows = measure(settings["sizes"], settings["seed"], settings["slack"], settings["repeats"])
+    return {
+        "settings": settings,
+        "machine": machine(),
+        "rows": rows,
+        "exponents": {phase: growth_exponent(rows, phase) for phase in PHASES},
+    }
+
+
+def print_report(report):
+    print(f"{'n':>4} {'feasible':>8} {'cost':>10} " + " ".join(f"{p:>13}" for p in PHASES))
+    for row in report["rows"]:
+        cost = "-" if row["cost"] is None else f"{row['cost']:.1f}"
+        times = " ".join(f"{row[p]:>12.3f}s" if p in row else f"{'-':>13}" for p in PHASES)
+        print(f"{row['n']:>4} {str(row['feasible']):>8} {cost:>10} {times}")
+    for phase, k in report["exponents"].items():
+        print(f"{phase} growth exponent: {'-' if k is None else f'{k:.2f}'}")
+    if "machine" in report:
+        print("recorded on:", report["machine"])
+
+
+# MAIN SCRIPT
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Solver performance regression checks")
+    parser.add_argument("--update", action="store_true", help="record the baseline instead of checking")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--exponent-slack", type=float, default=0.5)
+    parser.add_argument("--time-factor", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if not args.update:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --update first")
+            return 2
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report = run(baseline["settings"] if baseline else None)
+    print_report(report)
+
+    if args.update:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    failures = check(report, baseline, args.exponent_slack, args.time_factor)
+    for failure in failures:
+        print("REGRESSION:", failure)
+    print("OK" if not failures else f"{len(failures)} regression(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+# -------------------------------------------------------------
+# Time-window and precedence preprocessing
+#
+# // Run once per instance, before construction.
+# PREPROCESS(instance):
+#     earliest[i] = open[i],  latest[i] = close[i]
+#
+#     // forward: nothing can start before it can be reached
+#     for each node i != s:
+#         earliest[i] = max(earliest[i], earliest[s] + s[s] + LB(s, i))
+#     for each (pickup p, delivery d) that must precede each other:
+#         earliest[d] = max(earliest[d], earliest[p] + s[p] + LB(p, d))
+#
+#     // backward: nothing can start so late that a successor is missed
+#     for each (pickup p, delivery d) that must precede each other:
+#         latest[p] = min(latest[p], latest[d] - s[p] - LB(p, d))
+#
+#     if earliest[i] > latest[i] for some i:
+#         return "instance infeasible"
+#
+#     // arc i -> j can only appear if j is still reachable from i
+#     compat[i][j] = earliest[i] + s[i] + T[i][j] <= latest[j]
+#
+# LB(i, j) is a lower bound on the time to get from i to j along
+# ANY path (direct arc, or leaving i and entering j through other
+# nodes), so the bounds stay valid without the triangle inequality.
+# Time-dependent arcs contribute their smallest travel time.
+# -------------------------------------------------------------
+
+from time_dependent import min_travel_matrix
+
+
+def preprocess(instance):
+    """
+    Tighten the time windows of an instance and build its
+    arc-compatibility bitmap.
+
+    Returns a dictionary:
+        "open", "close"  tightened windows keyed by node id
+        "compat"         list of int bitmaps; bit j of compat[i] is set
+                         when the arc V[i] -> V[j] may appear in a
+                         feasible route
+        "index"          node id -> matrix index
+        "closed"         True when routes end at the end depot e; with
+                         e == s the bitmap cannot tell the closing stop
+                         from the start, so nothing may follow the last
+                         stop of the route
+        "infeasible"     None, or a message explaining why no feasible
+                         route can exist
+
+    Runs in O(n^2) for n = |V|.
+    """
+    V = instance["V"]
+    T = min_travel_matrix(instance)
+    service = instance["service"]
+    s = instance["s"]
+    e = instance["e"]
+
+    index = {v: idx for idx, v in enumerate(V)}
+    n = len(V)
+
+    earliest = {v: instance["open"][v] for v in V}
+    latest = {v: instance["close"][v] for v in V}
+
+    min_out, min_in = _min_arc_times(T, n)
+
+    def lb(i, j):
+        i_idx = index[i]
+        j_idx = index[j]
+        return min(T[i_idx][j_idx], min_out[i_idx] + min_in[j_idx])
+
+    pairs = precedence_pairs(instance)
+
+    # --- FORWARD: earliest start times ---
+    earliest[s] = max(0, earliest[s])
+    for v in V:
+        if v != s:
+            earliest[v] = max(earliest[v], earliest[s] + service[s] + lb(s, v))
+
+    for p, d in pairs:
+        earliest[d] = max(earliest[d], earliest[p] + service[p] + lb(p, d))
+
+    if e is not None and e != s:
+        for v in V:
+            if v != e:
+                earliest[e] = max(earliest[e], earliest[v] + service[v] + lb(v, e))
+
+    # --- BACKWARD: latest start times ---
+    if e is not None and e != s:
+        for v in V:
+            if v != e:
+                latest[v] = min(latest[v], latest[e] - service[v] - lb(v, e))
+
+    for p, d in pairs:
+        latest[p] = min(latest[p], latest[d] - service[p] - lb(p, d))
+
+    # --- INFEASIBILITY CHECK ---
+    infeasible = None
+    for v in V:
+        if earliest[v] > latest[v]:
+            infeasible = (
+                f"instance infeasible (time window of node {v} is empty after "
+                f"preprocessing: earliest={earliest[v]}, latest={latest[v]})"
+            )
+            break
+
+    compat = _arc_bitmap(instance, T, index, earliest, latest)
+
+    return {
+        "open": earliest,
+        "close": latest,
+        "compat": compat,
+        "index": index,
+        "closed": e is not None,
+        "infeasible": infeasible,
+    }
+
+
+def tightened_instance(instance, prep):
+    """
+    Shallow copy of the instance with the preprocessed time windows.
+    Every feasible route of the original instance is still feasible
+    (with the same arrival times); infeasible partial routes are
+    rejected earlier.
+    """
+    tight = dict(instance)
+    tight["open"] = prep["open"]
+    tight["close"] = prep["close"]
+    return tight
+
+
+def arc_ok(prep, i, j):
+    """
+    True if the arc i -> j (node ids) may appear in a feasible route.
+    """
+    index = prep["index"]
+    return (prep["compat"][index[i]] >> index[j]) & 1 == 1
+
+
+
+# ============================================================
+# Helper 1: cheapest arc into / out of every node
+# ============================================================
+
+def _min_arc_times(T, n):
+    inf = float("inf")
+    min_out = [inf] * n
+    min_in = [inf] * n
+
+    for i in range(n):
+        row = T[i]
+        for j in range(n):
+            if i == j:
+                continue
+            t = row[j]
+            if t < min_out[i]:
+                min_out[i] = t
+            if t < min_in[j]:
+                min_in[j] = t
+
+    return min_out, min_in
+
+
+
+# ============================================================
+# Helper 2: (pickup node, delivery node) precedence pairs
+# ============================================================
+
+def precedence_pairs(instance):
+    """
+    Every pickup node that must be visited before a delivery node:
+    - p(r) before d(r)
+    - for each paired set, every pickup before every delivery
+    """
+    pickup = instance["pickup"]
+    delivery = instance["delivery"]
+
+    pairs = set()
+    for r in instance["R"]:
+        if pickup[r] != delivery[r]:
+            pairs.add((pickup[r], delivery[r]))
+
+    for group in instance["paired_sets"]:
+        for r1 in group:
+            for r2 in group:
+                if pickup[r1] != delivery[r2]:
+                    pairs.add((pickup[r1], delivery[r2]))
+
+    return sorted(pairs)
+
+
+def pairing_groups(instance):
+    """
+    Paired sets merged where they share a request, as a list of
+    frozensets. Every pickup of a group precedes every delivery of it.
+    """
+    groups = []
+    for group in instance["paired_sets"]:
+        group = set(group)
+        for other in [g for g in groups if g & group]:
+            group |= other
+            groups.remove(other)
+        groups.append(group)
+    return [frozenset(g) for g in groups]
+
+
+
+# ============================================================
+# Helper 3: arc-compatibility bitmap
+# ============================================================
+
+def _arc_bitmap(instance, T, index, earliest, latest):
+    """
+    compat[i] has bit j set when V[j] can directly follow V[i].
+
+    An arc is ruled out if:
+    - it enters the start depot (unless it closes the route at
+      e == s) or leaves the end depot
+    - it is a self-loop on a node used by only one request
+    - even leaving i as early as possible reaches j after latest[j]
+    - it goes straight from d(r) to p(r) for a request whose nodes
+      are not shared with any other request
+    """
+    V = instance["V"]
+    service = instance["service"]
+    s = instance["s"]
+    e = instance["e"]
+
+    uses = _node_uses(instance)
+    forbidden = _reverse_precedence_arcs(instance, uses)
+
+    compat = []
+    for i in V:
+        i_idx = index[i]
+        row = T[i_idx]
+        depart = earliest[i] + service[i]
+        bits = 0
+
+        if i != e or e == s:
+            for j in V:
+                if (j == s and (j != e or i == s)) or (j == i and uses.get(i, 0) < 2):
+                    continue
+                j_idx = index[j]
+                if depart + row[j_idx] > latest[j]:
+                    continue
+                if (i, j) in forbidden:
+                    continue
+                bits |= 1 << j_idx
+
+        compat.append(bits)
+
+    return compat
+
+
+def _node_uses(instance):
+    """
+    Number of request visits (pickups + deliveries) at each node.
+    """
+    pickup = instance["pickup"]
+    delivery = instance["delivery"]
+
+    uses = {}
+    for r in instance["R"]:
+        uses[pickup[r]] = uses.get(pickup[r], 0) + 1
+        uses[delivery[r]] = uses.get(delivery[r], 0) + 1
+
+    return uses
+
+
+def _reverse_precedence_arcs(instance, uses):
+    pickup = instance["pickup"]
+    delivery = instance["delivery"]
+
+    forbidden = set()
+    for r in instance["R"]:
+        p = pickup[r]
+        d = delivery[r]
+        if p != d and uses[p] == 1 and uses[d] == 1:
+            forbidden.add((d, p))
+
+    return forbidden
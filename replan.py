@@ -0,0 +1,312 @@
+# -------------------------------------------------------------
+# Warm-start re-optimization for live dispatch
+#
+# REPLAN(instance, route, add, cancel, position, now):
+#     freeze route[0..position]            // already executed
+#
+#     remove p(r), d(r) of every r in cancel from the unexecuted part,
+#     all at once (one at a time, the first removal would block the
+#     deliveries of the rest of a paired set)
+#     (if p(r) was executed, d(r) stays: the load is on board)
+#
+#     state = BUILD_STATE(route)
+#     while add is not empty:
+#         choose (r, posP, posD) with the smallest feasible Δcost,
+#         checked incrementally against state
+#         insert p(r), d(r);  refresh state from posP
+#
+#     2-opt restricted to the positions touched above (± window)
+#     merge consecutive unexecuted stops at one node (shared nodes)
+#     return route, rejected requests
+#
+# The instance passed in must already contain the new requests
+# (nodes in V, rows in c/T, windows, service). A cancelled request
+# still counts in its paired sets: cancel whole sets, or drop it from
+# instance["paired_sets"] first.
+# -------------------------------------------------------------
+
+from distance import total_distance
+from preprocessing import precedence_pairs
+from visits import merge_colocated, remove_requests, route_scope, serve, serves_all, shared_nodes
+from route_state import (
+    build_state,
+    refresh,
+    time_feasible,
+    pair_insertion_ok,
+    insertion_time_ok,
+    reversal_time_ok,
+    group_bounds,
+)
+
+
+def REPLAN(instance, route, add=(), cancel=(), position=None, now=None, window=3):
+    """
+    Update an existing feasible route with a diff of requests.
+
+    add       requests to insert (ids in instance["R"])
+    cancel    requests to remove
+    position  index of the last executed stop (default: only the
+              start depot is fixed)
+    now       current time at that stop
+    window    extra positions on each side of the changed region
+              that the local 2-opt may touch
+
+    Returns (route, rejected), where rejected lists the added
+    requests that had no feasible insertion.
+    """
+    print("\n=== TRACE: Replan ===")
+    print("Current route:", route)
+    print("Add:", list(add), " Cancel:", list(cancel))
+
+    frozen = 1 if position is None else position + 1
+    route = list(route)
+
+    # ---- Removals ----
+    lo, hi = len(route), -1
+    removed = _remove_requests(route, cancel, instance, frozen)
+    if removed is not None:
+        lo, hi = removed
+
+    state = build_state(route, instance, frozen, now)
+
+    # ---- Insertions ----
+    pending = [r for r in add]
+    rejected = []
+
+    while pending:
+        best = _best_insertion(state, instance, pending, frozen)
+
+        if best is None:
+            rejected = sorted(pending)
+            print("No feasible insertion for:", rejected)
+            break
+
+        delta, r, a, b = best
+        _insert_request(state, instance, r, a, b)
+        pending.remove(r)
+        print(f"Inserted r={r} after positions ({a}, {b})  |  Δcost = {delta:.3f}")
+
+        lo = min(lo, a + 1)
+        hi = max(hi, b + 2)
+        hi = min(hi, len(state["route"]) - 1)
+
+    # ---- Local 2-opt around the changes ----
+    if hi >= 0:
+        lo = max(frozen - 1, min(lo, len(state["route"]) - 1) - window)
+        hi = min(len(state["route"]) - 1, hi + window)
+        local_two_opt(state, instance, lo, hi)
+
+    # ---- Co-located stops ----
+    state = _merge_stops(state, instance, frozen, now)
+
+    print("Replanned route:", state["route"])
+    return state["route"], rejected
+
+
+
+# ============================================================
+# Helper 1: removal of cancelled requests
+# ============================================================
+
+def _remove_requests(route, cancel, instance, frozen):
+    """
+    Remove the unexecuted stops of the cancelled requests in place
+    (stops shared with other requests stay). Returns the positions
+    of the first and the last gap in the new route, or None if
+    nothing was removed.
+    """
+    picked = serve(route, instance)["pickup"]
+    # already on board: the delivery has to stay
+    requests = {r for r in cancel if r in picked and picked[r] >= frozen}
+    if not requests:
+        return None
+
+    kept = remove_requests(route, instance, requests, lo=frozen)
+    if len(kept) == len(route):
+        return None
+
+    first = next((k for k, v in enumerate(kept) if v != route[k]), len(kept))
+    last = len(kept) - next(
+        (k for k, (v, w) in enumerate(zip(reversed(kept), reversed(route))) if v != w), len(kept)
+    )
+    route[:] = kept
+    return first, last
+
+
+
+# ============================================================
+# Helper 2: best incremental insertion
+# ============================================================
+
+def _best_insertion(state, instance, pending, frozen):
+    """
+    Cheapest feasible (Δcost, r, posP, posD) over all pending
+    requests, using the cached state for every time check.
+    """
+    route = state["route"]
+    index = state["index"]
+    c = instance["c"]
+
+    last = len(route) - 1
+    if instance["e"] is not None and route[-1] == instance["e"]:
+        last -= 1
+
+    bounds = group_bounds(route, instance)
+    groups = {r: [frozenset(g) for g in instance["paired_sets"] if r in g] for r in pending}
+    # with shared nodes the new stops can take over (or block) visits
+    # of existing stops at the same node
+    shared = shared_nodes(instance)
+
+    def arc(i, j):
+        return c[index[i]][index[j]]
+
+    def detour(pos, node):
+        if pos + 1 < len(route):
+            return arc(route[pos], node) + arc(node, route[pos + 1]) - arc(route[pos], route[pos + 1])
+        return arc(route[pos], node)
+
+    best = None
+
+    for r in pending:
+        p = instance["pickup"][r]
+        d = instance["delivery"][r]
+
+        # paired sets: p before every delivery, d after every pickup
+        max_a = last
+        min_b = frozen - 1
+        for g in groups[r]:
+            last_pick, first_deliv = bounds[g]
+            max_a = min(max_a, first_deliv - 1)
+            min_b = max(min_b, last_pick)
+
+        d_detour = [detour(b, d) for b in range(last + 1)]
+        if shared:
+            scope, scope_groups = route_scope(route, instance, [r])
+
+        for a in range(frozen - 1, max_a + 1):
+            # p -> route[a+1] only exists when d is not placed right
+            # after p, so a failed check here only rules out b > a
+            if insertion_time_ok(state, instance, a, p) is None:
+                b_range = range(a, a + 1) if min_b <= a else range(0)
+            else:
+                b_range = range(max(a, min_b), last + 1)
+
+            p_detour = detour(a, p)
+
+            for b in b_range:
+                if b == a:
+                    if a + 1 < len(route):
+                        delta = (arc(route[a], p) + arc(p, d) + arc(d, route[a + 1])
+                                 - arc(route[a], route[a + 1]))
+                    else:
+                        delta = arc(route[a], p) + arc(p, d)
+                else:
+                    delta = p_detour + d_detour[b]
+
+                if best is not None and delta >= best[0]:
+                    continue
+
+                if not pair_insertion_ok(state, instance, a, b, p, d, r):
+                    continue
+                if shared and not serves_all(
+                        route[:a + 1] + [p] + route[a + 1:b + 1] + [d] + route[b + 1:],
+                        instance, scope, scope_groups):
+                    continue
+                best = (delta, r, a, b)
+
+    return best
+
+
+def _insert_request(state, instance, r, a, b):
+    route = state["route"]
+    route.insert(b + 1, instance["delivery"][r])
+    route.insert(a + 1, instance["pickup"][r])
+    refresh(state, instance, a + 1)
+
+
+
+# ============================================================
+# 2-opt restricted to [lo, hi]
+# ============================================================
+
+def local_two_opt(state, instance, lo, hi):
+    """
+    Same move as _two_opt_phase, but only segments inside [lo, hi]
+    are reversed and every check uses the cached state.
+    """
+    route = state["route"]
+    index = state["index"]
+    c = instance["c"]
+
+    must_follow = {}
+    for p, d in precedence_pairs(instance):
+        must_follow.setdefault(d, set()).add(p)
+
+    # with shared nodes a reversal can move visits between stops
+    scope = route_scope(route, instance) if shared_nodes(instance) else None
+
+    def arc(i, j):
+        return c[index[i]][index[j]]
+
+    improved = True
+    while improved:
+        improved = False
+
+        for i in range(lo, min(hi, len(route) - 3) + 1):
+            # grow the segment route[i+1..j] one node at a time, keeping
+            # its forward / reversed internal cost and its node set
+            nodes = {route[i + 1]}
+            old = new = 0
+
+            for j in range(i + 2, min(hi, len(route) - 2) + 1):
+                # a node that must follow one already in the segment
+                # would be moved in front of it, for this j and beyond
+                if must_follow.get(route[j], set()) & nodes:
+                    break
+                nodes.add(route[j])
+                old += arc(route[j - 1], route[j])
+                new += arc(route[j], route[j - 1])
+
+                delta = (arc(route[i], route[j]) + arc(route[i + 1], route[j + 1]) + new
+                         - arc(route[i], route[i + 1]) - arc(route[j], route[j + 1]) - old)
+
+                if delta >= 0:
+                    continue
+
+                if not reversal_time_ok(state, instance, i, j):
+                    continue
+                if scope is not None and not serves_all(
+                        route[:i + 1] + route[i + 1:j + 1][::-1] + route[j + 1:], instance, *scope):
+                    continue
+
+                print(f"Local improvement: reverse {i+1}..{j}  → Δ = {-delta:.3f}")
+                route[i + 1:j + 1] = route[i + 1:j + 1][::-1]
+                refresh(state, instance, i + 1)
+                improved = True
+                break
+            if improved:
+                break
+
+    print("Local 2-opt cost:", total_distance(route, c, instance.get("V")))
+
+
+
+# ============================================================
+# Co-located stops
+# ============================================================
+
+def _merge_stops(state, instance, frozen, now):
+    """
+    State of the route with consecutive unexecuted stops at one node
+    merged, if that stays on time; state itself otherwise.
+    """
+    route = state["route"]
+    merged = route[:frozen] + merge_colocated(route[frozen - 1:])[1:]
+    if len(merged) == len(route):
+        return state
+
+    merged_state = build_state(merged, instance, frozen, now)
+    if not time_feasible(merged_state, instance):
+        return state
+    print("Merged co-located stops:", merged)
+    return merged_state
@@ -0,0 +1,175 @@
+# -------------------------------------------------------------
+# Travel matrices from a road network
+#
+# Edge list file, one directed edge per line (# starts a comment):
+#
+#     <from> <to> <distance> [<time>]
+#
+# (time defaults to distance). Add both directions for two-way roads.
+#
+# BUILD_MATRICES(graph, V):
+#     for each source u in V (in parallel across processes):
+#         DIJKSTRA from u on the chosen weight, tracking both the
+#         distance and the time of the path found
+#         stop as soon as every node of V is settled
+#         row u of c = path distances, row u of T = path times
+#
+# Rows are written straight into flat row-major arrays of length
+# n*n (same layout as instance_compile), so the result can be
+# compiled without going through nested lists.
+# -------------------------------------------------------------
+
+import heapq
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+
+def load_edge_list(path):
+    """
+    Read an edge list file into an adjacency dictionary:
+        node -> list of (neighbour, distance, time)
+    """
+    graph = {}
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            u, v = _node(parts[0]), _node(parts[1])
+            dist = float(parts[2])
+            time = float(parts[3]) if len(parts) > 3 else dist
+            graph.setdefault(u, []).append((v, dist, time))
+            graph.setdefault(v, [])
+    return graph
+
+
+def build_matrices(graph, V, weight="time", workers=None):
+    """
+    Shortest-path matrices between the nodes of V.
+
+    graph    adjacency dictionary from load_edge_list(), or a path
+             to an edge list file
+    weight   "time" (fastest paths) or "distance" (shortest paths);
+             c and T both describe the same chosen path
+    workers  process count (default: os.cpu_count()); 1 runs inline
+
+    Returns {"n": n, "c": array("d"), "T": array("d")}, flat
+    row-major; unreachable pairs are float("inf").
+    """
+    if isinstance(graph, str):
+        graph = load_edge_list(graph)
+
+    V = list(V)
+    n = len(V)
+    c = array("d", [0.0]) * (n * n)
+    T = array("d", [0.0]) * (n * n)
+
+    workers = workers or os.cpu_count() or 1
+    chunks = [V[k::workers] for k in range(workers) if V[k::workers]]
+
+    if workers == 1 or n < 2 * workers:
+        results = [_rows(graph, V, V, weight)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(graph, V, weight)
+        ) as pool:
+            results = list(pool.map(_worker_rows, chunks))
+
+    index = {v: idx for idx, v in enumerate(V)}
+    for rows in results:
+        for u, dist_row, time_row in rows:
+            base = index[u] * n
+            c[base:base + n] = dist_row
+            T[base:base + n] = time_row
+
+    return {"n": n, "c": c, "T": T}
+
+
+def nested(flat, n):
+    """
+    Nested-list view of a flat matrix, for the instance dictionary.
+    """
+    return [list(flat[i * n:(i + 1) * n]) for i in range(n)]
+
+
+
+# ============================================================
+# Helper 1: single-source Dijkstra with early termination
+# ============================================================
+
+def _dijkstra(graph, source, targets, weight):
+    """
+    Returns {target: (distance, time)} along the best path by weight.
+    Stops once every target has been settled.
+    """
+    by_time = weight == "time"
+    remaining = set(targets)
+    found = {}
+
+    best = {source: 0.0}
+    heap = [(0.0, 0.0, 0.0, source)]       # (key, distance, time, node)
+    settled = set()
+
+    while heap and remaining:
+        key, dist, time, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        settled.add(u)
+
+        if u in remaining:
+            remaining.discard(u)
+            found[u] = (dist, time)
+
+        for v, d_uv, t_uv in graph.get(u, ()):
+            if v in settled:
+                continue
+            nd = dist + d_uv
+            nt = time + t_uv
+            nk = nt if by_time else nd
+            if nk < best.get(v, float("inf")):
+                best[v] = nk
+                heapq.heappush(heap, (nk, nd, nt, v))
+
+    return found
+
+
+def _rows(graph, V, sources, weight):
+    inf = float("inf")
+    rows = []
+    for u in sources:
+        found = _dijkstra(graph, u, V, weight)
+        dist_row = array("d", [found.get(v, (inf, inf))[0] for v in V])
+        time_row = array("d", [found.get(v, (inf, inf))[1] for v in V])
+        rows.append((u, dist_row, time_row))
+    return rows
+
+
+
+# ============================================================
+# Helper 2: process-pool workers
+# ============================================================
+#
+# The graph is sent once per worker through the pool initializer,
+# not once per task.
+# ------------------------------------------------------------
+
+_WORKER = {}
+
+
+def _init_worker(graph, V, weight):
+    _WORKER["graph"] = graph
+    _WORKER["V"] = V
+    _WORKER["weight"] = weight
+
+
+def _worker_rows(sources):
+    return _rows(_WORKER["graph"], _WORKER["V"], sources, _WORKER["weight"])
+
+
+def _node(text):
+    try:
+        return int(text)
+    except ValueError:
+        return text
@@ -0,0 +1,148 @@
+# -------------------------------------------------------------
+# Memo of feasibility / cost results for trial routes
+#
+# The construction and 2-opt phases build many trial routes that
+# differ from the current route by one insertion, two insertions or
+# one reversed segment, and the same trial routes come back after
+# every accepted move. Results are memoized under a route hash that
+# can be computed for each trial in O(1) from the current route.
+#
+# Route hash (Zobrist keys, combined by position):
+#     key[v]   = random 64-bit key per node
+#     H(route) = SUM key[r_m] * B^m                   (mod 2^64, B odd)
+#
+# HASHES(route):                                      // once per route, O(n)
+#     F[k] = SUM_{m<k} key[r_m] * B^m
+#     R[k] = SUM_{m<k} key[r_m] * B^-m
+#
+# Trial hashes, O(1) each:
+#     insert x at i:          F[i] + key[x]*B^i + B*(F[n] - F[i])
+#     insert p at i, d at j:  F[i] + key[p]*B^i + B*(F[j-1] - F[i])
+#                             + key[d]*B^j + B^2*(F[n] - F[j-1])
+#     reverse a..b:           F[a] + B^(a+b)*(R[b+1] - R[a]) + F[n] - F[b+1]
+#
+# MEMO: (hash, length) -> result, least recently used entry evicted
+# once max_entries is reached; hits / misses are counted.
+# -------------------------------------------------------------
+
+import random
+from collections import OrderedDict
+
+
+_MASK = (1 << 64) - 1
+
+
+def new_memo(instance, max_entries=100000, seed=0):
+    """
+    Empty memo for routes over the nodes of instance.
+    """
+    rng = random.Random(seed)
+    base = rng.getrandbits(64) | 1
+
+    return {
+        "key": {v: rng.getrandbits(64) for v in instance["V"]},
+        "base": base,
+        "pow": [1],
+        "inv_pow": [1],
+        "inv": pow(base, -1, 1 << 64),
+        "entries": OrderedDict(),
+        "max_entries": max_entries,
+        "hits": 0,
+        "misses": 0,
+    }
+
+
+def route_hashes(memo, route):
+    """
+    Prefix hashes of route, the starting point for trial hashes.
+    """
+    n = len(route)
+    _grow_powers(memo, n + 2)
+
+    key = memo["key"]
+    P, Q = memo["pow"], memo["inv_pow"]
+
+    F = [0] * (n + 1)
+    R = [0] * (n + 1)
+    for m, v in enumerate(route):
+        F[m + 1] = (F[m] + key[v] * P[m]) & _MASK
+        R[m + 1] = (R[m] + key[v] * Q[m]) & _MASK
+
+    return {"F": F, "R": R, "n": n}
+
+
+def hash_route(memo, route):
+    return route_hashes(memo, route)["F"][-1], len(route)
+
+
+def insertion_hash(memo, hashes, i, x):
+    """
+    Hash of the route after route.insert(i, x).
+    """
+    F, n = hashes["F"], hashes["n"]
+    P = memo["pow"]
+    h = F[i] + memo["key"][x] * P[i] + P[1] * (F[n] - F[i])
+    return h & _MASK, n + 1
+
+
+def pair_insertion_hash(memo, hashes, i, p, j, d):
+    """
+    Hash of the route after route.insert(i, p); route.insert(j, d)
+    with j > i.
+    """
+    F, n = hashes["F"], hashes["n"]
+    P = memo["pow"]
+    key = memo["key"]
+    h = (F[i] + key[p] * P[i] + P[1] * (F[j - 1] - F[i])
+         + key[d] * P[j] + P[2] * (F[n] - F[j - 1]))
+    return h & _MASK, n + 2
+
+
+def reversal_hash(memo, hashes, a, b):
+    """
+    Hash of the route with positions a..b (inclusive) reversed.
+    """
+    F, R, n = hashes["F"], hashes["R"], hashes["n"]
+    h = F[a] + memo["pow"][a + b] * (R[b + 1] - R[a]) + F[n] - F[b + 1]
+    return h & _MASK, n
+
+
+def memo_get(memo, route_key):
+    """
+    Stored result for route_key, or None.
+    """
+    entries = memo["entries"]
+    value = entries.get(route_key)
+    if value is None:
+        memo["misses"] += 1
+        return None
+    entries.move_to_end(route_key)
+    memo["hits"] += 1
+    return value
+
+
+def memo_put(memo, route_key, value):
+    entries = memo["entries"]
+    entries[route_key] = value
+    entries.move_to_end(route_key)
+    if len(entries) > memo["max_entries"]:
+        entries.popitem(last=False)
+
+
+def memo_stats(memo):
+    total = memo["hits"] + memo["misses"]
+    rate = memo["hits"] / total if total else 0.0
+    return f"hits={memo['hits']} misses={memo['misses']} hit rate={rate:.1%} entries={len(memo['entries'])}"
+
+
+
+# ============================================================
+# Helper: powers of B and B^-1 mod 2^64
+# ============================================================
+
+def _grow_powers(memo, length):
+    P, Q = memo["pow"], memo["inv_pow"]
+    base, inv = memo["base"], memo["inv"]
+    while len(P) < 2 * length:
+        P.append((P[-1] * base) & _MASK)
+        Q.append((Q[-1] * inv) & _MASK)
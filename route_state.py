@@ -0,0 +1,513 @@
+# -------------------------------------------------------------
+# Cached route state for incremental feasibility checks
+#
+# For a route r[0..n-1] keep, per position k:
+#
+#     start[k]  = service start time at r[k]  (same as FEASIBLE())
+#     latest[k] = latest service start at r[k] that still lets
+#                 r[k..n-1] meet all their time windows
+#
+# BUILD_STATE(route):
+#     start[0] = max(0, open[r0])
+#     start[k] = max(open[rk], start[k-1] + s[r(k-1)] + T[r(k-1)][rk])
+#
+#     latest[n-1] = close[r(n-1)]
+#     latest[k]   = min(close[rk], latest[k+1] - s[rk] - T[rk][r(k+1)])
+#
+# With these, inserting node x between r[a] and r[a+1] is
+# time-feasible iff
+#     t_x = max(open[x], start[a] + s[ra] + T[ra][x]) <= close[x]
+#     max(open[r(a+1)], t_x + s[x] + T[x][r(a+1)]) <= latest[a+1]
+# so no replay of the route suffix is needed.
+#
+# Positions before state["frozen"] have already been executed and
+# are never moved.
+#
+# Arcs with a time-dependent profile ("T_profile") use the profile's
+# travel time for start[] and its inverse for latest[]; with FIFO
+# profiles both checks above stay exact.
+#
+# Optional ride-time / route-duration limits ("max_ride"[r],
+# "max_duration") are checked on the shifted schedule of schedule.py:
+# the departures from the first stop and the pickups are delayed to
+# remove waiting, as in dial-a-ride scheduling.
+#
+#     shifted[k]   = service start at r[k] after the shifts
+#     ride_room[j] = max_ride[r] - (shifted[j] - shifted[q] - s[q])
+#                    for j delivering r picked up at q
+#     duration_room = max_duration - (shifted[n-1] - shifted[0])
+#
+# Insertion checks first try a cheap sufficient test on the earliest
+# schedule. A delay of δ at position k reaches position j > k as
+# max(0, δ - wait(k+1..j)), so with C[j] = wait(0..j) and the rooms
+# measured on start[] instead of shifted[]:
+#
+#     slack[k] = min over j >= k of C[j] - C[k] + room_j, where
+#                room_j = ride_room[j] if its pickup q < k
+#                         (pickups at or after k move too),
+#                and the duration room at n-1
+#
+# If the route meets every limit on its earliest schedule
+# (state["early_ok"]) and the insertion delays no stop by more than
+# its slack, the trial route meets them on its earliest schedule too,
+# and so on its shifted one (shifts never lengthen a ride or the
+# duration). Otherwise the trial route is replayed with the shifts,
+# so an insertion is only rejected if it is really infeasible.
+# Reversals, and any check on an instance with both limits and
+# T_profile, always replay the route.
+# -------------------------------------------------------------
+
+from schedule import ride_caps, shifted_starts
+from time_dependent import travel, latest_departure
+from visits import remove_requests, serve
+
+
+def build_state(route, instance, frozen=0, now=None):
+    """
+    Build the cached state of a route.
+
+    frozen  number of leading stops that are already executed
+    now     current time at the last executed stop (route[frozen-1]);
+            overrides the computed start time there
+    """
+    state = {
+        "route": list(route),
+        "index": {v: idx for idx, v in enumerate(instance["V"])},
+        "frozen": frozen,
+        "now": now,
+        "start": [],
+        "latest": [],
+    }
+    refresh(state, instance, 0)
+    return state
+
+
+def refresh(state, instance, lo):
+    """
+    Recompute start times from position lo onwards and all latest
+    times after the route changed at position lo.
+    """
+    route = state["route"]
+    n = len(route)
+    start = state["start"]
+    del start[lo:]
+
+    for k in range(lo, n):
+        if k == 0:
+            t = max(0, instance["open"][route[0]])
+        else:
+            t = _next_start(instance, state, route[k - 1], start[k - 1], route[k])
+        if state["now"] is not None and k == state["frozen"] - 1:
+            t = max(t, state["now"])
+        start.append(t)
+
+    close = instance["close"]
+    latest = [0] * n
+    for k in range(n - 1, -1, -1):
+        if k == n - 1:
+            latest[k] = close[route[k]]
+        else:
+            latest[k] = min(
+                close[route[k]],
+                _latest_before(instance, state, route[k], route[k + 1], latest[k + 1]),
+            )
+    state["latest"] = latest
+
+    if _has_limits(instance):
+        _refresh_slack(state, instance)
+
+
+def time_feasible(state, instance):
+    """
+    True if every stop starts service inside its time window, and
+    every ride-time / route-duration limit holds.
+    """
+    close = instance["close"]
+    if not all(t <= close[v] for v, t in zip(state["route"], state["start"])):
+        return False
+    if "ride_room" in state:
+        return all(room >= 0 for room in state["ride_room"]) and state["duration_room"] >= 0
+    return True
+
+
+def route_feasible(route, instance):
+    """
+    Quiet feasibility check with the same rules as FEASIBLE():
+    time windows, pickup before delivery, paired pickups before
+    any delivery of the set (checked for the whole set).
+    """
+    state = build_state(route, instance)
+    return time_feasible(state, instance) and precedence_ok(route, instance)
+
+
+def drop_late_requests(route, instance):
+    """
+    Remove the requests served at the first late stop until every
+    remaining stop meets its window. Returns (route, dropped requests),
+    or None if the start depot itself is late.
+    """
+    route = list(route)
+    dropped = []
+    close = instance["close"]
+
+    while True:
+        state = build_state(route, instance)
+        late = next(
+            (k for k, v in enumerate(route) if state["start"][k] > close[v]),
+            None,
+        )
+        if late is None:
+            return route, dropped
+        if late == 0:
+            return None
+
+        requests = {r for r, _ in serve(route, instance)["stops"][late]}
+        if not requests:
+            # a revisit that serves no one
+            del route[late]
+            continue
+        route = remove_requests(route, instance, requests)
+        dropped += sorted(requests)
+
+
+def precedence_ok(route, instance):
+    """
+    True if no stop skips a delivery that is still open because of
+    precedence or pairing (visits.serve()).
+    """
+    return not serve(route, instance)["blocked"]
+
+
+def violations(route, instance, requests=None):
+    """
+    Everything that makes route infeasible under the rules of
+    route_feasible(), as a report:
+
+        "late"        [(position, node, lateness)]
+        "precedence"  [(position, node, request)]   delivery before pickup,
+                      or (len(route), d(r), r) for a request in requests
+                      left undelivered without a blocked stop
+        "pairing"     [(position, node, request, requests not picked yet)]
+        "ride"        [(position, node, request, excess ride time)]
+        "duration"    excess route duration (0 if within the limit)
+        "lateness"    total lateness
+        "feasible"    True if nothing above is violated
+
+    Service times keep running past a late stop (as in start[]), so
+    lateness carries over to the following stops.
+    """
+    state = build_state(route, instance)
+    close = instance["close"]
+
+    late = [
+        (k, v, t - close[v])
+        for k, (v, t) in enumerate(zip(route, state["start"])) if t > close[v]
+    ]
+
+    served = serve(route, instance)
+    precedence = []
+    pairing = []
+    for k, i, r, missing in served["blocked"]:
+        if r in missing:
+            precedence.append((k, i, r))
+        else:
+            pairing.append((k, i, r, missing))
+    reported = {r for _, _, r, _ in served["blocked"]}
+    for r in sorted(requests or ()):
+        if r not in served["delivery"] and r not in reported:
+            precedence.append((len(route), instance["delivery"][r], r))
+
+    ride = []
+    duration = 0
+    if "ride_room" in state:
+        ride = [
+            (k, route[k], r, -room)
+            for k, rides in enumerate(state["rides"]) for r, _, room in rides if room < 0
+        ]
+        duration = max(0, -state["duration_room"])
+
+    return {
+        "late": late,
+        "precedence": precedence,
+        "pairing": pairing,
+        "ride": ride,
+        "duration": duration,
+        "lateness": sum(amount for _, _, amount in late),
+        "feasible": not (late or precedence or pairing or ride or duration),
+    }
+
+
+
+# ============================================================
+# Incremental insertion checks
+# ============================================================
+
+def insertion_time_ok(state, instance, a, x):
+    """
+    Time check for inserting node x between route[a] and route[a+1].
+    Returns the service start time at x, or None if infeasible.
+    """
+    route = state["route"]
+    t_x = _next_start(instance, state, route[a], state["start"][a], x)
+    if t_x > instance["close"][x]:
+        return None
+
+    fast = "slack" in state and state["early_ok"] and not _replay_needed(instance)
+    if a + 1 < len(route):
+        t_next = _next_start(instance, state, x, t_x, route[a + 1])
+        if t_next > state["latest"][a + 1]:
+            return None
+        if fast and t_next - state["start"][a + 1] > state["slack"][a + 1]:
+            fast = False
+    elif fast and t_x - state["start"][0] > _max_duration(instance):
+        fast = False
+
+    if "slack" in state and not fast:
+        trial = route[:a + 1] + [x] + route[a + 1:]
+        if not _replay_ok(state, instance, trial):
+            return None
+
+    return t_x
+
+
+def pair_insertion_ok(state, instance, a, b, p, d, r=None):
+    """
+    Time check for inserting p after route[a] and d after route[b]
+    (b >= a, original positions; b == a means d directly follows p).
+    r is the request, for its own ride-time limit.
+
+    Start times between the two insertions are pushed forward until
+    the shift is absorbed by waiting, so the work is bounded by the
+    distance between a and b.
+    """
+    route = state["route"]
+    start = state["start"]
+    limits = "slack" in state
+    trial = route[:a + 1] + [p] + route[a + 1:b + 1] + [d] + route[b + 1:]
+
+    if _replay_needed(instance):
+        return _replay_ok(state, instance, trial)
+    # cleared when the cheap limit test fails: replay at the end
+    fast = limits and state["early_ok"]
+
+    t_p = _next_start(instance, state, route[a], start[a], p)
+    if t_p > instance["close"][p]:
+        return False
+
+    if b == a:
+        t_d = _next_start(instance, state, p, t_p, d)
+    else:
+        # propagate the shift through route[a+1..b]
+        prev, t_prev = p, t_p
+        for k in range(a + 1, b + 1):
+            t = _next_start(instance, state, prev, t_prev, route[k])
+            if t > instance["close"][route[k]]:
+                return False
+            if fast and any(q <= a and t - start[k] > room for _, q, room in state["early_rides"][k]):
+                fast = False
+            if t == start[k]:
+                # shift absorbed: the old state is valid from here on
+                prev, t_prev = route[b], start[b]
+                break
+            prev, t_prev = route[k], t
+        t_d = _next_start(instance, state, prev, t_prev, d)
+
+    if t_d > instance["close"][d]:
+        return False
+
+    if fast and r is not None:
+        if t_d - t_p - instance["service"][p] > (instance.get("max_ride") or {}).get(r, _INF):
+            fast = False
+
+    if b + 1 < len(route):
+        t_next = _next_start(instance, state, d, t_d, route[b + 1])
+        if t_next > state["latest"][b + 1]:
+            return False
+        if fast and t_next - start[b + 1] > state["slack"][b + 1]:
+            fast = False
+    elif fast and t_d - start[0] > _max_duration(instance):
+        fast = False
+
+    if limits and not fast:
+        return _replay_ok(state, instance, trial)
+    return True
+
+
+def reversal_time_ok(state, instance, i, j):
+    """
+    Time check for REVERSE_SEGMENT(route, i+1, j): replay only the
+    reversed segment, then compare against latest[j+1]. With ride or
+    duration limits the whole trial route is replayed.
+    """
+    route = state["route"]
+    close = instance["close"]
+
+    if "slack" in state:
+        trial = route[:i + 1] + route[i + 1:j + 1][::-1] + route[j + 1:]
+        return _replay_ok(state, instance, trial)
+
+    prev, t_prev = route[i], state["start"][i]
+    for k in range(j, i, -1):
+        t = _next_start(instance, state, prev, t_prev, route[k])
+        if t > close[route[k]]:
+            return False
+        prev, t_prev = route[k], t
+
+    if j + 1 < len(route):
+        t_next = _next_start(instance, state, prev, t_prev, route[j + 1])
+        if t_next > state["latest"][j + 1]:
+            return False
+
+    return True
+
+
+def group_bounds(route, instance):
+    """
+    For each paired set (as a frozenset): (last pickup position,
+    first delivery position) in the route, -1 / len(route) if absent.
+    """
+    pickup = instance["pickup"]
+    delivery = instance["delivery"]
+    bounds = {}
+
+    for group in instance["paired_sets"]:
+        key = frozenset(group)
+        pick_nodes = {pickup[r] for r in group}
+        deliv_nodes = {delivery[r] for r in group}
+        last_pick = -1
+        first_deliv = len(route)
+        for k, v in enumerate(route):
+            if v in pick_nodes:
+                last_pick = k
+            if v in deliv_nodes and k < first_deliv:
+                first_deliv = k
+        bounds[key] = (last_pick, first_deliv)
+
+    return bounds
+
+
+
+# ============================================================
+# Helper 1: time propagation along one arc
+# ============================================================
+
+def _next_start(instance, state, prev, t_prev, i):
+    """
+    Service start at i when leaving prev after serving it from t_prev.
+    """
+    return max(_arrival(instance, state, prev, t_prev, i), instance["open"][i])
+
+
+def _arrival(instance, state, prev, t_prev, i):
+    depart = t_prev + instance["service"][prev]
+    profiles = instance.get("T_profile")
+    if profiles and (prev, i) in profiles:
+        return depart + travel(profiles[(prev, i)], depart)
+    index = state["index"]
+    return depart + instance["T"][index[prev]][index[i]]
+
+
+def _latest_before(instance, state, i, j, latest_j):
+    """
+    Latest service start at i that still reaches j by latest_j.
+    """
+    profiles = instance.get("T_profile")
+    if profiles and (i, j) in profiles:
+        return latest_departure(profiles[(i, j)], latest_j) - instance["service"][i]
+    index = state["index"]
+    return latest_j - instance["service"][i] - instance["T"][index[i]][index[j]]
+
+
+
+# ============================================================
+# Helper 2: ride-time / route-duration slack
+# ============================================================
+
+_INF = float("inf")
+
+
+def _has_limits(instance):
+    return bool(instance.get("max_ride")) or instance.get("max_duration") is not None
+
+
+def _replay_needed(instance):
+    """
+    Delays do not pass through profiled arcs one to one, so slack is
+    not exact there: replay instead.
+    """
+    return bool(instance.get("T_profile")) and _has_limits(instance)
+
+
+def _max_duration(instance):
+    max_duration = instance.get("max_duration")
+    return _INF if max_duration is None else max_duration
+
+
+def _replay_ok(state, instance, trial):
+    trial_state = build_state(trial, instance, state["frozen"], state["now"])
+    return time_feasible(trial_state, instance)
+
+
+def _refresh_slack(state, instance):
+    route = state["route"]
+    start = state["start"]
+    n = len(route)
+    served = serve(route, instance)
+    # a delivery still waiting for its paired set (partial routes)
+    # rides until the first stop that could serve it
+    unpaired = serve(route, instance, groups={})
+    caps = ride_caps(route, instance, served["pickup"],
+                     {**unpaired["delivery"], **served["delivery"]})
+    max_duration = instance.get("max_duration")
+
+    # cumulative waiting C[k]
+    C = [0] * n
+    for k in range(1, n):
+        arrive = _arrival(instance, state, route[k - 1], start[k - 1], route[k])
+        C[k] = C[k - 1] + max(0, start[k] - arrive)
+
+    # rides ending at each stop on the earliest schedule:
+    # (request, pickup position, room)
+    early_rides = [[] for _ in range(n)]
+    for r, q, j, cap in caps:
+        early_rides[j].append((r, q, cap - (start[j] - start[q])))
+
+    early_duration = _INF
+    if max_duration is not None and n:
+        early_duration = max_duration - (start[-1] - start[0])
+
+    # best[k] = min over j >= k of C[j] + room_j, for rooms that apply at k
+    best = [_INF] * n
+    if n:
+        best[n - 1] = C[n - 1] + early_duration
+        for k in range(n - 2, 0, -1):
+            best[k] = best[k + 1]
+    for j in range(n):
+        for _, q, room in early_rides[j]:
+            value = C[j] + room
+            for k in range(q + 1, j + 1):
+                if value < best[k]:
+                    best[k] = value
+
+    # the limits themselves hold on the shifted schedule
+    shifted = shifted_starts(route, instance, start, state["index"], caps, state["frozen"])
+    rides = [[] for _ in range(n)]
+    ride_room = [_INF] * n
+    for r, q, j, cap in caps:
+        room = cap - (shifted[j] - shifted[q])
+        rides[j].append((r, q, room))
+        ride_room[j] = min(ride_room[j], room)
+
+    duration_room = _INF
+    if max_duration is not None and n:
+        duration_room = max_duration - (shifted[-1] - shifted[0])
+
+    state["shifted"] = shifted
+    state["ride_room"] = ride_room
+    state["rides"] = rides
+    state["duration_room"] = duration_room
+    state["early_rides"] = early_rides
+    state["early_ok"] = early_duration >= 0 and all(
+        room >= 0 for stop in early_rides for _, _, room in stop
+    )
+    state["slack"] = [best[k] - C[k] for k in range(n)]
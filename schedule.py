@@ -0,0 +1,160 @@
+# -------------------------------------------------------------
+# Dial-a-ride start-time shifts (forward slack)
+#
+# The earliest-start schedule of FEASIBLE() leaves as early as it
+# can and waits wherever a window is not open yet. Waiting before a
+# delivery counts against that request's ride time, waiting anywhere
+# counts against the route duration. Delaying the departure from the
+# first stop and from the pickups removes such waiting without
+# breaking a window:
+#
+# SHIFT(B):                              // B = earliest starts
+#     for i in 0, then every pickup position, in route order:
+#         F_i = min over j >= i of  W(i+1..j) + room_j
+#               room_j = min(close[j] - B[j],
+#                            cap(r) - (B[j] - B[q]) for every ride
+#                            q -> j of request r with q < i)
+#         delay B[i] by min(F_i, W(i+1..n-1)), if positive
+#         recompute B after i (stops once the delay is absorbed)
+#
+# where W(a..b) is the waiting at positions a..b and a ride from q to
+# j must satisfy B[j] - B[q] <= cap(r) = max_ride[r] + s[p(r)].
+#
+# A delay never exceeds the waiting after i, so the last stop does
+# not move, the route duration can only shrink, and rides that start
+# at or after i can only get shorter. Rides already under way are
+# kept within their limit by room_j. So every ride and the duration
+# are at most what they were on the earliest schedule.
+#
+# With travel-time profiles a delay does not pass through an arc one
+# to one; a shift is then replayed exactly and undone if it breaks a
+# window or a ride / duration limit that held before.
+#
+# Worst case O(n^2): one O(n) scan per pickup.
+# -------------------------------------------------------------
+
+from time_dependent import travel
+
+
+def shifted_starts(route, instance, start, index, rides, frozen=0):
+    """
+    Service starts after the forward-slack shifts.
+
+    start   earliest service starts of route (not modified)
+    index   node id -> matrix position
+    rides   [(r, q, j, cap)] from ride_caps(): the ride of request r
+            from position q to position j must satisfy
+            start[j] - start[q] <= cap
+    frozen  positions before this one are executed and never move
+    """
+    n = len(route)
+    B = list(start)
+    if n < 2:
+        return B
+
+    open_tw = instance["open"]
+    close_tw = instance["close"]
+    profiled = bool(instance.get("T_profile"))
+
+    def arrive(k, t_prev):
+        return arrival(instance, index, route[k - 1], t_prev, route[k])
+
+    ends = [[] for _ in range(n)]
+    for _, q, j, cap in rides:
+        ends[j].append((q, cap))
+
+    shiftable = ([0] if frozen == 0 else []) + [
+        i for i in pickup_positions(route, instance) if i >= max(frozen, 1)
+    ]
+
+    for i in shiftable:
+        # forward slack of i and the waiting after it
+        slack = close_tw[route[i]] - B[i]
+        for q, cap in ends[i]:
+            if q < i:
+                slack = min(slack, cap - (B[i] - B[q]))
+        waiting = 0
+        for p in range(i + 1, n):
+            waiting += B[p] - arrive(p, B[p - 1])
+            room = close_tw[route[p]] - B[p]
+            for q, cap in ends[p]:
+                if q < i:
+                    room = min(room, cap - (B[p] - B[q]))
+            slack = min(slack, waiting + room)
+
+        delay = min(slack, waiting)
+        if delay <= 0:
+            continue
+
+        before = B[i:]
+        B[i] += delay
+        for p in range(i + 1, n):
+            t = max(open_tw[route[p]], arrive(p, B[p - 1]))
+            if t == B[p]:
+                break               # absorbed: the rest is unchanged
+            B[p] = t
+
+        if profiled and _worse(route, instance, B, before, i, rides):
+            B[i:] = before
+
+    return B
+
+
+def ride_caps(route, instance, pickup_at, delivery_at):
+    """
+    [(r, q, j, cap)] for every request r with a ride limit, picked up
+    at position q = pickup_at[r] and delivered at j = delivery_at[r].
+    """
+    max_ride = instance.get("max_ride") or {}
+    service = instance["service"]
+    return [
+        (r, pickup_at[r], j, max_ride[r] + service[route[pickup_at[r]]])
+        for r, j in sorted(delivery_at.items()) if r in max_ride and r in pickup_at
+    ]
+
+
+def pickup_positions(route, instance):
+    """
+    Positions of route at a pickup node.
+    """
+    nodes = set(instance["pickup"].values())
+    return [k for k, v in enumerate(route) if v in nodes]
+
+
+def arrival(instance, index, prev, t_prev, i):
+    """
+    Arrival at i when service at prev starts at t_prev.
+    """
+    depart = t_prev + instance["service"][prev]
+    profiles = instance.get("T_profile")
+    if profiles and (prev, i) in profiles:
+        return depart + travel(profiles[(prev, i)], depart)
+    return depart + instance["T"][index[prev]][index[i]]
+
+
+
+# ============================================================
+# Helper: exact check of a shift over profiled arcs
+# ============================================================
+
+def _worse(route, instance, B, before, i, rides):
+    """
+    True if the shift at i broke a window, or a ride or the duration
+    limit that held before it.
+    """
+    close_tw = instance["close"]
+    if any(B[p] > close_tw[route[p]] for p in range(i, len(route))):
+        return True
+
+    def old(k):
+        return before[k - i] if k >= i else B[k]
+
+    for _, q, j, cap in rides:
+        if B[j] - B[q] > cap and old(j) - old(q) <= cap:
+            return True
+
+    max_duration = instance.get("max_duration")
+    if max_duration is not None:
+        if B[-1] - B[0] > max_duration and old(len(B) - 1) - old(0) <= max_duration:
+            return True
+    return False
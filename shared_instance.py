@@ -0,0 +1,246 @@
+# -------------------------------------------------------------
+# Shared-memory instance broadcasting for process pools
+#
+# Submitting PDP_GREEDY_INSERT_2OPT(instance) to a process pool
+# pickles the whole instance, O(n^2) nested lists c and T included,
+# for every task. Instead:
+#
+# PUBLISH(instance):                               // parent, once
+#     compiled = COMPILE(instance)                 // instance_compile.py
+#     one SharedMemory block:
+#         [ JSON metadata | c | T | service | open | close | pickup | ... ]
+#         metadata = instance_to_json() without c and T, plus the
+#                    compiled ids (V, requests, s, e, groups)
+#         every array 8-byte aligned, c stored once if c is T
+#     handle = {block name, size, (typecode, offset, count) per array}
+#                                                  // same size for any n
+#
+# ATTACH(handle):                                  // worker, once per process
+#     open the block by name, cast memoryviews over it (zero copy)
+#     instance:  c[i], T[i] = views of row i of the flat matrices
+#                windows, service, requests from the metadata
+#     cached by block name, so every later task only looks it up
+#
+# RELEASE(handle):                                 // parent
+#     close and unlink the block
+#
+# MAP_SHARED(fn, instance, tasks) publishes, runs fn(instance, task)
+# for every task in a process pool where each task carries only the
+# handle and the task, and releases the block when the pool is done,
+# even on errors.
+#
+# Distances from attached rows come back as floats (like the typed
+# rows of memory_budget.compact_instance).
+#
+# Every process closes its mappings at exit. A forked child drops the
+# entries it inherited from its parent (the publisher's block among
+# them) and attaches on its own.
+# -------------------------------------------------------------
+
+import atexit
+import json
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+from instance_compile import compile_instance
+from instance_json import instance_from_json, instance_to_json
+
+
+_ARRAYS = ("c", "T", "service", "open", "close",
+           "pickup", "delivery", "pickup_of", "delivery_of", "group_start", "group_list",
+           "max_ride")
+
+# block name -> {"block", "instance", "compiled"} in this process
+_ATTACHED = {}
+
+# released blocks whose views are still in use (see _close)
+_LINGERING = []
+
+
+def publish_instance(instance):
+    """
+    Copy instance into a new shared memory block. Returns the handle
+    workers pass to attach_instance(); the caller must release it
+    (release_instance(), or use shared_instance()).
+    """
+    compiled = compile_instance(instance)
+
+    meta = json.dumps({
+        "instance": instance_to_json(dict(instance, c=None, T=None)),
+        "compiled": {name: compiled[name] for name in
+                     ("V", "requests", "s", "e", "groups", "max_duration",
+                      "time_dependent", "shared_nodes")},
+    }).encode()
+
+    layout = {}
+    offset = _aligned(len(meta))
+    for name in _ARRAYS:
+        if name == "T" and instance["T"] is instance["c"]:
+            layout["T"] = layout["c"]
+            continue
+        arr = compiled[name]
+        layout[name] = (arr.typecode, offset, len(arr))
+        offset = _aligned(offset + len(arr) * arr.itemsize)
+
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    try:
+        block.buf[:len(meta)] = meta
+        for name in _ARRAYS:
+            if name == "T" and layout["T"] is layout["c"]:
+                continue
+            arr = compiled[name]
+            typecode, start, count = layout[name]
+            block.buf[start:start + count * arr.itemsize] = memoryview(arr).cast("B")
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+
+    handle = {
+        "name": block.name,
+        "size": offset,
+        "meta": (0, len(meta)),
+        "n": compiled["n"],
+        "arrays": layout,
+    }
+    # the creating process keeps its mapping open until release
+    _ATTACHED[block.name] = {"block": block, "instance": None, "compiled": None}
+    return handle
+
+
+def attach_instance(handle):
+    """
+    Instance dictionary over the shared block (cached per process).
+    c and T are lists of zero-copy row views.
+    """
+    entry = _attach(handle)
+    if entry["instance"] is None:
+        n = handle["n"]
+        compiled = attach_compiled(handle)
+        instance = instance_from_json(_meta(entry, handle)["instance"])
+        instance["c"] = _rows(compiled["c"], n)
+        instance["T"] = instance["c"] if compiled["T"] is compiled["c"] else _rows(compiled["T"], n)
+        entry["instance"] = instance
+    return entry["instance"]
+
+
+def attach_compiled(handle):
+    """
+    compile_instance() result over the shared block (cached per
+    process): the flat arrays are zero-copy memoryviews.
+    """
+    entry = _attach(handle)
+    if entry["compiled"] is None:
+        compiled = dict(_meta(entry, handle)["compiled"], n=handle["n"])
+        compiled["index"] = {v: idx for idx, v in enumerate(compiled["V"])}
+        views = {}
+        for name, (typecode, start, count) in handle["arrays"].items():
+            key = (start, typecode)
+            if key not in views:
+                size = count * _itemsize(typecode)
+                views[key] = entry["block"].buf[start:start + size].cast(typecode)
+            compiled[name] = views[key]
+        entry["compiled"] = compiled
+    return entry["compiled"]
+
+
+def release_instance(handle):
+    """
+    Close this process's mapping and unlink the block. Call once, in
+    the publishing process, after the workers are done. Instances
+    attached in this process stay readable until they are dropped.
+    """
+    entry = _ATTACHED.pop(handle["name"], None)
+    if entry is None:
+        block = shared_memory.SharedMemory(name=handle["name"])
+    else:
+        block = entry["block"]
+    _close(block)
+    block.unlink()
+
+
+@contextmanager
+def shared_instance(instance):
+    """
+    with shared_instance(instance) as handle: ...   (released on exit)
+    """
+    handle = publish_instance(instance)
+    try:
+        yield handle
+    finally:
+        release_instance(handle)
+
+
+def map_shared(fn, instance, tasks, workers=None):
+    """
+    [fn(instance, task) for task in tasks], run in a process pool
+    that receives the instance once through shared memory. fn must be
+    a module-level function (it is pickled by reference).
+    """
+    tasks = list(tasks)
+    with shared_instance(instance) as handle:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_run_task, [(fn, handle, task) for task in tasks]))
+
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def _run_task(job):
+    fn, handle, task = job
+    return fn(attach_instance(handle), task)
+
+
+def _attach(handle):
+    entry = _ATTACHED.get(handle["name"])
+    if entry is None:
+        block = shared_memory.SharedMemory(name=handle["name"])
+        entry = _ATTACHED[handle["name"]] = {"block": block, "instance": None, "compiled": None}
+    return entry
+
+
+def _detach_all():
+    # drop the cached views first, or closing the mapping fails when
+    # a worker shuts down
+    while _ATTACHED:
+        _, entry = _ATTACHED.popitem()
+        entry["instance"] = entry["compiled"] = None
+        _close(entry["block"])
+
+
+atexit.register(_detach_all)
+
+if hasattr(os, "register_at_fork"):
+    # the parent's mappings are not this process's attachments
+    os.register_at_fork(after_in_child=_detach_all)
+
+
+def _meta(entry, handle):
+    start, length = handle["meta"]
+    return json.loads(bytes(entry["block"].buf[start:start + length]))
+
+
+def _rows(flat, n):
+    return [flat[i * n:(i + 1) * n] for i in range(n)]
+
+
+def _close(block):
+    # views still held by the caller (attached rows) keep the mapping
+    # open; keep the block too, so it is not closed under them
+    try:
+        block.close()
+    except BufferError:
+        _LINGERING.append(block)
+
+
+def _aligned(offset):
+    return (offset + 7) // 8 * 8
+
+
+def _itemsize(typecode):
+    return array(typecode).itemsize
@@ -0,0 +1,237 @@
+# -------------------------------------------------------------
+# Persistent solution cache keyed by instance fingerprint
+#
+# SOLVE_CACHED(instance):
+#     key = FINGERPRINT(instance)           // everything
+#     if key in cache and FEASIBLE(cached route) and it serves all R:
+#         return cached route               // exact hit
+#     (a stored route that fails the check is deleted)
+#
+#     near = STRUCTURE(instance)            // everything but windows
+#     if a cached route exists for near:
+#         drop requests that now miss a window
+#         REPLAN(add = dropped requests)    // warm start
+#     else:
+#         PDP_GREEDY_INSERT_2OPT(instance)  // cold solve
+#
+#     store route under key (kept only if cheaper than before)
+#
+# The store is a single sqlite file. Every call opens its own
+# short-lived connection, writes run in IMMEDIATE transactions and
+# the database uses WAL mode, so several worker processes can share
+# one cache file. Every hit (exact or structure) refreshes the entry's
+# last_used; when the number of entries exceeds max_entries the least
+# recently used ones are evicted. The schema and WAL mode are set up
+# once per cache file and process, not on every connection.
+# -------------------------------------------------------------
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from distance import total_distance
+from feasibility import feasible
+from instance_compile import fingerprint, structure_fingerprint
+from replan import REPLAN
+from route_state import drop_late_requests, route_feasible
+from solver import PDP_GREEDY_INSERT_2OPT
+from visits import serves_all
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    fingerprint TEXT PRIMARY KEY,
+    structure   TEXT NOT NULL,
+    route       TEXT NOT NULL,
+    cost        REAL NOT NULL,
+    last_used   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS solutions_structure ON solutions (structure);
+CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used);
+"""
+
+# cache files this process has already set up
+_READY = set()
+
+
+def SOLVE_CACHED(instance, path, max_entries=10000):
+    """
+    Solve through the cache at path.
+
+    Returns (greedy, final, status) where status is "hit", "warm"
+    or "miss". On a hit or warm start greedy is the route the search
+    started from.
+    """
+    key = fingerprint(instance)
+    near = structure_fingerprint(instance)
+
+    route = cache_lookup(path, key)
+    if route is not None:
+        if feasible(route, instance) and serves_all(route, instance, instance["R"]):
+            print("\n=== TRACE: Cache hit ===", key[:12])
+            return route, route, "hit"
+        print("\n=== TRACE: Cached route is not valid, dropped ===", key[:12])
+        cache_delete(path, key)
+
+    seed = cache_lookup_structure(path, near)
+    if seed is not None:
+        print("\n=== TRACE: Cache warm start ===", near[:12])
+        greedy, final = _warm_start(instance, seed)
+        status = "warm"
+    else:
+        greedy, final = None, None
+        status = "miss"
+
+    if final is None:
+        greedy, final = PDP_GREEDY_INSERT_2OPT(instance)
+        status = "miss"
+
+    if isinstance(final, list):
+        cost = total_distance(final, instance["c"], instance.get("V"))
+        cache_store(path, key, near, final, cost, max_entries)
+
+    return greedy, final, status
+
+
+
+# ============================================================
+# Cache access
+# ============================================================
+
+def cache_lookup(path, key):
+    """
+    Route stored under an exact fingerprint, or None.
+    """
+    with _connect(path) as db:
+        row = db.execute(
+            "SELECT route FROM solutions WHERE fingerprint = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        db.execute(
+            "UPDATE solutions SET last_used = ? WHERE fingerprint = ?", (time.time(), key)
+        )
+    return json.loads(row[0])
+
+
+def cache_lookup_structure(path, near):
+    """
+    Cheapest stored route for an instance with the same structure
+    fingerprint, or None.
+    """
+    with _connect(path) as db:
+        row = db.execute(
+            "SELECT fingerprint, route FROM solutions WHERE structure = ? ORDER BY cost LIMIT 1",
+            (near,),
+        ).fetchone()
+        if row is None:
+            return None
+        db.execute(
+            "UPDATE solutions SET last_used = ? WHERE fingerprint = ?", (time.time(), row[0])
+        )
+    return json.loads(row[1])
+
+
+def cache_delete(path, key):
+    """
+    Remove the entry stored under key, if any.
+    """
+    with _connect(path) as db:
+        db.execute("DELETE FROM solutions WHERE fingerprint = ?", (key,))
+
+
+def cache_store(path, key, near, route, cost, max_entries=10000):
+    """
+    Store route under key unless a cheaper one is already known,
+    then evict least recently used entries beyond max_entries.
+    """
+    now = time.time()
+    with _connect(path) as db:
+        db.execute("BEGIN IMMEDIATE")
+        db.execute(
+            """
+            INSERT INTO solutions (fingerprint, structure, route, cost, last_used)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (fingerprint) DO UPDATE SET
+                route = excluded.route,
+                cost = excluded.cost,
+                last_used = excluded.last_used
+            WHERE excluded.cost < solutions.cost
+            """,
+            (key, near, json.dumps(route), cost, now),
+        )
+        (count,) = db.execute("SELECT COUNT(*) FROM solutions").fetchone()
+        if count > max_entries:
+            db.execute(
+                """
+                DELETE FROM solutions WHERE fingerprint IN (
+                    SELECT fingerprint FROM solutions ORDER BY last_used LIMIT ?
+                )
+                """,
+                (count - max_entries,),
+            )
+
+
+
+# ============================================================
+# Helper 1: sqlite connection
+# ============================================================
+
+@contextmanager
+def _connect(path):
+    """
+    One short-lived sqlite connection: commits an open transaction on
+    success, rolls it back on error, always closes.
+    """
+    key = os.path.abspath(path)
+    # a cache file removed since it was set up is set up again
+    fresh = key not in _READY or not os.path.exists(path)
+    db = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        if fresh:
+            _init_schema(db)
+            _READY.add(key)
+        yield db
+    except BaseException:
+        if db.in_transaction:
+            db.execute("ROLLBACK")
+        raise
+    else:
+        if db.in_transaction:
+            db.execute("COMMIT")
+    finally:
+        db.close()
+
+
+def _init_schema(db):
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(_SCHEMA)
+
+
+
+# ============================================================
+# Helper 2: warm start from a cached route
+# ============================================================
+
+def _warm_start(instance, route):
+    """
+    Repair a cached route for new windows: drop the request of the
+    first late stop until the rest is feasible, then REPLAN the
+    dropped requests back in. Returns (seed, final) or (None, None)
+    when the repair fails.
+    """
+    repaired = drop_late_requests(route, instance)
+    if repaired is None:
+        return None, None
+    seed, dropped = repaired
+
+    if not route_feasible(seed, instance):
+        return None, None
+
+    final, rejected = REPLAN(instance, seed, add=dropped)
+    if rejected:
+        return None, None
+
+    return seed, final
@@ -1,31 +1,151 @@
+import time
+import tracemalloc
+
 from distance import total_distance
 from feasibility import feasible
 from route_ops import reverse_segment
+from bounds import lower_bound, optimality_gap, target_cost
+from penalty_search import PDP_PENALTY_SEARCH
+from preprocessing import preprocess, tightened_instance, arc_ok, pairing_groups
+from memory_budget import DEFAULT_MEMO_ENTRIES, fit_budget
+from instance_compile import compile_instance
+from kernels import insertion_deltas, two_opt_deltas
+from visits import merge_colocated, serve, serves_all, shared_nodes
+from route_memo import (
+    new_memo, route_hashes, insertion_hash, pair_insertion_hash,
+    reversal_hash, memo_get, memo_put, memo_stats,
+)
 
 # =====================================================================
 # PDP-GREEDY-INSERT-2OPT (main solver)
 # =====================================================================
 
-def PDP_GREEDY_INSERT_2OPT(instance):
+def PDP_GREEDY_INSERT_2OPT(instance, gap=None, result=None, soft=False, memory_budget=None,
+                           bound=False):
     """
     Main solver that coordinates:
+    0. Preprocessing (window tightening, arc compatibility)
     1. Initialization
     2. Construction Phase (Greedy Feasible Insertion)
     3. Improvement Phase (2-Opt)
+
+    Feasibility / cost results of trial routes are shared by both
+    phases through a route memo. Both phases price their moves with
+    the kernels of kernels.py first and only check the ones that can
+    improve.
+
+    gap     stop 2-opt once the route is within this relative gap of
+            the lower bound from bounds.py (e.g. 0.05)
+    result  optional dict, filled with "timings" (seconds per phase)
+            and, when the lower bound is computed, "lower_bound",
+            "cost", "gap" and "stopped_early" for the final route
+    soft    when greedy construction gets stuck, run the penalty
+            search (penalty_search.py) instead of giving up: True for
+            its default 2 s budget, or a budget in seconds. If it finds
+            no feasible route either, result gets "violations" and
+            "route" (the least-violating route).
+    memory_budget
+            bytes this solve may hold (memory_budget.py estimate):
+            over budget, c / T become typed rows and the route memo
+            shrinks; if that is not enough, fail fast
+    bound   compute the lower bound even without gap (it is O(n^3),
+            so only on request)
+
+    While tracemalloc is tracing, result also gets "memory": traced
+    bytes at the end of each phase and the peak during it.
     """
+    timings = {}
+    memory = None
+    if result is not None:
+        result["timings"] = timings
+        if tracemalloc.is_tracing():
+            memory = result["memory"] = {}
+            tracemalloc.reset_peak()
+    clock = time.perf_counter()
+
+    memo_entries = DEFAULT_MEMO_ENTRIES
+    if memory_budget is not None:
+        instance, memo_entries, plan = fit_budget(instance, memory_budget)
+        if instance is None:
+            print(plan)
+            return None, plan
+        if plan:
+            print("\n=== TRACE: Memory budget ===")
+            print("Lower-memory settings:", ", ".join(plan))
+
+    # ---- Phase 0: Preprocessing ----
+    prep = preprocess(instance)
+
+    print("\n=== TRACE: Preprocessing ===")
+    print("Tightened windows:", {
+        v: (prep["open"][v], prep["close"][v]) for v in instance["V"]
+    })
+
+    if prep["infeasible"] is not None:
+        print(prep["infeasible"])
+        return None, prep["infeasible"]
+
+    instance = tightened_instance(instance, prep)
+    memo = new_memo(instance, max_entries=memo_entries)
+    compiled = compile_instance(instance)
+    timings["preprocessing"] = time.perf_counter() - clock
+    _memory_mark(memory, "preprocessing")
 
     # ---- Phase 1: Initialization ----
     route, unserved_requests = _initialize_route(instance)
 
     # ---- Phase 2: Greedy Construction ----
-    route_after_greedy = _construction_phase(route, unserved_requests, instance)
- 
+    clock = time.perf_counter()
+    route_after_greedy = _construction_phase(route, unserved_requests, instance, prep, memo, compiled)
+    if not isinstance(route_after_greedy, str):
+        route_after_greedy = _merge_stops(route_after_greedy, instance)
+    timings["construction"] = time.perf_counter() - clock
+    _memory_mark(memory, "construction")
+
+    # ---- If stuck, search through infeasible routes (optional) ----
+    if isinstance(route_after_greedy, str) and soft:
+        clock = time.perf_counter()
+        budget = 2.0 if soft is True else soft
+        route_soft, report = PDP_PENALTY_SEARCH(instance, time_budget=budget)
+        timings["penalty_search"] = time.perf_counter() - clock
+        _memory_mark(memory, "penalty_search")
+
+        if report["feasible"]:
+            route_after_greedy = route_soft
+        elif result is not None:
+            result["violations"] = report
+            result["route"] = route_soft
+
     # ---- If infeasible, stop ----
     if isinstance(route_after_greedy, str):
         return None, route_after_greedy
 
+    # ---- Lower bound (only when asked for) ----
+    lb = None
+    target = None
+    if gap is not None or bound:
+        lb = lower_bound(instance)["bound"]
+        if gap is not None:
+            target = target_cost(lb, gap)
+
     # ---- Phase 3: 2-Opt Improvement ----
-    route_final = _two_opt_phase(route_after_greedy, instance)
+    clock = time.perf_counter()
+    route_final = _merge_stops(_two_opt_phase(route_after_greedy, instance, prep, memo, target, compiled), instance)
+    timings["improvement"] = time.perf_counter() - clock
+    _memory_mark(memory, "improvement")
+
+    print("Route memo:", memo_stats(memo))
+
+    if lb is not None:
+        cost = total_distance(route_final, instance["c"], instance.get("V"))
+        final_gap = optimality_gap(cost, lb)
+        print(f"Lower bound: {lb:.3f}  |  cost = {cost:.3f}  |  gap = {final_gap:.2%}")
+
+        if result is not None:
+            result["lower_bound"] = lb
+            result["cost"] = cost
+            result["gap"] = final_gap
+            result["stopped_early"] = target is not None and cost <= target
 
 
     # Return final improved route
@@ -111,9 +231,26 @@ def _initialize_route(instance):
 #     route = best_route_global
 #     remove best_request from unserved_requests
 #
+# Pairing groups (paired sets, merged where they overlap) are
+# inserted as one block instead of request by request:
+#
+#     for each pickup p of the group (by opening time):
+#         insert p at its cheapest feasible position
+#     for each delivery d of the group (by opening time):
+#         insert d at its cheapest feasible position after the
+#         group's last pickup
+#
+# and compete with the single requests on the total Δcost. Groups
+# with no feasible block insertion left are split back into single
+# requests, which then go through the pickup-only / delivery-only
+# insertions.
+#
+# With a compiled instance the Δcost of every position comes from
+# INSERTION_DELTAS (kernels.py) first; positions that cannot beat the
+# best Δcost so far skip the FEASIBLE() check.
 # -------------------------------------------------------------
 
-def _construction_phase(route, unserved_requests, instance):
+def _construction_phase(route, unserved_requests, instance, prep=None, memo=None, compiled=None):
 
     print("\n=== TRACE: Starting Greedy Construction Phase ===")
 
@@ -123,12 +260,17 @@ def _construction_phase(route, unserved_requests, instance):
     remaining_pickups = set(unserved_requests)
     pending_deliveries = set()
 
-    while len(remaining_pickups) > 0 or len(pending_deliveries) > 0:
+    pending_groups = [g for g in pairing_groups(instance) if g <= remaining_pickups]
+    for group in pending_groups:
+        remaining_pickups -= group
+    _sync_served(route, instance, remaining_pickups, pending_deliveries, pending_groups)
+
+    while remaining_pickups or pending_deliveries or pending_groups:
 
         # --- SLIDE PRINTS ---
         print("\n--- Greedy Iteration ---")
         print("Current route:", route)
-        print("Unserved requests:", remaining_pickups | pending_deliveries)
+        print("Unserved requests:", remaining_pickups.union(pending_deliveries, *pending_groups))
         # ---------------------
 
         best_route_global = None
@@ -136,6 +278,7 @@ def _construction_phase(route, unserved_requests, instance):
         best_action = None
 
         base_cost = total_distance(route, instance["c"], instance.get("V"))
+        hashes = route_hashes(memo, route) if memo is not None else None
 
         # ------------------------------------------------------------
         # TEST PICKUPS
@@ -143,28 +286,57 @@ def _construction_phase(route, unserved_requests, instance):
         for r in list(remaining_pickups):
             p_node = pickup[r]
             d_node = delivery[r]
+            if compiled is not None:
+                ins_p = insertion_deltas(route, compiled, p_node)
+                ins_d = insertion_deltas(route, compiled, d_node)
 
             # Full insertion
             for posP in range(len(route)):
+                if not _arc_into_ok(prep, route, posP, p_node):
+                    continue
+
                 for posD in range(posP + 1, len(route) + 1):
+                    if compiled is not None and _priced_out(
+                        _pair_delta(compiled, route, posP, posD, ins_p, ins_d, p_node, d_node),
+                        best_delta_global,
+                    ):
+                        continue
+                    if not _full_insertion_ok(prep, route, posP, posD, p_node, d_node):
+                        continue
+
                     trial = route.copy()
                     trial.insert(posP + 1, p_node)
+                    # next to a stop at d_node: that stop already
+                    # delivers r (pickup-only insertion below)
+                    if _colocated(trial, posD, d_node):
+                        continue
                     trial.insert(posD + 1, d_node)
 
-                    if feasible(trial, instance):
-                        delta = total_distance(trial, instance["c"], instance.get("V")) - base_cost
+                    key = hashes and pair_insertion_hash(memo, hashes, posP + 1, p_node, posD + 1, d_node)
+                    cost = _evaluate(trial, instance, memo, key)
+                    if cost is not None:
+                        delta = cost - base_cost
                         if delta < best_delta_global:
                             best_delta_global = delta
                             best_route_global = trial
                             best_action = ("full", r)
 
-            # Pickup-only
+            # Pickup-only (r is also delivered if a stop at d_node follows)
             for posP in range(len(route)):
+                if compiled is not None and _priced_out(ins_p[posP], best_delta_global):
+                    continue
+                if not _single_insertion_ok(prep, route, posP, p_node):
+                    continue
+                if _colocated(route, posP, p_node):
+                    continue
+
                 trial = route.copy()
                 trial.insert(posP + 1, p_node)
 
-                if feasible(trial, instance):
-                    delta = total_distance(trial, instance["c"], instance.get("V")) - base_cost
+                key = hashes and insertion_hash(memo, hashes, posP + 1, p_node)
+                cost = _evaluate(trial, instance, memo, key)
+                if cost is not None:
+                    delta = cost - base_cost
                     if delta < best_delta_global:
                         best_delta_global = delta
                         best_route_global = trial
@@ -175,18 +347,50 @@ def _construction_phase(route, unserved_requests, instance):
         # ------------------------------------------------------------
         for r in list(pending_deliveries):
             d_node = delivery[r]
+            if compiled is not None:
+                ins_d = insertion_deltas(route, compiled, d_node)
 
             for posD in range(len(route) + 1):
+                if compiled is not None and posD < len(route) and _priced_out(ins_d[posD], best_delta_global):
+                    continue
+                if not _single_insertion_ok(prep, route, posD, d_node):
+                    continue
+                if _colocated(route, posD, d_node):
+                    continue
+
                 trial = route.copy()
                 trial.insert(posD + 1, d_node)
 
-                if feasible(trial, instance):
-                    delta = total_distance(trial, instance["c"], instance.get("V")) - base_cost
+                key = hashes and insertion_hash(memo, hashes, min(posD + 1, len(route)), d_node)
+                cost = _evaluate(trial, instance, memo, key)
+                if cost is not None:
+                    delta = cost - base_cost
                     if delta < best_delta_global:
                         best_delta_global = delta
                         best_route_global = trial
                         best_action = ("delivery_only", r)
 
+        # ------------------------------------------------------------
+        # TEST PAIRING GROUPS (as blocks)
+        # ------------------------------------------------------------
+        for group in pending_groups:
+            trial = _insert_group(route, group, instance, prep, memo, compiled)
+            if trial is None:
+                continue
+
+            delta = total_distance(trial, instance["c"], instance.get("V")) - base_cost
+            if delta < best_delta_global:
+                best_delta_global = delta
+                best_route_global = trial
+                best_action = ("group", group)
+
+        # No block insertion fits → fall back to single requests
+        if best_route_global is None and pending_groups:
+            print("No feasible block insertion → splitting groups:", pending_groups)
+            remaining_pickups = remaining_pickups.union(*pending_groups)
+            pending_groups = []
+            continue
+
         # No feasible insertion anywhere → infeasible
         if best_route_global is None:
             print("No feasible insertion found → instance infeasible")
@@ -211,8 +415,103 @@ def _construction_phase(route, unserved_requests, instance):
         elif action_type == "delivery_only":
             pending_deliveries.remove(action_r)
 
+        elif action_type == "group":
+            pending_groups.remove(action_r)
+
+        # stops at shared nodes may serve more than the chosen request
+        _sync_served(route, instance, remaining_pickups, pending_deliveries, pending_groups)
+
     return route
 
+
+def _sync_served(route, instance, remaining_pickups, pending_deliveries, pending_groups):
+    """
+    Update the pending sets (in place) with what the route's stops
+    already serve: a request whose pickup node is visited is picked up
+    there, and delivered at the next stop at its delivery node
+    (visits.serve). Groups with a member served that way are split.
+    """
+    served = serve(route, instance)
+    picked, delivered = served["pickup"], served["delivery"]
+
+    for group in list(pending_groups):
+        if any(r in picked for r in group):
+            pending_groups.remove(group)
+            remaining_pickups |= group
+
+    for r in list(remaining_pickups):
+        if r in picked:
+            remaining_pickups.discard(r)
+            pending_deliveries.add(r)
+    for r in list(pending_deliveries):
+        if r in delivered:
+            pending_deliveries.discard(r)
+
+
+def _insert_group(route, group, instance, prep=None, memo=None, compiled=None):
+    """
+    Route with every request of a pairing group inserted: all pickups
+    first, then all deliveries after the last of those pickups, each at
+    its cheapest feasible position. None if some stop does not fit.
+    Visits an existing stop already serves need no new stop.
+    """
+    pickup = instance["pickup"]
+    delivery = instance["delivery"]
+    open_time = instance["open"]
+
+    for r in sorted(group, key=lambda r: (open_time[pickup[r]], r)):
+        if r in serve(route, instance)["pickup"]:
+            continue
+        placed = _cheapest_insertion(route, pickup[r], 0, instance, prep, memo, compiled)
+        if placed is None:
+            return None
+        route, _ = placed
+
+    # index of the group's last pickup
+    last_pick = max(serve(route, instance)["pickup"][r] for r in group)
+
+    for r in sorted(group, key=lambda r: (open_time[delivery[r]], r)):
+        if r in serve(route, instance)["delivery"]:
+            continue
+        placed = _cheapest_insertion(route, delivery[r], last_pick, instance, prep, memo, compiled)
+        if placed is None:
+            return None
+        route, _ = placed
+
+    return route
+
+
+def _cheapest_insertion(route, node, lo, instance, prep=None, memo=None, compiled=None):
+    """
+    Cheapest feasible insertion of node after one of route[lo:].
+    Returns (trial, index of node in trial), or None.
+    """
+    hashes = route_hashes(memo, route) if memo is not None else None
+    best = None
+    best_cost = float("inf")
+    if compiled is not None:
+        base_cost = total_distance(route, instance["c"], instance.get("V"))
+        deltas = insertion_deltas(route, compiled, node)
+
+    for pos in range(lo, len(route)):
+        if compiled is not None and _priced_out(base_cost + deltas[pos], best_cost):
+            continue
+        if not _single_insertion_ok(prep, route, pos, node):
+            continue
+        if _colocated(route, pos, node):
+            continue
+
+        trial = route.copy()
+        trial.insert(pos + 1, node)
+
+        key = hashes and insertion_hash(memo, hashes, pos + 1, node)
+        cost = _evaluate(trial, instance, memo, key)
+        if cost is not None and cost < best_cost:
+            best_cost = cost
+            best = (trial, pos + 1)
+
+    return best
+
 # =====================================================================
 # PHASE 3: IMPROVEMENT (2-OPT LOCAL SEARCH)
 # =====================================================================
@@ -237,35 +536,59 @@ def _construction_phase(route, unserved_requests, instance):
 #
 #             if FEASIBLE(trial_route):
 #                 new_cost = TOTAL_DISTANCE(trial_route)
-#                 if new_cost < current_cost:
+#                 if new_cost < current_cost
+#                    and (no shared nodes or SERVES_ALL(trial_route)):
 #                     route = trial_route
 #                     improved = true
 #                     break both loops
 #
+#     if target given and TOTAL_DISTANCE(route) <= target:
+#         stop        // within the requested gap of the lower bound
+#
 # return route
+#
+# With a compiled instance every pass starts from TWO_OPT_DELTAS
+# (kernels.py): reversals that do not shorten the route skip the
+# FEASIBLE() check.
 # -------------------------------------------------------------
 
-def _two_opt_phase(route, instance):
+def _two_opt_phase(route, instance, prep=None, memo=None, target=None, compiled=None):
     print("\n=== TRACE: Starting 2-Opt Improvement Phase ===")
     print("Initial route:", route)
 
     c = instance["c"]
     improved = True
+    # with shared nodes a reversal can move visits between stops
+    served = set(serve(route, instance)["delivery"]) if shared_nodes(instance) else None
 
     while improved:
         improved = False
         current_cost = total_distance(route, c, instance.get("V"))
+        hashes = route_hashes(memo, route) if memo is not None else None
+
+        if target is not None and current_cost <= target:
+            print(f"Within target cost {target:.3f} → stopping early")
+            break
+
+        if compiled is not None:
+            deltas = two_opt_deltas(route, compiled)
+            m = len(route)
 
         for i in range(len(route) - 3):
             for j in range(i + 2, len(route) - 1):
 
+                if compiled is not None and _priced_out(deltas[i * m + j], 0.0):
+                    continue
+                if not _reversal_arcs_ok(prep, route, i, j):
+                    continue
+
                 trial = route.copy()
                 reverse_segment(trial, i + 1, j)
 
-                if feasible(trial, instance):
-                    new_cost = total_distance(trial, c, instance.get("V"))
-
-                    if new_cost < current_cost:
+                key = hashes and reversal_hash(memo, hashes, i + 1, j)
+                new_cost = _evaluate(trial, instance, memo, key)
+                if new_cost is not None:
+                    if new_cost < current_cost and (served is None or serves_all(trial, instance, served)):
                         print(f"Improvement accepted: reverse {i+1}..{j}  → Δ = {current_cost - new_cost:.3f}")
                         route = trial
                         improved = True
@@ -277,3 +600,210 @@ def _two_opt_phase(route, instance):
     print("Final improved route:", route)
 
     return route
+
+
+
+# =====================================================================
+# KERNEL PRICING
+# =====================================================================
+#
+# Δcost of a move from the kernels of kernels.py, before the move is
+# built and checked. The kernels sum in a different order than
+# TOTAL_DISTANCE(), so only moves priced clearly above the best so far
+# are skipped.
+# ---------------------------------------------------------------------
+
+_PRICE_TOL = 1e-9
+
+
+def _priced_out(delta, best):
+    """
+    True if a move priced at delta cannot beat best.
+    """
+    return delta > best + _PRICE_TOL
+
+
+def _pair_delta(compiled, route, posP, posD, ins_p, ins_d, p, d):
+    """
+    Δcost of inserting p after route[posP] and d after position posD
+    of the route with p in it (ins_p / ins_d: insertion_deltas() of
+    route for p and d).
+    """
+    if posD > posP + 1:
+        return ins_p[posP] + ins_d[posD - 1]
+
+    # d directly after p
+    n, c, index = compiled["n"], compiled["c"], compiled["index"]
+    a, ip, idd = index[route[posP]], index[p], index[d]
+    delta = c[a * n + ip] + c[ip * n + idd]
+    if posP + 1 < len(route):
+        b = index[route[posP + 1]]
+        delta += c[idd * n + b] - c[a * n + b]
+    return delta
+
+
+
+# =====================================================================
+# TRIAL EVALUATION
+# =====================================================================
+#
+# FEASIBLE() + TOTAL_DISTANCE() of a trial route, looked up in the
+# route memo first when the caller passes one (route_key from
+# route_memo.py). Infeasible routes are stored with cost None.
+# ---------------------------------------------------------------------
+
+def _evaluate(trial, instance, memo=None, route_key=None):
+    """
+    Total distance of trial, or None if it is infeasible.
+    """
+    if memo is not None:
+        hit = memo_get(memo, route_key)
+        if hit is not None:
+            return hit[0]
+
+    cost = None
+    if feasible(trial, instance):
+        cost = total_distance(trial, instance["c"], instance.get("V"))
+
+    if memo is not None:
+        memo_put(memo, route_key, (cost,))
+    return cost
+
+
+
+# =====================================================================
+# ARC-COMPATIBILITY SCREENS
+# =====================================================================
+#
+# Cheap checks on the arcs a move would create, run before the
+# full FEASIBLE() trace. They only use the preprocessing bitmap, so a
+# position that fails here could never pass FEASIBLE(). With no
+# preprocessing (prep is None) every position is evaluated.
+# ---------------------------------------------------------------------
+
+def _colocated(route, pos, node):
+    """
+    True if node inserted after route[pos] would sit next to a stop
+    at the same node: that stop serves the visit already (or could,
+    merged), so the candidate is not evaluated.
+    """
+    return route[pos] == node or (pos + 1 < len(route) and route[pos + 1] == node)
+
+
+def _arc_into_ok(prep, route, pos, node):
+    """
+    Arc route[pos] -> node, created by inserting node after pos.
+    """
+    if prep is None:
+        return True
+    if _after_end(prep, route, pos):
+        return False
+    return arc_ok(prep, route[pos], node)
+
+
+def _single_insertion_ok(prep, route, pos, node):
+    """
+    Both arcs created by inserting node between route[pos] and
+    route[pos + 1]. Positions past the end of the route (the
+    delivery loop runs one further) are never feasible.
+    """
+    if prep is None:
+        return True
+    if pos >= len(route) or _after_end(prep, route, pos):
+        return False
+    if not arc_ok(prep, route[pos], node):
+        return False
+    if pos + 1 < len(route) and not arc_ok(prep, node, route[pos + 1]):
+        return False
+    return True
+
+
+def _full_insertion_ok(prep, route, posP, posD, p_node, d_node):
+    """
+    Arcs created by inserting p_node after posP and d_node so that it
+    ends up at index posD + 1 of the trial route (same indexing as the
+    construction loop).
+    """
+    if prep is None:
+        return True
+    if _after_end(prep, route, posP) or _after_end(prep, route, posD - 1):
+        return False
+
+    # d directly after p
+    if posD == posP + 1:
+        if not arc_ok(prep, p_node, d_node):
+            return False
+        if posP + 1 < len(route) and not arc_ok(prep, d_node, route[posP + 1]):
+            return False
+        return True
+
+    # p ... d with original nodes in between
+    if not arc_ok(prep, p_node, route[posP + 1]):
+        return False
+    if not arc_ok(prep, route[posD - 1], d_node):
+        return False
+    if posD < len(route) and not arc_ok(prep, d_node, route[posD]):
+        return False
+    return True
+
+
+def _after_end(prep, route, pos):
+    """
+    True if pos is at or past the closing depot of a route that must
+    end there (needed when e == s: arcs out of s are allowed).
+    """
+    return prep["closed"] and pos >= len(route) - 1
+
+
+def _reversal_arcs_ok(prep, route, i, j):
+    """
+    Arcs created by REVERSE_SEGMENT(route, i+1, j): the two boundary
+    arcs and every reversed arc inside the segment.
+    """
+    if prep is None:
+        return True
+    if not arc_ok(prep, route[i], route[j]):
+        return False
+    if not arc_ok(prep, route[i + 1], route[j + 1]):
+        return False
+    for k in range(i + 1, j):
+        if not arc_ok(prep, route[k + 1], route[k]):
+            return False
+    return True
+
+
+
+# =====================================================================
+# CO-LOCATED STOPS
+# =====================================================================
+#
+# Consecutive stops at one node become one stop: no travel between
+# them and a single service time. Kept only if the merged route is
+# still feasible (an earlier pickup can lengthen a ride).
+# ---------------------------------------------------------------------
+
+def _merge_stops(route, instance):
+    merged = merge_colocated(route)
+    if len(merged) < len(route) and feasible(merged, instance):
+        print("Merged co-located stops:", merged)
+        return merged
+    return route
+
+
+
+# =====================================================================
+# MEMORY MARKS
+# =====================================================================
+#
+# Only while tracemalloc is tracing (memory_benchmark.py): traced
+# bytes and live allocation blocks at the end of a phase, and the peak
+# since the previous mark.
+# ---------------------------------------------------------------------
+
+def _memory_mark(memory, phase):
+    if memory is None:
+        return
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    memory[phase] = {"current": current, "peak": peak, "blocks": blocks}
+    tracemalloc.reset_peak()
@@ -0,0 +1,217 @@
+# -------------------------------------------------------------
+# Automatic solver strategy selection
+#
+# FEATURES(instance):                        // all O(|V|^2) or less
+#     requests        |R|
+#     tightness       1 - mean window width / horizon of the request
+#                     nodes (0 = every window spans the day, 1 = points)
+#     pairing         share of requests that belong to a paired set
+#     asymmetry       sum |c[i][j] - c[j][i]| / sum (c[i][j] + c[j][i])
+#
+# SELECT(instance, time_budget, workers):
+#     if requests <= exact_requests:                  engine = exact
+#     else if est(requests) > budget_share * budget:  engine = decomposed
+#         cluster_size = largest m with
+#                        est(m) * ceil(requests / m) / workers
+#                        <= budget_share * budget
+#     else if workers > 1 and (tightness >= tight_windows
+#                              or pairing >= dense_pairing):
+#                                                     engine = genetic
+#     else:                                           engine = greedy
+#         soft (penalty search) if tightness >= tight_windows
+#         tabu on the remaining budget if asymmetry >= asymmetric
+#         (2-opt reversals change every reversed arc there)
+#
+# If decomposed or genetic search finds no route, greedy (soft) runs
+# instead and the result records the fallback.
+#
+# est(n) = greedy + 2-opt seconds for n requests, from the fitted
+# growth exponent and largest row of perf_baseline.json
+# (python perf_regression.py --update records it on this machine).
+# -------------------------------------------------------------
+
+import json
+import math
+import os
+import time
+
+from decomposition import PDP_DECOMPOSED
+from exact_search import PDP_EXACT
+from genetic_search import PDP_HYBRID_GENETIC
+from metaheuristics import IMPROVE_TABU
+from perf_regression import BASELINE_PATH, growth_exponent
+from solver import PDP_GREEDY_INSERT_2OPT
+
+
+THRESHOLDS = {
+    "exact_requests": 6,     # PDP_EXACT takes < 0.2 s up to here
+    "budget_share": 0.5,     # share of the budget greedy may use
+    "tight_windows": 0.9,
+    "dense_pairing": 0.5,
+    "asymmetric": 0.05,
+    "min_cluster": 10,
+}
+
+# used when there is no perf_baseline.json
+CALIBRATION = {"n": 32, "seconds": 2.65, "exponent": 3.0}
+
+ENGINES = ("exact", "greedy", "genetic", "decomposed")
+
+
+def instance_features(instance):
+    """
+    Cheap features of an instance for strategy selection.
+    """
+    R = instance["R"]
+    pickup, delivery = instance["pickup"], instance["delivery"]
+    nodes = {pickup[r] for r in R} | {delivery[r] for r in R}
+
+    tightness = 0.0
+    if nodes:
+        opens = [instance["open"][v] for v in nodes]
+        closes = [instance["close"][v] for v in nodes]
+        horizon = max(closes) - min(opens)
+        if horizon > 0:
+            width = sum(b - a for a, b in zip(opens, closes)) / len(nodes)
+            tightness = max(0.0, 1 - width / horizon)
+
+    paired = set()
+    for group in instance["paired_sets"]:
+        paired |= set(group)
+
+    c = instance["c"]
+    diff = total = 0
+    for i in range(len(c)):
+        for j in range(i + 1, len(c)):
+            diff += abs(c[i][j] - c[j][i])
+            total += c[i][j] + c[j][i]
+
+    return {
+        "requests": len(R),
+        "tightness": tightness,
+        "pairing": len(paired & set(R)) / len(R) if R else 0.0,
+        "asymmetry": diff / total if total else 0.0,
+    }
+
+
+def SELECT_STRATEGY(instance, time_budget=10.0, workers=None, thresholds=None, calibration=None):
+    """
+    Choose an engine and its parameters for instance.
+
+    thresholds   overrides for THRESHOLDS
+    calibration  {"n", "seconds", "exponent"} instead of the values
+                 fitted from perf_baseline.json
+
+    Returns {"engine", "params", "improve", "features", "reason"}.
+    """
+    limits = dict(THRESHOLDS, **(thresholds or {}))
+    workers = workers or os.cpu_count() or 1
+    calibration = calibration or load_calibration()
+    features = instance_features(instance)
+    n = features["requests"]
+    allowed = limits["budget_share"] * time_budget
+
+    def estimate(m):
+        return calibration["seconds"] * (m / calibration["n"]) ** calibration["exponent"]
+
+    config = {"engine": "greedy", "params": {}, "improve": None, "features": features}
+
+    if n <= limits["exact_requests"]:
+        config.update(engine="exact", params={"max_requests": limits["exact_requests"]},
+                      reason=f"{n} requests <= {limits['exact_requests']}")
+
+    elif estimate(n) > allowed and n > limits["min_cluster"]:
+        size = n
+        while size > limits["min_cluster"] and estimate(size) * math.ceil(n / size) / workers > allowed:
+            size -= 1
+        config.update(engine="decomposed", params={"cluster_size": size, "workers": workers},
+                      reason=f"greedy estimate {estimate(n):.1f}s > {allowed:.1f}s")
+
+    elif workers > 1 and (features["tightness"] >= limits["tight_windows"]
+                          or features["pairing"] >= limits["dense_pairing"]):
+        config.update(engine="genetic", params={"islands": workers, "time_budget": time_budget},
+                      reason=f"tightness {features['tightness']:.2f}, pairing {features['pairing']:.2f}"
+                             f" on {workers} workers")
+
+    else:
+        reasons = [f"greedy estimate {estimate(n):.1f}s <= {allowed:.1f}s"]
+        if features["tightness"] >= limits["tight_windows"]:
+            config["params"]["soft"] = True
+            reasons.append(f"tightness {features['tightness']:.2f}: soft")
+        if features["asymmetry"] >= limits["asymmetric"]:
+            config["improve"] = "tabu"
+            reasons.append(f"asymmetry {features['asymmetry']:.2f}: tabu")
+        config["reason"] = ", ".join(reasons)
+
+    return config
+
+
+def SOLVE_AUTO(instance, time_budget=10.0, workers=None, thresholds=None,
+               engine=None, params=None, result=None):
+    """
+    Solve with the strategy SELECT_STRATEGY picks (or with engine /
+    params given by the caller, which take precedence).
+
+    Returns (first, final) like PDP_GREEDY_INSERT_2OPT, or
+    (None, message). result (optional dict) gets "strategy": the
+    configuration that was run, with "fallback" if greedy had to take
+    over.
+    """
+    config = SELECT_STRATEGY(instance, time_budget, workers, thresholds)
+    if engine is not None and engine != config["engine"]:
+        if engine not in ENGINES:
+            raise ValueError(f"unknown engine {engine!r}, expected one of {ENGINES}")
+        config.update(engine=engine, params={}, improve=None, reason="chosen by caller")
+    if params:
+        config["params"] = dict(config["params"], **params)
+
+    print("\n=== TRACE: Strategy ===")
+    print("Engine:", config["engine"], config["params"], " improve:", config["improve"])
+    print("Reason:", config["reason"])
+
+    if result is not None:
+        result["strategy"] = config
+
+    started = time.perf_counter()
+    kind, kw = config["engine"], config["params"]
+
+    if kind == "exact":
+        return PDP_EXACT(instance, **kw)
+    if kind == "decomposed":
+        first, final = PDP_DECOMPOSED(instance, **kw)
+    elif kind == "genetic":
+        route, info = PDP_HYBRID_GENETIC(instance, **kw)
+        first, final = (route, route) if route is not None else (None, "no feasible route found")
+    if kind != "greedy":
+        if first is not None:
+            return first, final
+        print("No route from", kind, "-", final, "→ falling back to greedy")
+        config["fallback"] = {"engine": "greedy", "message": final}
+        kw = {"soft": True}
+
+    first, final = PDP_GREEDY_INSERT_2OPT(instance, **kw)
+    remaining = time_budget - (time.perf_counter() - started)
+    if first is not None and config["improve"] == "tabu" and remaining > 0:
+        final = IMPROVE_TABU(instance, final, time_budget=remaining)
+    return first, final
+
+
+def load_calibration(path=BASELINE_PATH):
+    """
+    {"n", "seconds", "exponent"} for est(n) from a perf_regression
+    baseline; CALIBRATION if there is none.
+    """
+    if not os.path.exists(path):
+        return dict(CALIBRATION)
+    with open(path) as f:
+        baseline = json.load(f)
+
+    rows = [
+        dict(r, total=r["construction"] + r.get("improvement", 0))
+        for r in baseline["rows"] if "construction" in r
+    ]
+    exponent = growth_exponent(rows, "total")
+    if exponent is None:
+        return dict(CALIBRATION)
+    largest = max(rows, key=lambda r: r["n"])
+    return {"n": largest["n"], "seconds": largest["total"], "exponent": exponent}
@@ -0,0 +1,67 @@
+import csv
+import json
+
+import pytest
+
+from batch_run import FIELDS, main
+from instance_input import get_instance
+from instance_json import instance_to_json
+
+
+@pytest.fixture
+def instance_dir(tmp_path):
+    folder = tmp_path / "instances"
+    folder.mkdir()
+    (folder / "ok.json").write_text(json.dumps(instance_to_json(get_instance())))
+    (folder / "broken.json").write_text('{"R": [1, 2], ')
+    (folder / "notes.txt").write_text("not an instance")
+    return folder
+
+
+def _by_instance(rows):
+    return {row["instance"].rsplit("/", 1)[-1]: row for row in rows}
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_csv_report(instance_dir, tmp_path, workers):
+    output = tmp_path / "results.csv"
+    code = main([str(instance_dir), "get_instance_infeasible",
+                 "--workers", workers, "--format", "csv", "--output", str(output)])
+
+    # the malformed file makes the run fail
+    assert code == 1
+
+    with open(output, newline="") as f:
+        reader = csv.DictReader(f)
+        assert tuple(reader.fieldnames) == FIELDS
+        rows = _by_instance(reader)
+
+    assert set(rows) == {"ok.json", "broken.json", "get_instance_infeasible"}
+
+    ok = rows["ok.json"]
+    assert ok["status"] == "ok"
+    route = json.loads(ok["route"])
+    assert route[0] == 0 and sorted(route) == [0, 1, 2, 3, 4]
+    assert float(ok["cost"]) <= float(ok["greedy_cost"])
+    assert float(ok["solve_time"]) >= 0
+
+    infeasible = rows["get_instance_infeasible"]
+    assert infeasible["status"] == "infeasible"
+    assert infeasible["message"].startswith("instance infeasible")
+    assert infeasible["route"] == ""
+
+    broken = rows["broken.json"]
+    assert broken["status"] == "error"
+    assert broken["message"].startswith("load failed:")
+
+
+def test_jsonl_report_without_errors(instance_dir, tmp_path, capsys):
+    (instance_dir / "broken.json").unlink()
+    output = tmp_path / "results.jsonl"
+
+    assert main([str(instance_dir), "--workers", "1", "--output", str(output)]) == 0
+
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [line["status"] for line in lines] == ["ok"]
+    assert set(lines[0]) <= set(FIELDS)
+    assert "1 instance(s): {'ok': 1}" in capsys.readouterr().err
@@ -0,0 +1,110 @@
+import contextlib
+import io
+import json
+
+import pytest
+
+import checkpoint
+import metaheuristics
+import penalty_search
+from distance import total_distance
+from instance_input import generate_instance, get_instance
+from solver import PDP_GREEDY_INSERT_2OPT
+
+# engine -> (search, iterations, generated instance where it improves
+# on the greedy route)
+ENGINES = {
+    "annealing": (metaheuristics.IMPROVE_ANNEALING, 1500, (15, 1)),
+    "tabu": (metaheuristics.IMPROVE_TABU, 60, (12, 2)),
+}
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _problem(engine):
+    n, seed = ENGINES[engine][2]
+    instance = generate_instance(n, seed=seed, slack=1000)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return instance, PDP_GREEDY_INSERT_2OPT(instance)[0]
+
+
+def _run(engine, instance, route, **kw):
+    fn, iterations, _ = ENGINES[engine]
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(instance, route, time_budget=600, seed=3, max_iterations=iterations, **kw)
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_resume_follows_the_uninterrupted_run(engine, tmp_path, monkeypatch):
+    instance, route = _problem(engine)
+    path = str(tmp_path / "search.json")
+    expected = _run(engine, instance, route)
+    assert total_distance(expected, instance["c"], instance["V"]) < total_distance(route, instance["c"], instance["V"])
+
+    # save at every chance, die after the third save
+    saves = []
+    save = checkpoint.save_checkpoint
+
+    def save_then_die(writer, state):
+        save(writer, state)
+        saves.append(state["iteration"])
+        if len(saves) == 3:
+            raise Interrupted
+
+    monkeypatch.setattr(metaheuristics, "save_checkpoint", save_then_die)
+    with pytest.raises(Interrupted):
+        _run(engine, instance, route, checkpoint=path, checkpoint_every=0)
+    assert 0 < saves[-1] < ENGINES[engine][1]
+    monkeypatch.setattr(metaheuristics, "save_checkpoint", save)
+
+    assert _run(engine, instance, route, checkpoint=path, resume=True) == expected
+
+
+def test_penalty_search_resumes_where_it_stopped(tmp_path, monkeypatch):
+    # greedy gets stuck here; search on past the first feasible route
+    instance = generate_instance(10, seed=0, slack=30)
+    path = str(tmp_path / "penalty.json")
+
+    def run(**kw):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return penalty_search.PDP_PENALTY_SEARCH(
+                instance, time_budget=600, seed=3, max_iterations=600,
+                stop_when_feasible=False, **kw)
+
+    expected = run()
+    assert expected[1]["feasible"]
+
+    saves = []
+    save = checkpoint.save_checkpoint
+
+    def save_then_die(writer, state):
+        save(writer, state)
+        saves.append(state["iteration"])
+        if len(saves) == 200:
+            raise Interrupted
+
+    monkeypatch.setattr(penalty_search, "save_checkpoint", save_then_die)
+    with pytest.raises(Interrupted):
+        run(checkpoint=path, checkpoint_every=0)
+    assert saves[-1] == 199
+    monkeypatch.setattr(penalty_search, "save_checkpoint", save)
+
+    with open(path) as f:
+        assert json.load(f)["engine"] == "penalty"
+    assert run(checkpoint=path, resume=True) == expected
+
+
+def test_checkpoint_belongs_to_engine_and_instance(tmp_path):
+    instance, route = _problem("tabu")
+    path = str(tmp_path / "search.json")
+    _run("tabu", instance, route, checkpoint=path)
+    with open(path) as f:
+        assert json.load(f)["engine"] == "tabu"
+
+    with pytest.raises(ValueError):
+        checkpoint.load_checkpoint(path, "annealing", instance)
+    with pytest.raises(ValueError):
+        checkpoint.load_checkpoint(path, "tabu", get_instance())
+    assert checkpoint.load_checkpoint(str(tmp_path / "missing.json"), "tabu", instance) is None
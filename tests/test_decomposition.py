@@ -0,0 +1,56 @@
+import ast
+import contextlib
+import io
+
+from decomposition import PDP_DECOMPOSED, _sub_instance
+from feasibility import feasible
+from instance_input import generate_instance
+from time_dependent import make_profile
+
+
+def test_sub_instance_keeps_ride_duration_and_profiles():
+    instance = generate_instance(6, seed=1, ride_factor=2.0)
+    instance["max_duration"] = 5000
+    instance["T_profile"] = {
+        (1, 7): make_profile([0, 100], [20, 40]),      # request 1
+        (2, 8): make_profile([0, 100], [30, 50]),      # request 2
+        (1, 8): make_profile([0, 100], [10, 10]),      # crosses clusters
+    }
+
+    sub = _sub_instance(instance, [1, 3])
+
+    assert sub["max_ride"] == {1: instance["max_ride"][1], 3: instance["max_ride"][3]}
+    assert sub["max_duration"] == 5000
+    assert set(sub["T_profile"]) == {(1, 7)}
+
+
+def test_sub_instance_without_limits_has_no_limit_fields():
+    sub = _sub_instance(generate_instance(4, seed=0), [1, 2])
+    assert "max_ride" not in sub
+    assert "max_duration" not in sub
+    assert "T_profile" not in sub
+
+
+def _decomposed(instance):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PDP_DECOMPOSED(instance, cluster_size=8, workers=2)
+
+
+def test_stitched_route_serves_every_request():
+    instance = generate_instance(24, seed=1, slack=300)
+    stitched, final = _decomposed(instance)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert feasible(final, instance)
+    assert sorted(final) == sorted(instance["V"])
+
+
+def test_unplaced_request_is_reported_not_raised():
+    instance = generate_instance(24, seed=1, slack=300)
+    instance["close"][instance["delivery"][5]] = 0    # request 5 cannot be served
+
+    stitched, message = _decomposed(instance)
+
+    assert stitched is None
+    assert message.startswith("instance infeasible (decomposition could not place [")
+    assert 5 in ast.literal_eval(message[message.index("["):message.index("]") + 1])
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+from dispatch_service import start_service, stop_service
+from instance_input import generate_instance
+from instance_json import instance_to_json
+
+
+def test_bad_line_does_not_drop_the_connection():
+    async def run():
+        service = await start_service(workers=1)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", service["port"])
+            job = {"id": 1, "instance": instance_to_json(generate_instance(3, seed=0))}
+            for line in (b"[1, 2]", b"3", b"not json", json.dumps(job).encode()):
+                writer.write(line + b"\n")
+            await writer.drain()
+            replies = [json.loads(await asyncio.wait_for(reader.readline(), 30)) for _ in range(4)]
+            writer.close()
+            await writer.wait_closed()
+            return replies
+        finally:
+            await stop_service(service)
+
+    replies = asyncio.run(run())
+    assert [r["status"] for r in replies[:3]] == ["error"] * 3
+    assert replies[3]["id"] == 1
+    assert replies[3]["status"] == "ok"
+
+
+def test_error_reply_keeps_the_request_id():
+    async def run():
+        service = await start_service(workers=1)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", service["port"])
+            writer.write(json.dumps({"id": 7, "instance": {}}).encode() + b"\n")
+            await writer.drain()
+            reply = json.loads(await asyncio.wait_for(reader.readline(), 30))
+            writer.close()
+            await writer.wait_closed()
+            return reply
+        finally:
+            await stop_service(service)
+
+    reply = asyncio.run(run())
+    assert reply["status"] == "error"
+    assert reply["id"] == 7
+
+
+def test_disconnected_client_does_not_abort_the_batch():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from dispatch_service import _run_batch
+
+    async def run():
+        answered = []
+
+        def responder(job_id):
+            async def respond(result):
+                if job_id == 2:
+                    raise ConnectionResetError("client went away")
+                answered.append(result["id"])
+            return respond
+
+        service = {
+            "queue": asyncio.Queue(),
+            "pool": ThreadPoolExecutor(max_workers=1),
+            "slots": asyncio.Semaphore(1),
+        }
+        batch = []
+        for job_id in (1, 2, 3):
+            job = {
+                "id": job_id,
+                "instance": instance_to_json(generate_instance(2, seed=job_id)),
+                "arrived": asyncio.get_running_loop().time(),
+                "deadline": None,
+                "respond": responder(job_id),
+            }
+            service["queue"].put_nowait(job)
+            batch.append(await service["queue"].get())
+
+        await service["slots"].acquire()
+        try:
+            await _run_batch(service, batch)
+            await asyncio.wait_for(service["queue"].join(), 5)
+        finally:
+            service["pool"].shutdown(wait=True)
+        return answered, service["slots"].locked()
+
+    answered, locked = asyncio.run(run())
+    assert answered == [1, 3]
+    assert not locked
@@ -0,0 +1,110 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+from feasibility import feasible
+from feasibility_batch import feasible_batch
+from instance_compile import compile_instance
+from instance_input import get_instance
+from route_state import build_state, pair_insertion_ok, route_feasible
+
+ROUTE = [0, 1, 2, 3, 4]
+
+
+def _feasible(route, instance):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return feasible(route, instance)
+
+
+def _verdicts(route, instance):
+    batch = feasible_batch([route], compile_instance(instance))
+    return _feasible(route, instance), route_feasible(route, instance), bool(batch["feasible"][0])
+
+
+def test_duration_ignores_waiting_before_first_pickup():
+    # leaving the depot at 0 waits until 50 at pickup 1; leaving at 48
+    # does not, so the route lasts 13, not 61
+    instance = dict(get_instance(), max_duration=20)
+    instance["open"] = {**instance["open"], 1: 50}
+    assert _verdicts(ROUTE, instance) == (True, True, True)
+    assert build_state(ROUTE, instance)["shifted"] == [48, 50, 54, 59, 61]
+
+    instance["max_duration"] = 12
+    assert _verdicts(ROUTE, instance) == (False, False, False)
+
+
+def test_ride_ignores_waiting_before_delivery():
+    # delivery 3 opens at 40: delaying the departure removes the wait
+    # from the ride of request 1 (9 instead of 38)
+    instance = dict(get_instance(), max_ride={1: 10, 2: 8})
+    instance["open"] = {**instance["open"], 3: 40}
+    assert _verdicts(ROUTE, instance) == (True, True, True)
+
+    instance["max_ride"] = {1: 8, 2: 8}
+    assert _verdicts(ROUTE, instance) == (False, False, False)
+
+
+def test_ride_limit_may_be_none():
+    instance = dict(get_instance(), max_ride=None)
+    assert _verdicts(ROUTE, instance) == (True, True, True)
+
+
+def _random_instance(rng, n=4):
+    R = set(range(1, n + 1))
+    V = list(range(2 * n + 1))
+    xy = {v: (rng.uniform(0, 20), rng.uniform(0, 20)) for v in V}
+    T = [[round(((xy[a][0] - xy[b][0]) ** 2 + (xy[a][1] - xy[b][1]) ** 2) ** 0.5) for b in V]
+         for a in V]
+    open_tw = {v: rng.choice([0, 0, rng.randint(0, 60)]) for v in V}
+    close_tw = {v: open_tw[v] + rng.randint(20, 120) for v in V}
+    open_tw[0], close_tw[0] = 0, 1000
+    instance = {
+        "s": 0, "e": None, "R": R, "V": V, "c": T, "T": T,
+        "pickup": {r: r for r in R}, "delivery": {r: r + n for r in R},
+        "service": {v: rng.choice([0, 1, 2]) for v in V},
+        "open": open_tw, "close": close_tw, "paired_sets": [],
+    }
+    if rng.random() < 0.7:
+        instance["max_ride"] = {r: rng.randint(10, 50) for r in R if rng.random() < 0.8}
+    if rng.random() < 0.7:
+        instance["max_duration"] = rng.randint(40, 120)
+    return instance
+
+
+def _random_route(rng, instance):
+    seq = []
+    for r in rng.sample(sorted(instance["R"]), len(instance["R"])):
+        a = rng.randint(0, len(seq))
+        seq.insert(a, instance["pickup"][r])
+        seq.insert(rng.randint(a + 1, len(seq)), instance["delivery"][r])
+    return [0] + seq
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_limit_checks_agree(seed):
+    rng = random.Random(seed)
+    accepted = 0
+    for _ in range(40):
+        instance = _random_instance(rng)
+        routes = [_random_route(rng, instance) for _ in range(20)]
+        batch = feasible_batch(routes, compile_instance(instance))
+        for k, route in enumerate(routes):
+            verdict = _feasible(route, instance)
+            assert route_feasible(route, instance) == verdict
+            assert bool(batch["feasible"][k]) == verdict
+            accepted += verdict
+
+            # every insertion of one request into the rest of the route
+            r = rng.choice(sorted(instance["R"]))
+            p, d = instance["pickup"][r], instance["delivery"][r]
+            base = [v for v in route if v not in (p, d)]
+            if not _feasible(base, instance):
+                continue
+            state = build_state(base, instance)
+            for a in range(len(base)):
+                for b in range(a, len(base)):
+                    trial = base[:a + 1] + [p] + base[a + 1:b + 1] + [d] + base[b + 1:]
+                    assert pair_insertion_ok(state, instance, a, b, p, d, r) == _feasible(trial, instance)
+    assert accepted > 0
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+import instance_input
+from feasibility import feasible
+from feasibility_batch import REASONS, explain, feasible_batch
+from instance_compile import compile_instance
+from visits import shared_nodes
+
+
+def _cases():
+    for name in sorted(dir(instance_input)):
+        if name.startswith("get_instance"):
+            instance = getattr(instance_input, name)()
+            if not shared_nodes(instance):
+                yield name, instance
+    for seed in range(3):
+        yield f"generated_{seed}", instance_input.generate_instance(10, seed=seed, pair_fraction=0.4)
+        yield f"ride_{seed}", instance_input.generate_instance(8, seed=seed, ride_factor=2)
+
+
+def _routes(instance, rng, count=200):
+    """
+    Random permutations (any order, so every kind of violation shows
+    up) and routes by window opening (mostly feasible).
+    """
+    s = instance["s"]
+    inner = [v for v in instance["V"] if v != s]
+    routes = []
+    for k in range(count):
+        if k % 2:
+            order = rng.sample(inner, len(inner))
+        else:
+            order = sorted(inner, key=lambda v: instance["open"][v] + rng.uniform(0, 10))
+        routes.append([s] + order[:rng.randint(1, len(order))])
+    return routes
+
+
+@pytest.mark.parametrize("name, instance", list(_cases()), ids=lambda v: v if isinstance(v, str) else "")
+def test_batch_matches_feasible(name, instance):
+    routes = _routes(instance, random.Random(name))
+    result = feasible_batch(routes, compile_instance(instance), chunk_size=64)
+
+    for k, route in enumerate(routes):
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = feasible(route, instance)
+        assert bool(result["feasible"][k]) == ok, (route, explain(result, k, routes))
+        assert (result["position"][k] == -1) == ok
+        assert (REASONS[result["reason"][k]] == "ok") == ok
+
+
+def test_unknown_node():
+    instance = instance_input.get_instance()
+    result = feasible_batch([[0, 1, 99, 3]], compile_instance(instance))
+    assert explain(result, 0) == "unknown_node at position 2"
+
+
+def test_time_dependent_instance_is_rejected():
+    instance = instance_input.get_instance()
+    instance["T_profile"] = {(0, 1): [(0, 2), (50, 4)]}
+    with pytest.raises(ValueError):
+        feasible_batch([[0, 1, 2, 3, 4]], compile_instance(instance))
+
+
+def test_shared_nodes_are_rejected():
+    # one delivery node for three requests: the compiled instance keeps
+    # only one of them per node, so a batch verdict would be wrong
+    instance = instance_input.get_instance_multi_same_delivery()
+    instance["close"] = {v: 1000 for v in instance["V"]}
+    route = [0, 1, 5, 2, 3, 5]
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert feasible(route, instance)
+    with pytest.raises(ValueError):
+        feasible_batch([route], compile_instance(instance))
@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import genetic_search
+from genetic_search import PDP_HYBRID_GENETIC
+from instance_input import generate_instance
+from route_state import route_feasible
+
+
+def test_inline_island_returns_a_feasible_route():
+    instance = generate_instance(6, seed=2)
+    route, info = PDP_HYBRID_GENETIC(instance, islands=1, population=6, time_budget=0.5)
+    assert route is not None
+    assert route_feasible(route, instance)
+    assert info["islands"][0]["error"] is None
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="the crashing island is patched in before fork")
+def test_crashed_island_does_not_hang_the_caller(monkeypatch):
+    island = genetic_search._island
+
+    def crash_second(instance, k, *args):
+        if k == 1:
+            os._exit(3)
+        return island(instance, k, *args)
+
+    monkeypatch.setattr(genetic_search, "_island", crash_second)
+
+    instance = generate_instance(6, seed=2)
+    started = time.time()
+    route, info = PDP_HYBRID_GENETIC(instance, islands=2, population=6,
+                                     time_budget=1.0, migration_interval=0.2)
+
+    assert time.time() - started < 1.0 + genetic_search._GRACE
+    assert route is not None
+    assert info["islands"][0]["error"] is None
+    assert info["islands"][1]["error"] == "exit code 3"
@@ -0,0 +1,18 @@
+import json
+
+from instance_input import get_instance
+from instance_json import instance_from_json, instance_to_json
+
+
+def _round_trip(instance):
+    return instance_from_json(json.loads(json.dumps(instance_to_json(instance))))
+
+
+def test_round_trip_restores_keys_and_sets():
+    instance = dict(get_instance(), max_ride={1: 10, 2: 8})
+    assert _round_trip(instance) == instance
+
+
+def test_ride_limit_may_be_none():
+    instance = dict(get_instance(), max_ride=None)
+    assert _round_trip(instance) == instance
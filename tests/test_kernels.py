@@ -0,0 +1,94 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+import instance_input
+import kernels
+from distance import total_distance
+from feasibility import feasible
+from instance_compile import compile_instance
+from visits import serves_all
+
+FIXTURES = sorted(
+    name for name in dir(instance_input)
+    if name.startswith("get_instance") and name != "get_instance_infeasible"
+)
+
+# the compiled kernels and the plain Python code they are built from
+# (without Numba there is only the Python code)
+IMPLEMENTATIONS = {
+    "python": (getattr(kernels._route_cost, "py_func", kernels._route_cost),
+               getattr(kernels._arrival_times, "py_func", kernels._arrival_times)),
+}
+if kernels.HAVE_NUMBA:
+    IMPLEMENTATIONS["compiled"] = (kernels._route_cost, kernels._arrival_times)
+
+
+def _time_window_instance(instance):
+    # only windows left, so FEASIBLE() and the arrival-time kernel
+    # check the same thing on routes that serve every request
+    instance = dict(instance, paired_sets=[])
+    instance.pop("max_ride", None)
+    instance.pop("max_duration", None)
+    return instance
+
+
+def _routes(instance, rng, count=30):
+    """
+    Routes over every node that serve every request, ordered by
+    window opening plus noise (so some keep their windows).
+    """
+    s, e = instance["s"], instance["e"]
+    inner = [v for v in instance["V"] if v not in (s, e)]
+    routes = []
+    for _ in range(count * 20):
+        noise = rng.choice([0, 5, 50])
+        order = sorted(inner, key=lambda v: instance["open"][v] + rng.uniform(0, noise))
+        route = [s] + order + ([e] if e is not None else [])
+        if serves_all(route, instance, instance["R"]):
+            routes.append(route)
+            if len(routes) == count:
+                break
+    return routes
+
+
+def _cases():
+    for name in FIXTURES:
+        yield name, _time_window_instance(getattr(instance_input, name)())
+    for seed in range(3):
+        yield f"generated_{seed}", instance_input.generate_instance(12, seed=seed, pair_fraction=0)
+
+
+@pytest.mark.parametrize("impl", sorted(IMPLEMENTATIONS))
+@pytest.mark.parametrize("name, instance", list(_cases()), ids=lambda v: v if isinstance(v, str) else "")
+def test_kernels_match_reference(impl, name, instance):
+    route_cost, arrival_times = IMPLEMENTATIONS[impl]
+    compiled = compile_instance(instance)
+    n = compiled["n"]
+    routes = _routes(instance, random.Random(name))
+    assert routes
+
+    verdicts = set()
+    for route in routes:
+        pos = kernels.route_positions(route, compiled)
+        m = len(pos)
+
+        cost = route_cost(pos, m, n, compiled["c"])
+        assert cost == pytest.approx(total_distance(route, instance["c"], instance["V"]))
+
+        start = kernels.array("d", [0.0]) * m
+        k = arrival_times(pos, m, n, compiled["T"], compiled["service"],
+                          compiled["open"], compiled["close"], start)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = feasible(route, instance)
+        assert (k == -1) == ok
+        verdicts.add(ok)
+    if name.startswith("get_instance"):
+        assert True in verdicts
+
+
+def test_parity_check():
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert kernels.parity_check(routes_per_instance=5) == []
@@ -0,0 +1,65 @@
+import contextlib
+import io
+from array import array
+
+from instance_input import generate_instance, get_instance, get_instance_infeasible
+from memory_budget import MEMO_ENTRY_BYTES, compact_instance, estimate_memory, fit_budget
+from solver import PDP_GREEDY_INSERT_2OPT
+
+
+def _solve(instance, **kw):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PDP_GREEDY_INSERT_2OPT(instance, **kw)
+
+
+def test_compact_instance_keeps_shared_matrix_and_indexing():
+    instance = get_instance_infeasible()
+    assert instance["c"] is instance["T"]
+
+    compact = compact_instance(instance)
+    assert compact["c"] is compact["T"]
+    assert all(isinstance(row, array) for row in compact["c"])
+    n = len(instance["V"])
+    assert all(compact["c"][i][j] == instance["c"][i][j] for i in range(n) for j in range(n))
+
+    assert compact_instance(compact) is compact
+    assert instance["c"] is instance["T"] and isinstance(instance["c"][0], list)
+
+
+def test_compact_instance_keeps_separate_matrices_apart():
+    compact = compact_instance(get_instance())
+    assert compact["c"] is not compact["T"]
+    assert compact["T"][1][4] == 3.0
+
+
+def test_shrinking_budget_limits_memo_then_fails():
+    instance = generate_instance(20, seed=0)
+    full = estimate_memory(instance)["total"]
+    assert fit_budget(instance, full) == (instance, 100000, [])
+
+    fixed = estimate_memory(compact_instance(instance), 0)["total"]
+    assert fixed < full
+
+    tight, entries, plan = fit_budget(instance, fixed + 10 * MEMO_ENTRY_BYTES)
+    assert entries == 10
+    assert plan == ["typed matrix rows", "route memo limited to 10 entries"]
+    assert isinstance(tight["c"][0], array)
+
+    assert fit_budget(instance, fixed)[1] == 0
+
+    none, _, message = fit_budget(instance, fixed - 1)
+    assert none is None
+    assert message.startswith("memory budget of") and "too small" in message
+    assert _solve(instance, memory_budget=fixed - 1) == (None, message)
+
+
+def test_budget_keeps_the_route():
+    instance = generate_instance(12, seed=3, slack=300)
+    expected = _solve(instance)
+    assert expected[0] is not None
+
+    assert _solve(instance, memory_budget=2 ** 30) == expected
+
+    # typed rows and a small memo change nothing but memory
+    fixed = estimate_memory(compact_instance(instance), 0)["total"]
+    assert _solve(instance, memory_budget=fixed + 50 * MEMO_ENTRY_BYTES) == expected
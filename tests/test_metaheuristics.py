@@ -0,0 +1,66 @@
+import contextlib
+import io
+import random
+
+from distance import total_distance
+from instance_input import generate_instance, get_instance_large
+from metaheuristics import (
+    IMPROVE_TABU, _added_arcs, _apply, _new_search, _random_move, _removed_arcs,
+)
+from route_state import build_state, route_feasible
+from solver import PDP_GREEDY_INSERT_2OPT
+
+
+def _greedy(instance):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PDP_GREEDY_INSERT_2OPT(instance)[1]
+
+
+def test_relocate_arcs_cover_both_ends_of_the_move():
+    search = _new_search(get_instance_large(), list(range(0, 21)))
+    # take node 3 (index 3) out and put it at index 7 of the shortened route
+    move = ("move", 3, 7)
+    assert set(_removed_arcs(search, move)) == {(2, 3), (3, 4), (7, 8)}
+    assert set(_added_arcs(search, move)) == {(2, 4), (7, 3), (3, 8)}
+
+
+def test_moving_a_relocated_node_on_is_tabu():
+    search = _new_search(get_instance_large(), list(range(0, 21)))
+    forward = ("move", 3, 7)
+    removed = set(_removed_arcs(search, forward))
+    _apply(search, forward)
+    # node 3 sits between 7 and 8 now; taking it out again re-creates
+    # the arc (7, 8) the first move broke
+    onward = ("move", 7, 12)
+    assert (7, 8) in removed & set(_added_arcs(search, onward))
+
+
+def test_incremental_update_matches_full_rebuild():
+    instance = generate_instance(12, seed=4)
+    instance["max_ride"] = {r: 10 ** 4 for r in instance["R"]}
+    instance["max_duration"] = 10 ** 6
+    search = _new_search(instance, _greedy(instance))
+    rng = random.Random(1)
+
+    for _ in range(200):
+        move = _random_move(search, rng)
+        if move is None:
+            break
+        _apply(search, move)
+
+        fresh = _new_search(instance, search["route"])
+        assert search["fwd"] == fresh["fwd"]
+        assert search["rev"] == fresh["rev"]
+        assert search["cost"] == total_distance(search["route"], instance["c"], instance["V"])
+        full = build_state(search["route"], instance)
+        for key in ("start", "latest", "slack", "ride_room", "duration_room"):
+            assert search["state"][key] == full[key], key
+
+
+def test_tabu_returns_a_feasible_route_no_worse_than_its_start():
+    instance = generate_instance(10, seed=5)
+    route = _greedy(instance)
+    with contextlib.redirect_stdout(io.StringIO()):
+        best = IMPROVE_TABU(instance, route, time_budget=5.0, max_iterations=200)
+    assert route_feasible(best, instance)
+    assert total_distance(best, instance["c"], instance["V"]) <= total_distance(route, instance["c"], instance["V"])
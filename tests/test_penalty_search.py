@@ -0,0 +1,58 @@
+import contextlib
+import io
+
+from feasibility import feasible
+from instance_input import generate_instance, get_instance
+from penalty_search import PDP_PENALTY_SEARCH
+from route_state import violations
+from solver import PDP_GREEDY_INSERT_2OPT
+
+
+def _quiet(fn, *args, **kw):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kw)
+
+
+def test_over_constrained_instance_reports_violations():
+    # every route serving both requests lasts longer than 5
+    instance = dict(get_instance(), max_duration=5)
+    result = {}
+    greedy, message = _quiet(PDP_GREEDY_INSERT_2OPT, instance, soft=0.2, result=result)
+
+    assert greedy is None
+    assert message.startswith("instance infeasible")
+
+    route, report = result["route"], result["violations"]
+    assert sorted(route) == [0, 1, 2, 3, 4]
+    assert not report["feasible"]
+    assert report["duration"] > 0
+    assert not report["late"] and not report["precedence"] and not report["pairing"]
+    assert report == dict(violations(route, instance), cost=report["cost"])
+
+
+def test_stuck_greedy_recovers_a_feasible_route():
+    # greedy insertion alone gets stuck here
+    instance = generate_instance(10, seed=0, slack=30)
+    assert _quiet(PDP_GREEDY_INSERT_2OPT, instance)[0] is None
+
+    result = {}
+    greedy, final = _quiet(PDP_GREEDY_INSERT_2OPT, instance, soft=5.0, result=result)
+
+    assert "violations" not in result
+    assert _quiet(feasible, final, instance)
+    assert sorted(final) == sorted(instance["V"])
+    assert violations(final, instance)["feasible"]
+
+
+def test_feasible_instance_has_no_violations():
+    instance = get_instance()
+    result = {}
+    soft = _quiet(PDP_GREEDY_INSERT_2OPT, instance, soft=True, result=result)
+
+    assert soft == _quiet(PDP_GREEDY_INSERT_2OPT, instance)
+    assert "violations" not in result and "penalty_search" not in result["timings"]
+
+    route, report = _quiet(PDP_PENALTY_SEARCH, instance, time_budget=1.0)
+    assert report["feasible"]
+    assert report["late"] == report["precedence"] == report["pairing"] == report["ride"] == []
+    assert report["lateness"] == report["duration"] == 0
@@ -0,0 +1,69 @@
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+import perf_regression
+
+timing = pytest.mark.skipif(not os.environ.get("PDP_PERF"), reason="timing checks are opt-in: set PDP_PERF=1")
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    if not os.path.exists(perf_regression.BASELINE_PATH):
+        pytest.skip("no perf_baseline.json: run perf_regression.py --update")
+    with open(perf_regression.BASELINE_PATH) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def report(baseline):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return perf_regression.run(baseline["settings"])
+
+
+@pytest.mark.perf
+@timing
+def test_growth_exponents(report, baseline):
+    # machine-independent: only the shape of the timing curve
+    only_exponents = dict(baseline, rows=[])
+    assert perf_regression.check(report, only_exponents) == []
+
+
+@pytest.mark.perf
+@timing
+def test_times_and_costs(report, baseline):
+    # times relative to the calibration workload, absolute times only
+    # if the baseline was recorded on this machine
+    assert perf_regression.check(report, baseline) == []
+
+
+def test_baseline_gates_every_phase(baseline):
+    for phase in perf_regression.PHASES:
+        exponent = perf_regression.growth_exponent(baseline["rows"], phase)
+        assert exponent is not None
+        assert baseline["exponents"][phase] == exponent
+
+
+def _report(machine, unit, seconds, exponent=3.0):
+    row = {"n": 32, "feasible": True, "cost": 100, "calibration": unit,
+           "construction": seconds, "improvement": 0.0}
+    return {"machine": machine, "rows": [row],
+            "exponents": {"construction": exponent, "improvement": None}}
+
+
+def test_check_compares_absolute_times_on_the_same_machine_only():
+    baseline = _report("a", 0.01, 1.0)
+    # 3x slower, but on a machine that is 3x slower too
+    assert perf_regression.check(_report("b", 0.03, 3.0), baseline) == []
+    assert len(perf_regression.check(_report("a", 0.03, 3.0), baseline)) == 1
+    # 3x slower on an equally fast machine
+    assert len(perf_regression.check(_report("b", 0.01, 3.0), baseline)) == 1
+
+
+def test_check_gates_growth_exponents():
+    baseline = _report("a", 0.01, 1.0)
+    failures = perf_regression.check(_report("b", 0.01, 1.0, exponent=4.0), baseline)
+    assert [f.split(":")[0] for f in failures] == ["construction"]
@@ -0,0 +1,101 @@
+import contextlib
+import io
+import itertools
+
+import pytest
+
+from distance import total_distance
+from feasibility import feasible
+from instance_input import generate_instance, get_instance
+from preprocessing import arc_ok, preprocess, tightened_instance
+from solver import PDP_GREEDY_INSERT_2OPT
+
+
+def _feasible(route, instance):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return feasible(route, instance)
+
+
+def _solve(instance):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PDP_GREEDY_INSERT_2OPT(instance)
+
+
+def _feasible_routes(instance):
+    """Every feasible route of a small instance, by enumeration."""
+    s, e = instance["s"], instance["e"]
+    nodes = [v for v in instance["V"] if v not in (s, e)]
+    tail = [] if e is None else [e]
+    routes = []
+    for perm in itertools.permutations(nodes):
+        if all(perm.index(instance["pickup"][r]) < perm.index(instance["delivery"][r])
+               for r in instance["R"]):
+            route = [s, *perm, *tail]
+            if _feasible(route, instance):
+                routes.append(route)
+    return routes
+
+
+def _instances():
+    for seed in range(4):
+        yield generate_instance(3, seed=seed, slack=60)
+        # closed route back to the start depot
+        instance = generate_instance(3, seed=seed, slack=60)
+        instance["e"] = 0
+        yield instance
+
+
+@pytest.mark.parametrize("instance", list(_instances()))
+def test_preprocessing_keeps_every_feasible_route(instance):
+    prep = preprocess(instance)
+    tight = tightened_instance(instance, prep)
+    routes = _feasible_routes(instance)
+    assert routes and prep["infeasible"] is None
+
+    for route in routes:
+        # tightened windows do not cut the schedule off ...
+        assert _feasible(route, tight)
+        # ... and no arc of it was pruned
+        assert all(arc_ok(prep, i, j) for i, j in zip(route, route[1:]))
+
+
+def test_pruned_arcs_are_infeasible():
+    instance = generate_instance(3, seed=2, slack=60)
+    prep = preprocess(instance)
+    used = {arc for route in _feasible_routes(instance) for arc in zip(route, route[1:])}
+    pruned = {(i, j) for i in instance["V"] for j in instance["V"] if not arc_ok(prep, i, j)}
+
+    assert pruned
+    assert not used & pruned
+
+
+def test_empty_window_is_reported_up_front():
+    # pickup 1 is reached at 2 at the earliest, its delivery closes at 4
+    instance = get_instance()
+    instance["close"] = {**instance["close"], 3: 4}
+
+    prep = preprocess(instance)
+    assert prep["infeasible"].startswith("instance infeasible (time window of node")
+    assert _solve(instance) == (None, prep["infeasible"])
+
+
+def test_closed_route_keeps_its_return_depot():
+    instance = dict(get_instance(), e=0)
+    instance["close"] = {**instance["close"], 0: 1000}
+
+    greedy, final = _solve(instance)
+
+    for route in (greedy, final):
+        assert route[0] == route[-1] == 0
+        assert sorted(route[1:-1]) == [1, 2, 3, 4]
+        assert _feasible(route, instance)
+
+
+def test_pruning_lets_greedy_finish():
+    # infeasible for the greedy insertion before arc pruning
+    instance = generate_instance(30, seed=2, slack=300)
+    greedy, final = _solve(instance)
+
+    assert _feasible(final, instance)
+    assert total_distance(greedy, instance["c"], instance["V"]) == 1233
+    assert total_distance(final, instance["c"], instance["V"]) == 1167
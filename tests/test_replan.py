@@ -0,0 +1,57 @@
+import contextlib
+import io
+
+from feasibility import feasible
+from instance_input import get_instance, get_instance_large
+from replan import REPLAN
+from visits import serves_all
+
+
+def _replan(instance, route, **kw):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return REPLAN(instance, route, **kw)
+
+
+def _feasible(route, instance):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return feasible(route, instance)
+
+
+def test_add_request():
+    instance = get_instance()
+    route, rejected = _replan(instance, [0, 1, 3], add=[2])
+    assert rejected == []
+    assert sorted(route) == [0, 1, 2, 3, 4]
+    assert _feasible(route, instance)
+
+
+def test_cancel_request():
+    route, rejected = _replan(get_instance(), [0, 1, 2, 3, 4], cancel=[2])
+    assert (route, rejected) == ([0, 1, 3], [])
+
+
+def test_cancel_after_pickup_keeps_delivery():
+    # pickup 1 is executed: the load is on board, so 3 stays
+    route, _ = _replan(get_instance(), [0, 1, 2, 3, 4], cancel=[1], position=1, now=2)
+    assert route == [0, 1, 2, 3, 4]
+
+
+def test_frozen_prefix():
+    instance = get_instance_large()
+    route = list(range(21))
+    # 0..5 executed; the paired set {8, 9, 10} re-enters as new requests
+    base, _ = _replan(instance, route, cancel=[8, 9, 10], position=5, now=9)
+    assert base == [0, 1, 2, 3, 4, 5, 6, 7, 11, 12, 13, 14, 15, 16, 17]
+
+    replanned, rejected = _replan(instance, base, add=[8, 9, 10], position=5, now=9)
+    assert rejected == []
+    assert replanned[:6] == route[:6]
+    assert _feasible(replanned, instance)
+    assert serves_all(replanned, instance, instance["R"])
+
+
+def test_reject_request_that_no_longer_fits():
+    instance = get_instance()
+    instance["close"] = {**instance["close"], 2: 5}
+    route, rejected = _replan(instance, [0, 1, 3], add=[2], position=2, now=9)
+    assert (route, rejected) == ([0, 1, 3], [2])
@@ -0,0 +1,78 @@
+import math
+import random
+
+import pytest
+
+from road_network import build_matrices, load_edge_list, nested
+
+
+def _random_graph(rng, n=12, edges=40):
+    graph = {u: [] for u in range(n)}
+    for _ in range(edges):
+        u, v = rng.sample(range(n), 2)
+        dist = rng.uniform(1, 20)
+        graph[u].append((v, dist, dist / rng.uniform(0.5, 2.0)))    # random speed
+    return graph
+
+
+def _floyd_warshall(graph, V, weight):
+    """Best path by weight; returns (distance, time) matrices along it."""
+    inf = math.inf
+    key = 2 if weight == "time" else 1
+    best = {(u, v): (0.0, 0.0, 0.0) if u == v else (inf, inf, inf) for u in V for v in V}
+    for u in V:
+        for v, dist, time in graph[u]:
+            if (0, dist, time)[key] < best[u, v][key]:
+                best[u, v] = (0, dist, time)
+    for k in V:
+        for i in V:
+            for j in V:
+                via = (0, best[i, k][1] + best[k, j][1], best[i, k][2] + best[k, j][2])
+                if via[key] < best[i, j][key]:
+                    best[i, j] = via
+    return ([[best[u, v][1] for v in V] for u in V],
+            [[best[u, v][2] for v in V] for u in V])
+
+
+@pytest.mark.parametrize("weight", ["time", "distance"])
+def test_parallel_rows_match_floyd_warshall(weight):
+    graph = _random_graph(random.Random(0))
+    V = sorted(graph)
+    parallel = build_matrices(graph, V, weight=weight, workers=3)
+    serial = build_matrices(graph, V, weight=weight, workers=1)
+    c, T = _floyd_warshall(graph, V, weight)
+
+    assert parallel == serial
+    assert list(parallel["c"]) == pytest.approx([x for row in c for x in row])
+    assert list(parallel["T"]) == pytest.approx([x for row in T for x in row])
+
+
+def test_unreachable_pairs_are_infinite():
+    graph = {0: [(1, 2.0, 2.0)], 1: [(0, 2.0, 2.0)], 2: [(0, 1.0, 1.0)]}
+    m = build_matrices(graph, [0, 1, 2], workers=1)
+    c = nested(m["c"], 3)
+
+    assert c[2] == [1.0, 3.0, 0.0]
+    assert c[0][2] == c[1][2] == math.inf
+    assert nested(m["T"], 3)[0][2] == math.inf
+
+
+def test_time_column_drives_the_fastest_path(tmp_path):
+    path = tmp_path / "roads.txt"
+    path.write_text(
+        "# from to distance time\n"
+        "a b 10 10   # slow direct road\n"
+        "a c 6 2\n"
+        "c b 6 2     # longer but faster\n"
+        "b a 7\n"    # time defaults to the distance
+    )
+    graph = load_edge_list(str(path))
+    assert graph["b"] == [("a", 7.0, 7.0)]
+
+    fastest = build_matrices(str(path), ["a", "b"], weight="time", workers=1)
+    assert list(fastest["c"]) == [0.0, 12.0, 7.0, 0.0]
+    assert list(fastest["T"]) == [0.0, 4.0, 7.0, 0.0]
+
+    shortest = build_matrices(graph, ["a", "b"], weight="distance", workers=1)
+    assert list(shortest["c"]) == [0.0, 10.0, 7.0, 0.0]
+    assert list(shortest["T"]) == [0.0, 10.0, 7.0, 0.0]
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from instance_input import generate_instance
+from route_memo import (
+    hash_route, insertion_hash, memo_get, memo_put, new_memo,
+    pair_insertion_hash, reversal_hash, route_hashes,
+)
+
+
+@pytest.fixture
+def memo():
+    return new_memo(generate_instance(10, seed=0))
+
+
+def _route(rng, memo, length):
+    return rng.sample(sorted(memo["key"]), length)
+
+
+@pytest.mark.parametrize("length", [1, 2, 5, 12])
+def test_trial_hashes_match_recomputation(memo, length):
+    rng = random.Random(length)
+    route = _route(rng, memo, length)
+    hashes = route_hashes(memo, route)
+    outside = [v for v in memo["key"] if v not in route]
+
+    for i in range(length + 1):
+        x = rng.choice(outside)
+        trial = route[:i] + [x] + route[i:]
+        assert insertion_hash(memo, hashes, i, x) == hash_route(memo, trial)
+
+    for i in range(length + 1):
+        for j in range(i + 1, length + 2):
+            p, d = rng.sample(outside, 2)
+            trial = route.copy()
+            trial.insert(i, p)
+            trial.insert(j, d)
+            assert pair_insertion_hash(memo, hashes, i, p, j, d) == hash_route(memo, trial)
+
+    for a in range(length):
+        for b in range(a, length):
+            trial = route[:a] + route[a:b + 1][::-1] + route[b + 1:]
+            assert reversal_hash(memo, hashes, a, b) == hash_route(memo, trial)
+
+
+def test_hash_depends_on_order(memo):
+    route = _route(random.Random(0), memo, 6)
+    seen = {hash_route(memo, route[k:] + route[:k]) for k in range(len(route))}
+    seen.add(hash_route(memo, route[::-1]))
+    assert len(seen) == len(route) + 1
+
+
+def test_lru_eviction_and_counts():
+    memo = new_memo(generate_instance(2, seed=0), max_entries=2)
+    memo_put(memo, (1, 3), (10.0,))
+    memo_put(memo, (2, 3), (None,))
+    assert memo_get(memo, (1, 3)) == (10.0,)      # (2, 3) is now the oldest
+    memo_put(memo, (3, 3), (12.0,))
+
+    assert memo_get(memo, (2, 3)) is None
+    assert memo_get(memo, (1, 3)) == (10.0,)
+    assert memo_get(memo, (3, 3)) == (12.0,)
+    assert (memo["hits"], memo["misses"]) == (3, 1)
@@ -0,0 +1,52 @@
+import multiprocessing
+
+import pytest
+
+import shared_instance
+from distance import total_distance
+from instance_input import get_instance, get_instance_large
+from shared_instance import attach_instance, map_shared, shared_instance as shared
+
+
+def _route_cost(instance, route):
+    return total_distance(route, instance["c"], instance["V"])
+
+
+def test_map_shared_matches_local_results():
+    instance = get_instance_large()
+    routes = [list(range(21)), [0, 2, 1, 12, 11], [0, 5]]
+    expected = [_route_cost(instance, r) for r in routes]
+    assert map_shared(_route_cost, instance, routes, workers=2) == expected
+
+
+def test_ride_limit_may_be_none():
+    instance = dict(get_instance(), max_ride=None)
+    with shared(instance) as handle:
+        view = attach_instance(handle)
+        assert not view.get("max_ride")
+        assert _route_cost(view, [0, 1, 2, 3, 4]) == _route_cost(instance, [0, 1, 2, 3, 4])
+
+
+def _child_view(handle, out):
+    inherited = len(shared_instance._ATTACHED)
+    instance = attach_instance(handle)
+    out.put((inherited, len(shared_instance._ATTACHED), instance["c"][1][2]))
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(),
+                    reason="needs fork")
+def test_forked_child_drops_inherited_mappings():
+    ctx = multiprocessing.get_context("fork")
+    instance = get_instance_large()
+    with shared(instance) as handle:
+        attach_instance(handle)
+        out = ctx.Queue()
+        child = ctx.Process(target=_child_view, args=(handle, out))
+        child.start()
+        inherited, attached, value = out.get(timeout=30)
+        child.join(timeout=30)
+
+    assert inherited == 0
+    assert attached == 1
+    assert value == instance["c"][1][2]
+    assert child.exitcode == 0
@@ -0,0 +1,98 @@
+import contextlib
+import io
+import sqlite3
+
+import solution_cache
+from instance_compile import fingerprint, structure_fingerprint
+from instance_input import generate_instance, get_instance_large
+from route_state import route_feasible
+from solution_cache import SOLVE_CACHED, cache_lookup_structure, cache_store
+
+
+def _solve(instance, path, **kw):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SOLVE_CACHED(instance, path, **kw)
+
+
+def _last_used(path):
+    with sqlite3.connect(path) as db:
+        return dict(db.execute("SELECT fingerprint, last_used FROM solutions"))
+
+
+def test_miss_then_hit(tmp_path):
+    path = str(tmp_path / "cache.db")
+    instance = generate_instance(6, seed=0)
+
+    greedy, final, status = _solve(instance, path)
+    assert status == "miss"
+
+    again = _solve(instance, path)
+    assert again == (final, final, "hit")
+
+
+def test_changed_windows_warm_start(tmp_path):
+    path = str(tmp_path / "cache.db")
+    instance = generate_instance(8, seed=2)
+    _solve(instance, path)
+
+    shifted = generate_instance(8, seed=2)
+    node = shifted["pickup"][1]
+    shifted["close"][node] += 5
+
+    greedy, final, status = _solve(shifted, path)
+    assert status == "warm"
+    assert route_feasible(final, shifted)
+
+
+def test_invalid_exact_hit_is_dropped(tmp_path):
+    path = str(tmp_path / "cache.db")
+    instance = get_instance_large()
+    key = fingerprint(instance)
+    # a route that misses requests and would be cheap to return
+    cache_store(path, key, structure_fingerprint(instance), [0, 1, 11], 2.0)
+
+    greedy, final, status = _solve(instance, path)
+    assert status != "hit"
+    assert final == list(range(21))
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    path = str(tmp_path / "cache.db")
+    a, b, c = (generate_instance(4, seed=s) for s in (0, 1, 2))
+
+    _solve(a, path, max_entries=2)
+    _solve(b, path, max_entries=2)
+    _solve(a, path, max_entries=2)          # a is now more recent than b
+    _solve(c, path, max_entries=2)
+
+    kept = set(_last_used(path))
+    assert kept == {fingerprint(a), fingerprint(c)}
+
+
+def test_structure_hit_refreshes_last_used(tmp_path):
+    path = str(tmp_path / "cache.db")
+    instance = generate_instance(4, seed=0)
+    _solve(instance, path)
+    key = fingerprint(instance)
+    before = _last_used(path)[key]
+
+    assert cache_lookup_structure(path, structure_fingerprint(instance)) is not None
+    assert _last_used(path)[key] > before
+
+
+def test_schema_is_set_up_once_per_file(tmp_path, monkeypatch):
+    calls = []
+    init = solution_cache._init_schema
+    monkeypatch.setattr(solution_cache, "_init_schema", lambda db: calls.append(db) or init(db))
+
+    path = tmp_path / "cache.db"
+    instance = generate_instance(4, seed=0)
+    _solve(instance, str(path))
+    _solve(instance, str(path))
+    assert len(calls) == 1
+
+    # another file, and the same file after it was removed
+    _solve(instance, str(tmp_path / "other.db"))
+    path.unlink()
+    assert _solve(instance, str(path))[2] == "miss"
+    assert len(calls) == 3
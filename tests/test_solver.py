@@ -0,0 +1,89 @@
+import contextlib
+import io
+
+import pytest
+
+import instance_input
+import solver
+from bounds import lower_bound
+from distance import total_distance
+from exact_search import PDP_EXACT
+from solver import PDP_GREEDY_INSERT_2OPT
+
+# (greedy route, route after 2-opt) per fixture. Block insertion of
+# pairing groups changed the greedy route of complex_tw_pairing; 2-opt
+# still ends at the same route.
+FIXTURE_ROUTES = {
+    "get_instance": ([0, 1, 2, 3, 4], [0, 1, 2, 3, 4]),
+    "get_instance_tight_tw": ([0, 1, 2, 3, 4], [0, 1, 2, 3, 4]),
+    "get_instance_with_pairing": ([0, 1, 2, 5, 6, 7, 8], [0, 1, 2, 5, 6, 7, 8]),
+    "get_instance_pairing_hard": ([0, 1, 2, 3, 6, 5, 4], [0, 1, 2, 3, 6, 5, 4]),
+    "get_instance_multi_same_delivery": ([0, 1, 2, 3, 5], [0, 1, 2, 3, 5]),
+    "get_instance_large": (list(range(21)), list(range(21))),
+    "get_instance_complex_tw_pairing": (
+        [0, 1, 2, 3, 4, 12, 11, 10, 13],
+        [0, 1, 2, 3, 4, 10, 11, 12, 13],
+    ),
+}
+
+
+def _solve(instance, **kw):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PDP_GREEDY_INSERT_2OPT(instance, **kw)
+
+
+@pytest.mark.parametrize("name", sorted(FIXTURE_ROUTES))
+def test_fixture_routes(name):
+    greedy, final = _solve(getattr(instance_input, name)())
+    assert (greedy, final) == FIXTURE_ROUTES[name]
+
+
+def test_infeasible_fixture():
+    greedy, final = _solve(instance_input.get_instance_infeasible())
+    assert greedy is None
+    assert final.startswith("instance infeasible")
+
+
+def test_result_alone_does_not_compute_the_bound(monkeypatch):
+    calls = []
+    monkeypatch.setattr(solver, "lower_bound", lambda instance: calls.append(1) or {"bound": 0.0})
+
+    result = {}
+    _solve(instance_input.get_instance_large(), result=result)
+    assert not calls
+    assert "timings" in result and "lower_bound" not in result
+
+    _solve(instance_input.get_instance_large(), result=result, bound=True)
+    assert calls
+    assert "lower_bound" in result and "gap" in result
+
+
+def _small_instances():
+    for name in ("get_instance", "get_instance_tight_tw", "get_instance_with_pairing",
+                 "get_instance_pairing_hard", "get_instance_multi_same_delivery"):
+        yield getattr(instance_input, name)()
+    for seed in range(4):
+        yield instance_input.generate_instance(4, seed=seed, slack=100, pair_fraction=0.5)
+    closed = instance_input.generate_instance(4, seed=5, slack=300)
+    closed["e"] = 0
+    yield closed
+
+
+@pytest.mark.parametrize("instance", list(_small_instances()))
+def test_lower_bound_never_exceeds_the_optimum(instance):
+    with contextlib.redirect_stdout(io.StringIO()):
+        route, _ = PDP_EXACT(instance)
+    optimum = total_distance(route, instance["c"], instance["V"])
+
+    bounds = lower_bound(instance)
+    assert bounds["bound"] == max(bounds["tree"], bounds["assignment"])
+    assert 0 < bounds["bound"] <= optimum + 1e-9
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_kernel_pricing_keeps_routes(seed, monkeypatch):
+    # moves priced out by the kernels are never ones the solver takes
+    instance = instance_input.generate_instance(15, seed=seed, slack=300)
+    priced = _solve(instance)
+    monkeypatch.setattr(solver, "compile_instance", lambda instance: None)
+    assert _solve(instance) == priced
@@ -0,0 +1,106 @@
+import contextlib
+import io
+import itertools
+
+import pytest
+
+from distance import total_distance
+from exact_search import PDP_EXACT
+from feasibility import feasible
+from instance_input import generate_instance, get_instance, get_instance_large
+from strategy import SELECT_STRATEGY, SOLVE_AUTO
+
+# est(n) = 1 s at 32 requests, cubic
+CALIBRATION = {"n": 32, "seconds": 1.0, "exponent": 3.0}
+
+
+def _quiet(fn, *args, **kw):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kw)
+
+
+def _cost(route, instance):
+    return total_distance(route, instance["c"], instance["V"])
+
+
+def _brute_force(instance):
+    """Cheapest feasible route over every order of the request nodes."""
+    nodes = sorted({instance["pickup"][r] for r in instance["R"]}
+                   | {instance["delivery"][r] for r in instance["R"]})
+    tail = [] if instance["e"] is None else [instance["e"]]
+    best = None
+    for perm in itertools.permutations(nodes):
+        route = [instance["s"], *perm, *tail]
+        if _quiet(feasible, route, instance):
+            cost = _cost(route, instance)
+            best = cost if best is None else min(best, cost)
+    return best
+
+
+@pytest.mark.parametrize("instance", [
+    get_instance(),
+    generate_instance(3, seed=0, slack=60),
+    generate_instance(3, seed=1, slack=60, ride_factor=2.0),
+    generate_instance(4, seed=2, slack=60, pair_fraction=0.5),
+])
+def test_exact_matches_brute_force(instance):
+    route, final = _quiet(PDP_EXACT, instance)
+    assert route == final
+    assert _quiet(feasible, route, instance)
+    assert _cost(route, instance) == _brute_force(instance)
+
+
+def test_exact_refuses_large_instances():
+    assert _quiet(PDP_EXACT, get_instance_large(), max_requests=6) == (
+        None, "exact search limited to 6 requests")
+
+
+def test_small_instance_goes_to_exact():
+    config = SELECT_STRATEGY(get_instance(), calibration=CALIBRATION)
+    assert config["engine"] == "exact"
+
+
+def test_medium_instance_goes_to_greedy():
+    # 10 requests: well inside the greedy budget, too many for exact
+    config = SELECT_STRATEGY(get_instance_large(), time_budget=10.0, workers=1,
+                             calibration=CALIBRATION)
+    assert config["engine"] == "greedy"
+
+
+def test_large_instance_goes_to_decomposition():
+    instance = generate_instance(200, seed=0)
+    config = SELECT_STRATEGY(instance, time_budget=10.0, workers=4, calibration=CALIBRATION)
+
+    assert config["engine"] == "decomposed"
+    size = config["params"]["cluster_size"]
+    assert 10 <= size < 200
+    # every cluster fits the budget split over the workers
+    clusters = -(-200 // size)
+    assert CALIBRATION["seconds"] * (size / 32) ** 3 * clusters / 4 <= 5.0
+
+
+def test_tight_windows_go_to_genetic_on_several_workers():
+    instance = generate_instance(20, seed=0, slack=1)
+    config = SELECT_STRATEGY(instance, workers=2, calibration=CALIBRATION)
+    assert config["engine"] == "genetic"
+
+    config = SELECT_STRATEGY(instance, workers=1, calibration=CALIBRATION)
+    assert config["engine"] == "greedy"
+    assert config["params"] == {"soft": True}
+
+
+def test_solve_auto_runs_the_selected_engine():
+    small = get_instance()
+    result = {}
+    route, final = _quiet(SOLVE_AUTO, small, result=result)
+    assert result["strategy"]["engine"] == "exact"
+    assert _cost(final, small) == _brute_force(small)
+
+    # a tiny budget pushes 40 requests into decomposition
+    large = generate_instance(40, seed=1, slack=300)
+    result = {}
+    route, final = _quiet(SOLVE_AUTO, large, time_budget=1e-4, workers=2, result=result)
+    assert result["strategy"]["engine"] == "decomposed"
+    assert "fallback" not in result["strategy"]
+    assert _quiet(feasible, final, large)
+    assert sorted(final) == sorted(large["V"])
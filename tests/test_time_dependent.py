@@ -0,0 +1,68 @@
+import contextlib
+import io
+
+import pytest
+
+from feasibility import feasible
+from instance_input import get_instance
+from time_dependent import latest_departure, make_profile, travel
+
+ROUTE = [0, 1, 2, 3, 4]
+
+
+def _feasible(route, instance):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return feasible(route, instance)
+
+
+@pytest.mark.parametrize("departures, travel_times, message", [
+    ([0, 10], [30, 15], "not FIFO"),              # leaving later arrives earlier
+    ([0, 10, 10], [5, 5, 5], "strictly increasing"),
+    ([0, 10], [5], "same, non-zero number"),
+    ([], [], "same, non-zero number"),
+])
+def test_make_profile_rejects_bad_breakpoints(departures, travel_times, message):
+    with pytest.raises(ValueError, match=message):
+        make_profile(departures, travel_times)
+
+
+def test_travel_interpolates_between_breakpoints():
+    profile = make_profile([0, 10, 20], [5, 15, 5])
+    # out of order on purpose: the segment cache must not go stale
+    for depart, expected in [(15, 10), (-3, 5), (5, 10), (10, 15), (19, 6), (2, 7), (25, 5)]:
+        assert travel(profile, depart) == pytest.approx(expected)
+
+
+def test_latest_departure_inverts_travel():
+    profile = make_profile([0, 10, 20, 30], [5, 12, 6, 6])
+    for depart in [-5, 0, 3, 10, 12.5, 20, 27, 40]:
+        arrive = depart + travel(profile, depart)
+        assert latest_departure(profile, arrive) == pytest.approx(depart)
+
+
+def test_latest_departure_on_a_flat_arrival_piece():
+    # arrival stays at 20 while leaving between 0 and 10
+    profile = make_profile([0, 10], [20, 10])
+    assert latest_departure(profile, 20) == pytest.approx(10)
+    assert latest_departure(profile, 19) == pytest.approx(-1)
+
+
+def test_profile_makes_a_route_late():
+    instance = get_instance()
+    instance["close"] = {**instance["close"], 2: 10}
+    assert _feasible(ROUTE, instance)
+
+    # leaving node 1 at 2 takes 18.4 instead of T = 4
+    instance["T_profile"] = {(1, 2): make_profile([0, 20], [20, 4])}
+    assert not _feasible(ROUTE, instance)
+
+
+def test_profile_makes_a_route_feasible():
+    instance = get_instance()
+    instance["T"] = [list(row) for row in instance["T"]]
+    instance["T"][1][2] = 20
+    instance["close"] = {**instance["close"], 2: 10}
+    assert not _feasible(ROUTE, instance)
+
+    instance["T_profile"] = {(1, 2): make_profile([0], [4])}
+    assert _feasible(ROUTE, instance)
@@ -0,0 +1,75 @@
+import contextlib
+import io
+
+import replan
+import solver
+from feasibility import feasible
+from instance_input import get_instance, get_instance_multi_same_delivery
+from route_state import build_state
+from visits import merge_colocated, serve, serves_all, shared_nodes
+
+
+def _hub_instance():
+    # both requests are picked up at node 1 (node 2 stays unused)
+    instance = get_instance()
+    instance["pickup"] = {1: 1, 2: 1}
+    return instance
+
+
+def _quiet(fn, *args, **kw):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kw)
+
+
+def test_merge_colocated():
+    assert merge_colocated([0, 1, 1, 3, 3, 3, 4]) == [0, 1, 3, 4]
+    assert merge_colocated([0, 1, 3, 1]) == [0, 1, 3, 1]
+
+
+def test_one_stop_serves_every_visit_at_its_node():
+    instance = _hub_instance()
+    assert shared_nodes(instance)
+    served = serve([0, 1, 3, 4], instance)
+    assert served["stops"][1] == [(1, 0), (2, 0)]
+    assert served["delivery"] == {1: 2, 2: 3}
+
+    instance = get_instance_multi_same_delivery()
+    served = serve([0, 1, 2, 3, 5], instance)
+    assert served["stops"][4] == [(1, 1), (2, 1), (3, 1)]
+
+
+def test_delivery_before_pickup_is_blocked():
+    instance = get_instance_multi_same_delivery()
+    served = serve([0, 1, 5, 2, 3], instance)
+    assert served["delivery"] == {1: 2}
+    assert served["blocked"] == []                    # stop 2 delivered r=1
+    assert not serves_all([0, 1, 5, 2, 3], instance, instance["R"])
+
+    served = serve([0, 5, 1], instance)
+    assert served["blocked"] == [(1, 5, 1, [1])]
+
+
+def test_solver_visits_shared_pickup_once():
+    instance = _hub_instance()
+    greedy, final = _quiet(solver.PDP_GREEDY_INSERT_2OPT, instance)
+    assert final.count(1) == 1
+    assert serves_all(final, instance, instance["R"])
+    assert _quiet(feasible, final, instance)
+
+
+def test_solver_merges_consecutive_stops():
+    instance = _hub_instance()
+    assert _quiet(solver._merge_stops, [0, 1, 1, 3, 4], instance) == [0, 1, 3, 4]
+    assert _quiet(solver._merge_stops, [0, 1, 3, 4], instance) == [0, 1, 3, 4]
+
+
+def test_replan_merges_into_the_executed_stop():
+    instance = _hub_instance()
+    route, rejected = _quiet(replan.REPLAN, instance, [0, 1, 3], add=[2], position=1, now=2)
+    assert rejected == []
+    assert route.count(1) == 1
+    assert serves_all(route, instance, instance["R"])
+
+    state = build_state([0, 1, 1, 3, 4], instance, 2, 2)
+    merged = _quiet(replan._merge_stops, state, instance, 2, 2)
+    assert merged["route"] == [0, 1, 3, 4]
@@ -0,0 +1,111 @@
+# -------------------------------------------------------------
+# Time-dependent travel times
+#
+# An instance may carry an optional field
+#
+#     "T_profile": {(i, j): profile, ...}     // node ids, like open/close
+#
+# where a profile is a piecewise-linear travel time as a function of
+# the departure time from i, stored as breakpoint arrays:
+#
+#     t[0] < t[1] < ... < t[m-1]      departure times
+#     tau[k]                          travel time when leaving at t[k]
+#
+# constant before t[0] and after t[m-1]. Arcs without a profile use
+# the static T[i][j]. Profiles must be FIFO (leaving later never
+# arrives earlier): tau[k+1] - tau[k] >= -(t[k+1] - t[k]).
+#
+# TRAVEL(profile, depart):
+#     k = cached segment of the last lookup on this arc
+#     if depart not in [t[k], t[k+1]): k = BINARY_SEARCH(t, depart)
+#     interpolate tau between t[k] and t[k+1]
+#
+# LATEST_DEPARTURE(profile, arrive_by):
+#     arrival a(t) = t + tau(t) is non-decreasing (FIFO), so binary
+#     search a[] and invert the linear piece.
+# -------------------------------------------------------------
+
+from array import array
+from bisect import bisect_right
+
+
+def make_profile(departures, travel_times):
+    """
+    Build a profile from breakpoint lists. Raises ValueError if the
+    breakpoints are not increasing or the profile is not FIFO.
+    """
+    t = array("d", departures)
+    tau = array("d", travel_times)
+
+    if len(t) == 0 or len(t) != len(tau):
+        raise ValueError("profile needs the same, non-zero number of departures and travel times")
+
+    for k in range(len(t) - 1):
+        if t[k + 1] <= t[k]:
+            raise ValueError("profile departure times must be strictly increasing")
+        if tau[k + 1] - tau[k] < -(t[k + 1] - t[k]):
+            raise ValueError(f"profile is not FIFO between t={t[k]} and t={t[k + 1]}")
+
+    a = array("d", [t[k] + tau[k] for k in range(len(t))])
+
+    return {"t": t, "tau": tau, "a": a, "hint": 0}
+
+
+def travel(profile, depart):
+    """
+    Travel time when leaving at time depart.
+    """
+    t = profile["t"]
+    tau = profile["tau"]
+
+    if depart <= t[0]:
+        return tau[0]
+    if depart >= t[-1]:
+        return tau[-1]
+
+    # per-arc cache: consecutive lookups on an arc are usually in the
+    # same or a nearby segment
+    k = profile["hint"]
+    if not (t[k] <= depart < t[k + 1]):
+        k = bisect_right(t, depart) - 1
+        profile["hint"] = k
+
+    span = t[k + 1] - t[k]
+    return tau[k] + (tau[k + 1] - tau[k]) * (depart - t[k]) / span
+
+
+def latest_departure(profile, arrive_by):
+    """
+    Latest departure time that arrives no later than arrive_by.
+    """
+    t = profile["t"]
+    tau = profile["tau"]
+    a = profile["a"]
+
+    if arrive_by < a[0]:
+        return arrive_by - tau[0]
+    if arrive_by >= a[-1]:
+        return arrive_by - tau[-1]
+
+    k = bisect_right(a, arrive_by) - 1
+    rise = a[k + 1] - a[k]
+    if rise == 0:
+        return t[k + 1]
+    return t[k] + (arrive_by - a[k]) * (t[k + 1] - t[k]) / rise
+
+
+def min_travel_matrix(instance):
+    """
+    T with every profiled arc replaced by its smallest travel time,
+    for bounds that must hold at any departure time. Returns T itself
+    when the instance has no profiles.
+    """
+    profiles = instance.get("T_profile")
+    if not profiles:
+        return instance["T"]
+
+    index = {v: idx for idx, v in enumerate(instance["V"])}
+    T = [list(row) for row in instance["T"]]
+    for (i, j), profile in profiles.items():
+        T[index[i]][index[j]] = min(profile["tau"])
+    return T
@@ -0,0 +1,160 @@
+# -------------------------------------------------------------
+# Visits: requests served at each stop of a route
+#
+# A visit is one (node, request, role) entity: role 0 picks up
+# request r at p(r), role 1 delivers it at d(r). Several requests may
+# share a node (hubs, multi-drop depots); their visits share the
+# node's matrix row, time window and service time.
+#
+# A route is still a list of nodes. Each stop serves visits:
+#
+# SERVE(route):
+#     picked = delivered = empty
+#     for each stop k at node v:
+#         pick up every request r with p(r) = v not picked yet
+#         then deliver every request r with d(r) = v that is on board
+#             (picked, not delivered) and whose paired sets are all
+#             picked
+#         if stop k served nothing although some delivery at v is
+#         still open:
+#             blocked[k] = (r, missing requests)   // before its pickup
+#                                                  // or its paired set
+#
+# So co-located visits at consecutive (or the same) stops are merged:
+# one stop, one service time, no travel in between. A stop that
+# serves nothing and blocks nothing is a redundant revisit.
+#
+# With one request per node this is exactly the old rule set:
+# d(r) before p(r), or before a paired pickup, is infeasible.
+#
+# With shared nodes a move can also reassign visits between stops at
+# one node and leave a request on board (its stop at d(r) now comes
+# first and serves someone else). Searches that reorder a complete
+# route therefore also check SERVES_ALL(trial, requests served before).
+# -------------------------------------------------------------
+
+
+def node_visits(instance):
+    """
+    {node: ([requests picked up there], [requests delivered there])}
+    """
+    visits = {}
+    for r in sorted(instance["R"]):
+        visits.setdefault(instance["pickup"][r], ([], []))[0].append(r)
+        visits.setdefault(instance["delivery"][r], ([], []))[1].append(r)
+    return visits
+
+
+def serve(route, instance, visits=None, groups=None):
+    """
+    Walk route and serve visits. Returns
+
+        "stops"     per position, the (request, role) pairs served there
+        "pickup"    {r: position of its pickup}
+        "delivery"  {r: position of its delivery}
+        "blocked"   [(position, node, request, requests not picked yet)]
+                    for stops that served nothing because of
+                    precedence (missing = [r]) or pairing
+    """
+    visits = visits if visits is not None else node_visits(instance)
+    groups = groups if groups is not None else request_groups(instance)
+
+    stops = []
+    picked_at = {}
+    delivered_at = {}
+    blocked = []
+
+    for k, v in enumerate(route):
+        served = []
+        picks, drops = visits.get(v, ((), ()))
+
+        for r in picks:
+            if r not in picked_at:
+                picked_at[r] = k
+                served.append((r, 0))
+
+        first_block = None
+        for r in drops:
+            if r in delivered_at:
+                continue
+            missing = sorted(q for q in groups.get(r, {r}) if q not in picked_at)
+            if missing:
+                if first_block is None:
+                    first_block = (k, v, r, missing)
+                continue
+            delivered_at[r] = k
+            served.append((r, 1))
+
+        if not served and first_block is not None:
+            blocked.append(first_block)
+        stops.append(served)
+
+    return {"stops": stops, "pickup": picked_at, "delivery": delivered_at, "blocked": blocked}
+
+
+def serves_all(route, instance, requests, groups=None):
+    """
+    True if every request in requests is delivered and no stop is
+    blocked by one of them. Visits of other requests are ignored: a
+    partial route may pass their nodes.
+    """
+    visits = {
+        v: ([r for r in picks if r in requests], [r for r in drops if r in requests])
+        for v, (picks, drops) in node_visits(instance).items()
+    }
+    served = serve(route, instance, visits, groups)
+    return not served["blocked"] and all(r in served["delivery"] for r in requests)
+
+
+def route_scope(route, instance, extra=()):
+    """
+    (requests route delivers when pairing is ignored, plus extra;
+    request_groups() restricted to them). A partial route holds only
+    part of some paired sets, and the members not routed yet do not
+    block a delivery (as in route_state.group_bounds()).
+    """
+    requests = set(serve(route, instance, groups={})["delivery"]) | set(extra)
+    groups = {r: (group & requests) | {r} for r, group in request_groups(instance).items()}
+    return requests, groups
+
+
+def shared_nodes(instance):
+    """
+    True if some node hosts more than one visit.
+    """
+    return any(len(picks) + len(drops) > 1 for picks, drops in node_visits(instance).values())
+
+
+def request_groups(instance):
+    """
+    {r: r together with every request of the paired sets containing r}
+    """
+    groups = {r: {r} for r in instance["R"]}
+    for group in instance["paired_sets"]:
+        for r in group:
+            if r in groups:
+                groups[r] |= set(group)
+    return groups
+
+
+def merge_colocated(route):
+    """
+    Route with consecutive stops at the same node merged into one.
+    """
+    merged = route[:1]
+    for v in route[1:]:
+        if v != merged[-1]:
+            merged.append(v)
+    return merged
+
+
+def remove_requests(route, instance, requests, lo=0):
+    """
+    Route without the stops at or after position lo that serve only
+    the given requests (stops shared with other requests stay).
+    """
+    stops = serve(route, instance)["stops"]
+    return [
+        v for k, v in enumerate(route)
+        if k < lo or not stops[k] or any(q not in requests for q, _ in stops[k])
+    ]